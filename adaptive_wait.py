@@ -0,0 +1,111 @@
+"""
+Condition-based waits with latency recording.
+
+wait_until() polls a condition and returns as soon as it holds, giving up after
+a cap. The time each wait actually took is recorded per step name, so the caps
+(essentialRoutines.WAIT_CAPS) can be tuned from observed data instead of
+sleeping for a fixed worst-case duration every time.
+"""
+import os
+import json
+import time
+
+POLL_INTERVAL = 0.1  # Seconds between condition checks
+MAX_SAMPLES_PER_STEP = 1000  # Samples kept per step in the latency report
+
+# step name -> list of [latency_seconds, condition_met]
+_observed = {}
+
+def wait_until(condition, cap, step, poll_interval=POLL_INTERVAL):
+    """
+    Wait until condition() is truthy, or at most cap seconds.
+
+    Args:
+        condition: Callable checked every poll_interval seconds (exceptions count as False)
+        cap: Maximum number of seconds to wait
+        step: Name under which the observed latency is recorded
+
+    Returns:
+        True if the condition was met before the cap
+    """
+    start = time.monotonic()
+    deadline = start + cap
+    met = False
+    while True:
+        try:
+            if condition():
+                met = True
+                break
+        except Exception:
+            pass
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        time.sleep(min(poll_interval, remaining))
+
+    record_latency(step, time.monotonic() - start, met)
+    return met
+
+def record_latency(step, latency, met=True):
+    """Record how long a step took and whether its condition was met"""
+    samples = _observed.setdefault(step, [])
+    samples.append([round(latency, 4), bool(met)])
+    if len(samples) > MAX_SAMPLES_PER_STEP:
+        del samples[0]
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list (None when it is empty)"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(samples_by_step):
+    """Return count, timeout count and p50/p95/max latency for each step"""
+    summary = {}
+    for step, samples in samples_by_step.items():
+        latencies = sorted(sample[0] for sample in samples)
+        summary[step] = {
+            "count": len(samples),
+            "timeouts": sum(1 for sample in samples if not sample[1]),
+            "p50": percentile(latencies, 0.5),
+            "p95": percentile(latencies, 0.95),
+            "max": latencies[-1] if latencies else None,
+            "total_seconds": round(sum(latencies), 3)
+        }
+    return summary
+
+def latency_summary():
+    """Summary of the waits observed in this process"""
+    return summarize(_observed)
+
+def reset_latencies():
+    """Forget the waits observed in this process so far"""
+    _observed.clear()
+
+def save_latency_report(report_file):
+    """
+    Merge the latencies observed in this process into a JSON report file.
+    The file keeps the most recent samples of every step across sessions.
+    """
+    report = {"samples": {}}
+    if os.path.exists(report_file):
+        try:
+            with open(report_file, "r") as f:
+                report = json.load(f)
+        except (json.JSONDecodeError, OSError):
+            pass
+
+    samples = report.setdefault("samples", {})
+    for step, observed in _observed.items():
+        merged = samples.get(step, []) + observed
+        samples[step] = merged[-MAX_SAMPLES_PER_STEP:]
+
+    report["summary"] = summarize(samples)
+    report["updated"] = time.time()
+
+    with open(report_file, "w") as f:
+        json.dump(report, f, indent=2)
+
+    _observed.clear()
+    return report["summary"]
@@ -15,6 +15,8 @@ Performance Settings:
   - 30 scraping sessions per day (MAX_SESSIONS_PER_DAY)
   - 40-60 accounts per batch (in run_following_scraping_session)
   - 15-30 minute intervals between sessions (MIN/MAX_INTERVAL_MINUTES)
+- All sessions run in this process on one logged-in browser (scrape_worker.ScrapeWorker),
+  so no session pays for a new interpreter, browser launch or login
 - Adjust these values carefully if needed, as too aggressive scraping may trigger Instagram's rate limits
 
 Debug Information:
@@ -45,14 +47,18 @@ import json
 import time
 import random
 import logging
-import subprocess
 import traceback
 import datetime
 import fcntl
+import contextlib
 from collections import Counter
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
+import graph_store
+import scrape_worker
+import essentialRoutines
+import instrumentation
 
 def setup_logging():
     """Set up logging configuration"""
@@ -74,6 +80,31 @@ def setup_logging():
     logging.info("Instagram Auto Scraper Starting")
     logging.info("=" * 60)
 
+class LoggingStream:
+    """File-like object that logs every printed line of the scraping routines with a prefix"""
+    
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.buffer = ""
+    
+    def write(self, text):
+        self.buffer += text
+        while "\n" in self.buffer:
+            line, self.buffer = self.buffer.split("\n", 1)
+            if line.strip():
+                logging.info(f"{self.prefix}: {line.strip()}")
+        return len(text)
+    
+    def flush(self):
+        if self.buffer.strip():
+            logging.info(f"{self.prefix}: {self.buffer.strip()}")
+        self.buffer = ""
+
+def log_scrape_event(event):
+    """Log a structured progress event of the scrape worker"""
+    fields = ", ".join(f"{key}={value}" for key, value in event.items() if key not in ("event", "timestamp"))
+    logging.info(f"EVENT {event['event']}: {fields}")
+
 # Constants
 DATA_DIR = "instagram_data"
 FOLLOWERS_FILE = os.path.join(DATA_DIR, "followers.json")
@@ -82,6 +113,7 @@ CURSOR_FILE = os.path.join(DATA_DIR, "next_cursor.json")
 STATUS_FILE = os.path.join(DATA_DIR, "auto_scrape_status.json")
 FOLLOWING_LINKS_FILE = os.path.join(DATA_DIR, "followingLinks.txt")
 PROGRESS_FILE = os.path.join(DATA_DIR, "scraping_progress.json")
+DB_FILE = os.path.join(DATA_DIR, "graph.db")
 
 # Instagram account credentials
 USERNAME = "fretin98"  # Replace with your username if different
@@ -93,6 +125,10 @@ MAX_INTERVAL_MINUTES = 30  # Maximum time between sessions (was 40)
 MAX_SESSIONS_PER_DAY = 30  # Maximum number of sessions per day (was 18)
 HEADLESS_MODE = True  # Run without visible browser window
 FOLLOWINGS_BATCH_SIZE = None  # Will be randomized each session
+MAX_CRAWL_DEPTH = 1  # Hops from your account to crawl (2 also crawls the accounts your followings follow)
+CRAWL_DEPTH_QUOTA = 5000  # Maximum accounts queued at each depth beyond 1
+OWN_PROFILE_STATS_MAX_AGE = 10 * 60  # Seconds the own profile counts read at the start of a cycle are reused
+PROFILE_SESSIONS = False  # Write a per-session timing report to instagram_data/profiles
 NATURAL_BREAK_LENGTH_MINUTES = 120  # 2-hour natural break once per day
 RANDOM_SKIP_CHANCE = 0.1  # 10% chance to randomly skip a session for more human-like behavior
 WAIT_TIME = 1200  # 20 minutes instead of 1 hour
@@ -164,19 +200,32 @@ def get_progress():
 
 def get_following_accounts_progress():
     """Get progress on scraping following accounts"""
-    progress_data = load_json_data(PROGRESS_FILE, {})
-    links = []
+    # The graph store answers with indexed counts instead of loading the whole progress file
+    accounts_processed = None
+    queue_size = 0
+    if os.path.exists(DB_FILE):
+        try:
+            with graph_store.GraphStore(DB_FILE) as store:
+                accounts_processed = store.progress_count()
+                queue_size = store.queue_size()
+        except Exception as e:
+            logging.error(f"Error reading progress from {DB_FILE}: {e}")
+    if accounts_processed is None:
+        accounts_processed = len(load_json_data(PROGRESS_FILE, {}))
     
-    try:
-        if os.path.exists(FOLLOWING_LINKS_FILE):
-            with open(FOLLOWING_LINKS_FILE, "r") as f:
-                links = f.readlines()
-    except Exception as e:
-        logging.error(f"Error reading following links: {e}")
+    # Until the first following session imports followingLinks.txt, the file is the queue
+    accounts_remaining = queue_size
+    if not accounts_remaining:
+        try:
+            if os.path.exists(FOLLOWING_LINKS_FILE):
+                with open(FOLLOWING_LINKS_FILE, "r") as f:
+                    accounts_remaining = sum(1 for line in f if line.strip())
+        except Exception as e:
+            logging.error(f"Error reading following links: {e}")
         
     return {
-        "accounts_processed": len(progress_data),
-        "accounts_remaining": len(links)
+        "accounts_processed": accounts_processed,
+        "accounts_remaining": accounts_remaining
     }
 
 def update_status(session_completed=True, total_following=None, total_followers=None):
@@ -300,8 +349,8 @@ def safe_to_run():
     
     return True
 
-def run_scraping_session():
-    """Run a single scraping session using the main script"""
+def run_scraping_session(worker):
+    """Run a single scraping session of the account itself on the scrape worker"""
     logging.info("Starting new scraping session")
     
     # Check collection progress
@@ -338,105 +387,46 @@ def run_scraping_session():
             max_pages = random.randint(5, 8)  # Standard range for minimal remaining
             logging.info(f"Using {max_pages} max pages for this session")
         
-        # Build command line options
-        command = [
-            "python3", "scrapeMyAccount.py",
-            "--username", USERNAME,
-            "--password", PASSWORD,
-            "--resume",
-            "--headless",
-            "--max-pages", str(max_pages)
-        ]
+        # Build session options
+        options = {
+            "resume": True,
+            "max_pages": max_pages,
+            "stats_max_age": OWN_PROFILE_STATS_MAX_AGE,  # Counts were just read by fetch_profile_counts
+            "suspend_on_rate_limit": True  # The following session does maintenance during the back-off
+        }
         
         # If we have a lot of existing followers that we need to scroll past,
-        # add a special flag to use a more aggressive scrolling approach
-        if progress["followers_collected"] > 100 and followers_remaining > 100:
-            command.append("--aggressive-resume")
+        # use a more aggressive scrolling approach (not needed when the saved
+        # cursor lets scrape_whole_list continue where the last session stopped)
+        saved_cursor = load_json_data(CURSOR_FILE, {}) or {}
+        if essentialRoutines.is_resumable_cursor(saved_cursor.get("followers"), "followers", USERNAME):
+            logging.info(f"Resuming followers from the saved cursor at offset {saved_cursor['followers'].get('offset')}")
+        elif progress["followers_collected"] > 100 and followers_remaining > 100:
+            options["aggressive_resume"] = True
             logging.info(f"Using aggressive resume mode to get past {progress['followers_collected']} existing followers")
         
         # If following is complete, only scrape followers
         if progress["following_collected"] >= progress["following_total"]:
-            command.append("--no-following")
+            options["scrape_following"] = False
             logging.info("Following collection is complete. Only scraping followers in this session.")
         
         # If followers is complete, only scrape following
         if progress["followers_collected"] >= progress["followers_total"]:
-            command.append("--no-followers")
+            options["scrape_followers"] = False
             logging.info("Followers collection is complete. Only scraping following in this session.")
         
-        # Execute the command and capture output
-        process = subprocess.Popen(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True
-        )
-        
-        # Read and log output in real-time
-        total_following = None
-        total_followers = None
-        
-        for line in iter(process.stdout.readline, ""):
-            line = line.strip()
-            if line:
-                logging.info(f"SCRAPER: {line}")
-                
-                # Check for the profile stats line
-                if "Profile Stats:" in line:
-                    logging.info("Found profile stats line")
-                
-                # Check for the specific followers/following count line
-                if "Followers:" in line and "Following:" in line:
-                    try:
-                        # Parse the line: "Followers: X, Following: Y"
-                        parts = line.split(",")
-                        if len(parts) >= 2:
-                            followers_part = parts[0].strip()
-                            following_part = parts[1].strip()
-                            
-                            # Extract numbers
-                            if "Followers:" in followers_part:
-                                total_followers = int(followers_part.split("Followers:")[1].strip())
-                                logging.info(f"Extracted total followers: {total_followers}")
-                            
-                            if "Following:" in following_part:
-                                total_following = int(following_part.split("Following:")[1].strip())
-                                logging.info(f"Extracted total following: {total_following}")
-                    except Exception as e:
-                        logging.error(f"Error parsing followers/following counts: {e}")
-                
-                # Alternative method to extract counts from individual lines
-                elif "Following:" in line and "," in line:
-                    try:
-                        total_following = int(line.split("Following:")[1].split(",")[0].strip())
-                        logging.info(f"Extracted total following: {total_following}")
-                    except Exception as e:
-                        logging.error(f"Error parsing following count: {e}")
-                
-                elif "Followers:" in line and "," in line:
-                    try:
-                        total_followers = int(line.split("Followers:")[1].split(",")[0].strip())
-                        logging.info(f"Extracted total followers: {total_followers}")
-                    except Exception as e:
-                        logging.error(f"Error parsing followers count: {e}")
-        
-        # Wait for process to complete
-        process.wait()
-        
-        # Check for errors
-        if process.returncode != 0:
-            error_output = process.stderr.read()
-            logging.error(f"Scraping script failed with return code {process.returncode}")
-            logging.error(f"Error output: {error_output}")
-            return False
+        with contextlib.redirect_stdout(LoggingStream("SCRAPER")):
+            summary = worker.run_account_session(**options)
         
         # Update status with the actual counts from the profile
+        total_followers = summary.get("followers_total") or None
+        total_following = summary.get("following_total") or None
         if total_following is not None or total_followers is not None:
             logging.info(f"Updating status with dynamic counts - Followers: {total_followers}, Following: {total_following}")
             update_status(session_completed=True, total_following=total_following, total_followers=total_followers)
         else:
-            # If we couldn't extract the counts, just update session completed
-            logging.warning("Could not extract follower/following counts from output")
+            # The profile header could not be read, so just update session completed
+            logging.warning("Could not read follower/following counts from the profile")
             update_status(session_completed=True)
         
         return True
@@ -446,8 +436,8 @@ def run_scraping_session():
         logging.error(traceback.format_exc())
         return False
 
-def run_following_scraping_session():
-    """Run a session to scrape data from following accounts"""
+def run_following_scraping_session(worker):
+    """Run a session to scrape data from following accounts on the scrape worker"""
     logging.info("Starting following accounts scraping session")
     
     # First ensure we remove any links that have already been processed
@@ -457,15 +447,10 @@ def run_following_scraping_session():
     logging.info("DEBUG: Checking for duplicates before processing")
     debug_check_duplicates()
     
-    # Log the number of accounts before processing
-    before_count = 0
-    try:
-        with open(FOLLOWING_LINKS_FILE, "r") as f:
-            links = f.readlines()
-            before_count = len(links)
+    # Log the number of accounts before processing (None until the first session imported followingLinks.txt)
+    before_count = crawl_queue_size()
+    if before_count is not None:
         logging.info(f"DEBUG: Before processing - {before_count} accounts in queue")
-    except Exception as e:
-        logging.error(f"Error counting accounts before processing: {e}")
     
     # Check if there are any following accounts left to process
     following_progress = get_following_accounts_progress()
@@ -479,59 +464,22 @@ def run_following_scraping_session():
     logging.info(f"Using random batch size of {batch_size} accounts for this session")
     
     try:
-        # Run the scrapingFollowing script with command line arguments
-        command = [
-            "python3", "scrapingFollowing.py",
-            "--username", USERNAME,
-            "--password", PASSWORD,
-            "--batch-size", str(batch_size),
-            "--headless",
-            "--debug"  # Add debug flag to enable debugging in scrapingFollowing.py
-        ]
-        
-        # Execute the command and capture output
-        process = subprocess.Popen(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True
-        )
-        
-        # Read and log output in real-time
-        for line in iter(process.stdout.readline, ""):
-            line = line.strip()
-            if line:
-                logging.info(f"FOLLOWING SCRAPER: {line}")
-        
-        # Wait for process to complete
-        process.wait()
-        
-        # Check for errors
-        if process.returncode != 0:
-            error_output = process.stderr.read()
-            logging.error(f"Following scraping failed with return code {process.returncode}")
-            logging.error(f"Error output: {error_output}")
-            result = False
-        else:
-            result = True
+        with contextlib.redirect_stdout(LoggingStream("FOLLOWING SCRAPER")):
+            summary = worker.run_following_session(batch_size, debug=True, max_depth=MAX_CRAWL_DEPTH, depth_quota=CRAWL_DEPTH_QUOTA)
+        logging.info(f"Following session summary: {summary}")
+        result = summary["processed"] > 0 or summary["failed"] == 0
         
         # After processing, check the number of accounts again
-        try:
-            with open(FOLLOWING_LINKS_FILE, "r") as f:
-                links = f.readlines()
-                after_count = len(links)
-            
-            diff = after_count - before_count
+        after_count = crawl_queue_size()
+        if before_count is not None and after_count is not None:
+            # Accounts discovered for the next crawl depth are added to the queue
+            diff = after_count - before_count - summary.get("discovered", 0)
             if diff >= 0:
                 logging.error(f"DEBUG: ISSUE DETECTED - Queue size didn't decrease. Before: {before_count}, After: {after_count}, Diff: {diff}")
             else:
                 logging.info(f"DEBUG: After processing - {after_count} accounts in queue (removed {abs(diff)})")
-            
-            # Debug: Check for duplicates after processing
-            logging.info("DEBUG: Checking for duplicates after processing")
-            debug_check_duplicates()
-        except Exception as e:
-            logging.error(f"Error counting accounts after processing: {e}")
+        elif after_count is not None:
+            logging.info(f"DEBUG: After processing - {after_count} accounts in queue")
         
         # Finally, remove any links that have been processed
         remove_processed_links()
@@ -606,93 +554,23 @@ def check_status():
         "follower_percent": followers_percent
     }
 
-def fetch_profile_counts():
+def fetch_profile_counts(worker):
     """Fetch current follower and following counts directly from the profile"""
     logging.info("Fetching current follower and following counts from profile...")
     
     try:
-        # Run scrapeMyAccount.py with minimal options just to get the counts
-        command = [
-            "python3", "scrapeMyAccount.py",
-            "--username", USERNAME,
-            "--password", PASSWORD,
-            "--headless",
-            "--no-followers",  # Don't scrape followers
-            "--no-following",  # Don't scrape following
-            "--max-pages", "1"  # Minimal scraping
-        ]
+        with contextlib.redirect_stdout(LoggingStream("PROFILE CHECK")):
+            stats = worker.fetch_profile_counts(max_age=OWN_PROFILE_STATS_MAX_AGE)
         
-        # Execute the command and capture output
-        process = subprocess.Popen(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True
-        )
-        
-        total_following = None
-        total_followers = None
-        
-        # Process the output to extract counts
-        for line in iter(process.stdout.readline, ""):
-            line = line.strip()
-            if line:
-                logging.info(f"PROFILE CHECK: {line}")
-                
-                # Check for the profile stats line
-                if "Profile Stats:" in line:
-                    logging.info("Found profile stats")
-                
-                # Check for the specific followers/following count line
-                if "Followers:" in line and "Following:" in line:
-                    try:
-                        # Parse the line: "Followers: X, Following: Y"
-                        parts = line.split(",")
-                        if len(parts) >= 2:
-                            followers_part = parts[0].strip()
-                            following_part = parts[1].strip()
-                            
-                            # Extract numbers
-                            if "Followers:" in followers_part:
-                                total_followers = int(followers_part.split("Followers:")[1].strip())
-                                logging.info(f"Extracted total followers: {total_followers}")
-                            
-                            if "Following:" in following_part:
-                                total_following = int(following_part.split("Following:")[1].strip())
-                                logging.info(f"Extracted total following: {total_following}")
-                    except Exception as e:
-                        logging.error(f"Error parsing followers/following counts: {e}")
-                
-                # Alternative method to extract counts from individual lines
-                elif "Following:" in line and "," in line:
-                    try:
-                        total_following = int(line.split("Following:")[1].split(",")[0].strip())
-                        logging.info(f"Extracted total following: {total_following}")
-                    except Exception as e:
-                        logging.error(f"Error parsing following count: {e}")
-                
-                elif "Followers:" in line and "," in line:
-                    try:
-                        total_followers = int(line.split("Followers:")[1].split(",")[0].strip())
-                        logging.info(f"Extracted total followers: {total_followers}")
-                    except Exception as e:
-                        logging.error(f"Error parsing followers count: {e}")
-        
-        # Wait for process to complete
-        process.wait()
-        
-        # Check for errors
-        if process.returncode != 0:
-            error_output = process.stderr.read()
-            logging.error(f"Profile check failed with return code {process.returncode}")
-            logging.error(f"Error output: {error_output}")
-            return None, None
+        total_followers = stats.get("followers") or None
+        total_following = stats.get("following") or None
         
         # Return the counts if found
         if total_following is not None or total_followers is not None:
+            logging.info(f"Profile counts - Followers: {total_followers}, Following: {total_following}")
             return total_followers, total_following
         else:
-            logging.warning("Could not extract follower/following counts from profile check")
+            logging.warning("Could not read follower/following counts from the profile")
             return None, None
         
     except Exception as e:
@@ -703,6 +581,11 @@ def fetch_profile_counts():
 def debug_check_duplicates():
     """Check for duplicate links in the followingLinks.txt file and remove them"""
     try:
+        if not links_file_is_queue():
+            # crawl_queue is keyed on the link, so the store cannot hold duplicates
+            logging.info(f"The crawl queue is kept in {DB_FILE}; not checking {FOLLOWING_LINKS_FILE}")
+            return
+        
         if not os.path.exists(FOLLOWING_LINKS_FILE):
             logging.warning(f"Links file {FOLLOWING_LINKS_FILE} does not exist yet")
             return
@@ -790,82 +673,55 @@ def debug_inspect_links_file():
             
             fixed_links.append(link)
         
-        if has_issues:
+        if has_issues and links_file_is_queue():
             logging.info(f"Fixed {len(links) - len(fixed_links)} formatting issues in links file")
             save_links_with_lock(fixed_links, FOLLOWING_LINKS_FILE)
+        elif has_issues:
+            # The file is re-exported from the crawl queue after the next session
+            logging.info(f"Not rewriting {FOLLOWING_LINKS_FILE}: the crawl queue in {DB_FILE} is authoritative")
         
     except Exception as e:
         logging.error(f"Error inspecting links file: {e}")
 
+def crawl_queue_size():
+    """Number of links in the graph store's crawl queue, or None before the store exists"""
+    if not os.path.exists(DB_FILE):
+        return None
+    try:
+        with graph_store.GraphStore(DB_FILE) as store:
+            return store.queue_size()
+    except Exception as e:
+        logging.error(f"Error reading the crawl queue from {DB_FILE}: {e}")
+        return None
+
+def links_file_is_queue():
+    """
+    True while followingLinks.txt is still the input of the crawl queue. Once the
+    first following session imported it, the crawl queue in the graph store is
+    authoritative and the file is only an export, overwritten after every session
+    """
+    return not crawl_queue_size()
+
 def remove_processed_links():
     """
-    REMOVED: Previously removed links from followingLinks.txt that have already been processed 
-    (first item in adjacency list)
-    
-    NOW: This function is disabled as we need to re-scrape accounts that might have been
-    rate-limited to only 10 users previously
+    Remove the links of already processed accounts from the crawl queue in the graph store.
+    Rate-limited accounts stay queued so they are scraped again.
     """
-    # This function is now disabled to allow re-scraping of accounts
-    logging.info("remove_processed_links function is disabled to allow re-scraping of potential rate-limited accounts")
-    return
-    
-    # The code below is kept but won't be executed
+    if not os.path.exists(DB_FILE):
+        logging.info(f"No graph store at {DB_FILE} yet. No links to remove.")
+        return
     try:
-        if not os.path.exists(FOLLOWING_LINKS_FILE):
-            logging.warning(f"Links file {FOLLOWING_LINKS_FILE} does not exist yet")
-            return
-            
-        if not os.path.exists(os.path.join(DATA_DIR, "adjList.txt")):
-            logging.info("No adjList.txt file found yet. No links to remove.")
-            return
-        
-        # Get processed accounts from adjList.txt (first item in each line)
-        processed_accounts = set()
-        with open(os.path.join(DATA_DIR, "adjList.txt"), "r") as adj_file:
-            for line in adj_file:
-                parts = line.strip().split()
-                if len(parts) >= 1:
-                    processed_accounts.add(parts[0])
-        
-        logging.info(f"Found {len(processed_accounts)} processed accounts in adjList.txt")
-        
-        # Read links from followingLinks.txt
-        with open(FOLLOWING_LINKS_FILE, "r") as f:
-            links = f.readlines()
-        
-        initial_count = len(links)
-        logging.info(f"Found {initial_count} links in followingLinks.txt")
-        
-        # Filter out links for accounts that have already been processed
-        filtered_links = []
-        removed_links = []
-        
-        for link in links:
-            link_stripped = link.strip()
-            if not link_stripped:
-                continue
-                
-            # Extract username from the link
-            username = link_stripped.rstrip('/').split('/')[-1]
-            
-            if username in processed_accounts:
-                removed_links.append(username)
+        with graph_store.GraphStore(DB_FILE) as store:
+            removed = store.remove_processed_links()
+            if removed:
+                logging.info(f"Removed {removed} already processed links from the crawl queue ({store.queue_size()} remaining)")
             else:
-                filtered_links.append(link_stripped)
-        
-        # Save the filtered links back to the file
-        if len(filtered_links) < initial_count:
-            save_links_with_lock(filtered_links, FOLLOWING_LINKS_FILE)
-            logging.info(f"Removed {initial_count - len(filtered_links)} already processed links from followingLinks.txt")
-            if len(removed_links) > 0:
-                logging.info(f"Examples of removed accounts: {removed_links[:5]}")
-        else:
-            logging.info("No processed links found in followingLinks.txt")
-        
+                logging.info("No processed links found in the crawl queue")
     except Exception as e:
         logging.error(f"Error removing processed links: {e}")
         logging.error(traceback.format_exc())
 
+@instrumentation.timed("save_links_with_lock")
 def save_links_with_lock(links, file_path):
     """Save links with file locking to prevent race conditions"""
     try:
@@ -883,6 +739,12 @@ def main():
     setup_logging()
     logging.info("Auto-scraper script started")
     
+    if PROFILE_SESSIONS:
+        instrumentation.enable()
+    
+    # One browser stays logged in across all sessions (started on first use)
+    worker = scrape_worker.ScrapeWorker(USERNAME, PASSWORD, headless=HEADLESS_MODE, on_event=log_scrape_event)
+    
     try:
         # Ensure data directory exists
         ensure_dir_exists(DATA_DIR)
@@ -901,7 +763,7 @@ def main():
         remove_processed_links()
         
         # Get current profile counts to ensure we have accurate totals
-        total_followers, total_following = fetch_profile_counts()
+        total_followers, total_following = fetch_profile_counts(worker)
         
         # If we got valid counts, update the status file
         if total_followers is not None or total_following is not None:
@@ -934,7 +796,7 @@ def main():
                     logging.info("Running an extended collection session...")
                     
                     # Run session
-                    session_result = run_scraping_session()
+                    session_result = run_scraping_session(worker)
                     
                     # Wait for a shorter time before continuing (1-2 hours)
                     random_wait = random.randint(WAIT_TIME//2, WAIT_TIME)
@@ -950,12 +812,12 @@ def main():
                 continue
                 
             # Regular collection session
-            session_result = run_scraping_session()
+            session_result = run_scraping_session(worker)
             
             # Now run a following accounts scraping session to collect network data
             # This will scrape data from 10-20 following accounts per session
             logging.info("Now running a session to scrape following accounts network data...")
-            following_result = run_following_scraping_session()
+            following_result = run_following_scraping_session(worker)
             logging.info(f"Following accounts scraping session completed with result: {following_result}")
             
             # Determine wait time between sessions (3-6 hours normally)
@@ -973,6 +835,7 @@ def main():
         logging.error(f"Unexpected error: {e}")
         logging.error(traceback.format_exc())
     finally:
+        worker.close()
         logging.info("Auto-scraper script ended")
 
 if __name__ == "__main__":
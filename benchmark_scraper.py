@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+End-to-end scraper benchmark against the offline fake Instagram server.
+
+Starts fake_instagram_server on a local port, points essentialRoutines at it
+and drives the real login_insta, get_profile_stats, scrape_whole_list and
+get_following_links functions through headless Chrome. For every step it
+reports users/sec, WebDriver round trips per dialog page and the time spent
+sleeping or waiting (session_restore reports 1 user when the cached cookie
+session was accepted), so scraping changes can be compared without touching the
+live site. get_following_links reads the links from the open following dialog,
+like it does when it is called without usernames.
+
+Usage:
+    python3 benchmark_scraper.py --followers 500 --following 300 --latency-ms 200
+    python3 benchmark_scraper.py --throttle-after 100 --observer-mode --json results.json
+"""
+import os
+import json
+import time
+import tempfile
+import argparse
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+
+import essentialRoutines
+import adaptive_wait
+import fake_instagram_server
+import session_cache
+
+BENCHMARK_ACCOUNT = "benchmark_target"
+# Sleeps longer than this (the rate limit back-off) are counted but not actually slept
+MAX_REAL_SLEEP = 5.0
+
+class CountingTime:
+    """Stands in for the time module inside essentialRoutines, counting its sleeps"""
+
+    def __init__(self, counters):
+        self.counters = counters
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+    def sleep(self, seconds):
+        if seconds > MAX_REAL_SLEEP:
+            self.counters.skipped_sleep_seconds += seconds
+            return
+        self.counters.sleep_seconds += seconds
+        time.sleep(seconds)
+
+class BenchmarkCounters:
+    """Counts WebDriver round trips, dialog pages and sleep time while a step runs"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.round_trips = 0
+        self.pages = 0
+        self.sleep_seconds = 0.0
+        self.skipped_sleep_seconds = 0.0
+
+    def install(self, driver):
+        """Wrap driver.execute, UsernameAccumulator.start_page and essentialRoutines' sleeps with counting versions"""
+        original_execute = driver.execute
+        original_start_page = essentialRoutines.UsernameAccumulator.start_page
+        counters = self
+
+        def counting_execute(driver_command, params=None):
+            counters.round_trips += 1
+            return original_execute(driver_command, params)
+
+        def counting_start_page(accumulator):
+            counters.pages += 1
+            return original_start_page(accumulator)
+
+        driver.execute = counting_execute
+        essentialRoutines.UsernameAccumulator.start_page = counting_start_page
+        essentialRoutines.time = CountingTime(counters)
+
+        def uninstall():
+            del driver.execute
+            essentialRoutines.UsernameAccumulator.start_page = original_start_page
+            essentialRoutines.time = time
+
+        return uninstall
+
+def run_step(name, counters, func):
+    """
+    Run one benchmark step and collect its metrics.
+
+    Args:
+        name: Step name shown in the report
+        counters: BenchmarkCounters installed on the driver
+        func: Callable returning the number of users the step produced
+
+    Returns:
+        Dictionary of metrics for the step
+    """
+    counters.reset()
+    adaptive_wait.reset_latencies()
+    start = time.monotonic()
+    users = func()
+    elapsed = time.monotonic() - start
+
+    waits = adaptive_wait.latency_summary()
+    result = {
+        "step": name,
+        "users": users,
+        "seconds": round(elapsed, 3),
+        "users_per_sec": round(users / elapsed, 2) if elapsed > 0 else None,
+        "round_trips": counters.round_trips,
+        "pages": counters.pages,
+        "round_trips_per_page": round(counters.round_trips / counters.pages, 2) if counters.pages else None,
+        "sleep_seconds": round(counters.sleep_seconds, 3),
+        "skipped_sleep_seconds": round(counters.skipped_sleep_seconds, 3),
+        "wait_seconds": round(sum(summary["total_seconds"] for summary in waits.values()), 3),
+        "waits": waits
+    }
+    print(f"{name}: {users} users in {elapsed:.2f}s")
+    return result
+
+def print_report(results):
+    """Print the benchmark results as a table"""
+    header = f"{'step':<20} {'users':>7} {'secs':>8} {'users/s':>8} {'trips':>7} {'pages':>6} {'trips/pg':>9} {'sleep s':>8} {'wait s':>8}"
+    print("\n" + header)
+    print("-" * len(header))
+    for result in results:
+        users_per_sec = result["users_per_sec"] if result["users_per_sec"] is not None else "-"
+        trips_per_page = result["round_trips_per_page"] if result["round_trips_per_page"] is not None else "-"
+        print(
+            f"{result['step']:<20} {result['users']:>7} {result['seconds']:>8} {users_per_sec:>8} "
+            f"{result['round_trips']:>7} {result['pages']:>6} {trips_per_page:>9} "
+            f"{result['sleep_seconds']:>8} {result['wait_seconds']:>8}"
+        )
+        if result["skipped_sleep_seconds"]:
+            print(f"{'':<20} rate limit back-off requested {result['skipped_sleep_seconds']:.0f}s (not slept)")
+
+    print("\nSlowest waits (p95 seconds):")
+    for result in results:
+        for step, summary in sorted(result["waits"].items(), key=lambda item: -(item[1]["p95"] or 0)):
+            print(f"  {result['step']:<20} {step:<15} count={summary['count']:<4} timeouts={summary['timeouts']:<3} p50={summary['p50']} p95={summary['p95']}")
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Benchmark the scraping routines against a local fake Instagram')
+    parser.add_argument('--chromedriver', default=None, help='Path to chromedriver (default: look it up on PATH)')
+    parser.add_argument('--followers', type=int, default=200, help='Followers list size (default: 200)')
+    parser.add_argument('--following', type=int, default=150, help='Following list size (default: 150)')
+    parser.add_argument('--page-size', type=int, default=12, help='Rows rendered per load (default: 12)')
+    parser.add_argument('--latency-ms', type=int, default=300, help='Render latency per load in milliseconds (default: 300)')
+    parser.add_argument('--throttle-after', type=int, default=None, help='Render exactly 10 rows per load after this many rows')
+    parser.add_argument('--virtualize', action='store_true', help='Drop old rows from the DOM like a virtualized list')
+    parser.add_argument('--max-pages', type=int, default=50, help='max_pages passed to scrape_whole_list (default: 50)')
+    parser.add_argument('--observer-mode', action='store_true', help='Run scrape_whole_list with observer_mode')
+    parser.add_argument('--no-js-extraction', action='store_true', help='Run scrape_whole_list with the Selenium extraction only')
+    parser.add_argument('--json', default=None, help='Also write the results to this JSON file')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    server, base_url = fake_instagram_server.start_server(
+        followers=args.followers,
+        following=args.following,
+        page_size=args.page_size,
+        latency_ms=args.latency_ms,
+        throttle_after=args.throttle_after,
+        virtualize=args.virtualize
+    )
+    essentialRoutines.INSTAGRAM_URL = base_url
+    profile_link = f"{base_url}/{BENCHMARK_ACCOUNT}/"
+    print(f"Fake Instagram serving at {base_url}")
+
+    options = Options()
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--headless")
+    options.add_argument("--window-size=1920,1080")
+    if args.chromedriver:
+        driver = webdriver.Chrome(service=Service(executable_path=args.chromedriver), options=options)
+    else:
+        driver = webdriver.Chrome(options=options)
+
+    counters = BenchmarkCounters()
+    uninstall = counters.install(driver)
+    scrape_options = {
+        "max_pages": args.max_pages,
+        "js_extraction": not args.no_js_extraction,
+        "observer_mode": args.observer_mode
+    }
+    results = []
+    session_file = os.path.join(tempfile.mkdtemp(prefix="benchmark_session_"), "session_cookies.json")
+
+    def scrape(list_type):
+        usernames, _ = essentialRoutines.scrape_whole_list(list_type, driver, profile_link, **scrape_options)
+        return len(usernames)
+
+    def open_following_dialog():
+        driver.get(profile_link)
+        essentialRoutines.wait_for_profile(driver)
+        driver.find_element(By.XPATH, "//a[contains(@href, '/following/')]").click()
+        essentialRoutines.wait_for_dialog_rows(driver)
+
+    def restore_session():
+        # Start from a cookie-less browser, as a new scraping process would
+        driver.delete_all_cookies()
+        return int(session_cache.restore_session(driver, "benchmark", session_file))
+
+    def profile_stats():
+        driver.get(profile_link)
+        stats = essentialRoutines.get_profile_stats(driver)
+        return stats['followers'] + stats['following']
+
+    try:
+        results.append(run_step("login_insta", counters, lambda: essentialRoutines.login_insta(driver, "benchmark", "benchmark") or 0))
+        session_cache.save_session(driver, "benchmark", session_file)
+        results.append(run_step("session_restore", counters, restore_session))
+        results.append(run_step("get_profile_stats", counters, profile_stats))
+        results.append(run_step("followers", counters, lambda: scrape("followers")))
+        results.append(run_step("following", counters, lambda: scrape("following")))
+        # Without usernames get_following_links goes through its selectors on the open dialog
+        open_following_dialog()
+        results.append(run_step("get_following_links", counters, lambda: len(essentialRoutines.get_following_links(driver))))
+    finally:
+        uninstall()
+        driver.quit()
+        server.shutdown()
+
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": server.config, "options": scrape_options, "results": results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Sampled betweenness and closeness centrality for the full graph.
+
+nx.betweenness_centrality and nx.closeness_centrality run a BFS from every node
+in pure Python, which takes hours on the full graph. Here both are estimated
+from a random sample of source nodes (pivots):
+    - betweenness: Brandes' dependency accumulation from each pivot, done level
+      by level with NumPy, scaled like nx.betweenness_centrality(G, k=samples)
+    - closeness: multi-source BFS, where up to 64 sources share one uint64
+      word per node and a BFS level for all of them is a few array operations;
+      closeness follows nx.closeness_centrality (incoming distances,
+      Wasserman-Faust scaling)
+With samples >= the number of nodes every node is a pivot and the results are
+exact. The pivots are split over a process pool whose workers memory-map the
+graph's CSR/CSC arrays from .npy files, so the graph is shared instead of
+being copied into every worker. Hoeffding bounds give the estimation error as
+a function of the number of samples.
+
+Usage:
+    python3 centrality.py --samples 1000 --workers 4
+    python3 centrality.py --betweenness-error 0.01 --json centrality.json
+"""
+import os
+import json
+import math
+import time
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+
+import numpy as np
+
+import compact_graph
+import graph_analytics
+
+ADJ_LIST_FILE = "adjList.txt"
+DEFAULT_SAMPLES = 1024
+SOURCES_PER_WORD = 64     # Closeness sources sharing one bitmask word per node
+WORDS_PER_BATCH = 4       # Bitmask words per closeness batch (256 sources)
+PIVOTS_PER_TASK = 32      # Betweenness pivots per process pool task
+CSR_ARRAYS = ("indptr", "indices", "in_indptr", "in_indices")
+
+# CSR arrays of the graph as seen by the process pool workers
+_shared = {}
+
+#%% Shared memory-mapped graph
+def export_shared_csr(graph, directory):
+    """Write the graph's CSR/CSC arrays to .npy files in directory for memory-mapping"""
+    os.makedirs(directory, exist_ok=True)
+    for name in CSR_ARRAYS:
+        np.save(os.path.join(directory, f"{name}.npy"), getattr(graph, name))
+
+def load_shared_csr(directory):
+    """Memory-map the arrays written by export_shared_csr (read-only, shared between processes)"""
+    return {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in CSR_ARRAYS}
+
+def _init_worker(directory):
+    _shared.clear()
+    _shared.update(load_shared_csr(directory))
+
+def _graph_arrays(graph):
+    return {name: getattr(graph, name) for name in CSR_ARRAYS}
+
+def _run_tasks(graph, function, tasks, workers):
+    """
+    Run function(arrays, task) for every task, in a process pool when workers > 1.
+
+    Returns:
+        List of the task results
+    """
+    if workers <= 1 or len(tasks) <= 1:
+        arrays = _graph_arrays(graph)
+        return [function(arrays, task) for task in tasks]
+
+    directory = tempfile.mkdtemp(prefix="centrality_csr_")
+    try:
+        export_shared_csr(graph, directory)
+        with multiprocessing.Pool(min(workers, len(tasks)), initializer=_init_worker, initargs=(directory,)) as pool:
+            return pool.starmap(_run_shared_task, [(function, task) for task in tasks])
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def _run_shared_task(function, task):
+    return function(_shared, task)
+
+#%% Level-synchronous traversal
+def _expand(indptr, indices, frontier):
+    """
+    Return the (source, target) pairs of all edges leaving the frontier nodes.
+    """
+    starts = indptr[frontier]
+    counts = indptr[frontier + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    sources = np.repeat(frontier, counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return sources, indices[np.repeat(starts, counts) + offsets].astype(np.int64)
+
+def _source_dependencies(indptr, indices, source, num_nodes):
+    """
+    Brandes' dependencies delta_s(v) of every node on the shortest paths from one source.
+    """
+    sigma = np.zeros(num_nodes)
+    sigma[source] = 1.0
+    distance = np.full(num_nodes, -1, dtype=np.int32)
+    distance[source] = 0
+
+    # Edges of the shortest-path DAG, one (sources, targets) pair per BFS level
+    levels = []
+    frontier = np.array([source], dtype=np.int64)
+    depth = 0
+    while frontier.size:
+        sources, targets = _expand(indptr, indices, frontier)
+        if not sources.size:
+            break
+        new_nodes = np.unique(targets[distance[targets] < 0])
+        distance[new_nodes] = depth + 1
+        on_dag = distance[targets] == depth + 1
+        sources, targets = sources[on_dag], targets[on_dag]
+        sigma += np.bincount(targets, weights=sigma[sources], minlength=num_nodes)
+        levels.append((sources, targets))
+        frontier = new_nodes
+        depth += 1
+
+    delta = np.zeros(num_nodes)
+    for sources, targets in reversed(levels):
+        delta += np.bincount(sources, weights=sigma[sources] / sigma[targets] * (1.0 + delta[targets]), minlength=num_nodes)
+    delta[source] = 0.0
+    return delta
+
+def _betweenness_task(arrays, pivots):
+    """Sum of the dependencies of a chunk of pivots"""
+    indptr, indices = arrays["indptr"], arrays["indices"]
+    num_nodes = len(indptr) - 1
+    total = np.zeros(num_nodes)
+    for pivot in pivots:
+        total += _source_dependencies(indptr, indices, int(pivot), num_nodes)
+    return total
+
+def _popcount(words):
+    """Number of set bits of every row of a uint64 array"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    return np.unpackbits(words.view(np.uint8), axis=-1).sum(axis=-1, dtype=np.int64)
+
+def _closeness_task(arrays, sources):
+    """
+    Multi-source BFS along out-edges from a batch of sources.
+
+    Every node keeps one bit per source in WORDS_PER_BATCH uint64 words; a BFS
+    level ORs the frontier bits of each node's predecessors (CSC arrays).
+
+    Returns:
+        Tuple of (number of sources reaching each node, sum of their distances to it, deepest level)
+    """
+    in_indptr, in_indices = arrays["in_indptr"], arrays["in_indices"]
+    num_nodes = len(in_indptr) - 1
+    words = (len(sources) + SOURCES_PER_WORD - 1) // SOURCES_PER_WORD
+
+    seen = np.zeros((num_nodes, words), dtype=np.uint64)
+    for position, source in enumerate(sources):
+        seen[source, position // SOURCES_PER_WORD] |= np.uint64(1) << np.uint64(position % SOURCES_PER_WORD)
+    frontier = seen.copy()
+
+    # Segments of the CSC arrays of nodes with at least one predecessor
+    has_predecessors = np.diff(in_indptr) > 0
+    segment_starts = np.asarray(in_indptr[:-1])[has_predecessors]
+
+    reached = np.zeros(num_nodes, dtype=np.int64)
+    distance_sum = np.zeros(num_nodes, dtype=np.int64)
+    depth = 0
+    while segment_starts.size:
+        incoming = np.zeros_like(seen)
+        incoming[has_predecessors] = np.bitwise_or.reduceat(frontier[in_indices], segment_starts, axis=0)
+        frontier = incoming & ~seen
+        counts = _popcount(frontier)
+        if not counts.any():
+            break
+        depth += 1
+        seen |= frontier
+        reached += counts
+        distance_sum += counts * depth
+    return reached, distance_sum, depth
+
+#%% Sampling and error bounds
+def sample_pivots(num_nodes, samples, seed=None):
+    """Return sorted pivot ids: all nodes when samples >= num_nodes, else a uniform sample without replacement"""
+    if samples >= num_nodes:
+        return np.arange(num_nodes, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(num_nodes, size=samples, replace=False)).astype(np.int64)
+
+def hoeffding_error(samples, value_range=1.0, estimates=1, confidence=0.95):
+    """
+    Half-width of a Hoeffding confidence interval.
+
+    Args:
+        samples: Independent samples averaged per estimate
+        value_range: Range of one sample's value
+        estimates: Number of estimates that must hold together (union bound)
+        confidence: Probability that all estimates are within the bound
+
+    Returns:
+        Error bound epsilon
+    """
+    if samples <= 0:
+        return math.inf
+    return value_range * math.sqrt(math.log(2 * estimates / (1 - confidence)) / (2 * samples))
+
+def betweenness_error_bound(num_nodes, samples, confidence=0.95):
+    """
+    Bound on the absolute error of every normalized betweenness estimate
+    (0 when all nodes are pivots). One pivot's normalized dependency on a node
+    lies in [0, 1].
+    """
+    if samples >= num_nodes:
+        return 0.0
+    return hoeffding_error(samples - 1, 1.0, num_nodes, confidence)
+
+def samples_for_betweenness_error(num_nodes, epsilon, confidence=0.95):
+    """Number of pivots for which betweenness_error_bound is at most epsilon"""
+    needed = math.ceil(math.log(2 * num_nodes / (1 - confidence)) / (2 * epsilon ** 2)) + 1
+    return min(num_nodes, needed)
+
+def closeness_error_bound(num_nodes, samples, diameter, confidence=0.95):
+    """
+    Bound on the absolute error of every estimated mean incoming distance
+    (Eppstein-Wang); one sampled distance lies in [0, diameter]. The closeness
+    of a node is the inverse of that mean scaled by its reach, so this bounds
+    its relative error by roughly bound / mean distance.
+    """
+    if samples >= num_nodes:
+        return 0.0
+    return hoeffding_error(samples - 1, diameter, num_nodes, confidence)
+
+#%% Centrality
+def approximate_betweenness(graph, samples=DEFAULT_SAMPLES, workers=1, seed=None, confidence=0.95):
+    """
+    Estimate the normalized betweenness of every node (as nx.betweenness_centrality(G, k=samples)).
+
+    Args:
+        graph: CompactGraph
+        samples: Number of pivots (every node when >= num_nodes: exact)
+        workers: Processes to spread the pivots over
+        seed: Seed of the pivot sample
+
+    Returns:
+        Tuple of (scores indexed by node id, error bound at the given confidence)
+    """
+    n = graph.num_nodes
+    if n <= 2:
+        return np.zeros(n), 0.0
+
+    pivots = sample_pivots(n, samples, seed)
+    tasks = [pivots[i:i + PIVOTS_PER_TASK] for i in range(0, len(pivots), PIVOTS_PER_TASK)]
+    dependencies = np.sum(_run_tasks(graph, _betweenness_task, tasks, workers), axis=0)
+
+    # A pivot never counts paths through itself, so pivots average over one sample less
+    k = len(pivots)
+    scale = np.full(n, 1.0 / (k * (n - 2)))
+    scale[pivots] = 1.0 / ((k - 1) * (n - 2)) if k > 1 else 0.0
+    return dependencies * scale, betweenness_error_bound(n, k, confidence)
+
+def approximate_closeness(graph, samples=DEFAULT_SAMPLES, workers=1, seed=None, confidence=0.95):
+    """
+    Estimate the closeness of every node (as nx.closeness_centrality(G) on the directed graph).
+
+    With k_u sampled sources other than u, c_u of which reach u at a total
+    distance D_u, the estimate is c_u^2 / (k_u * D_u), which is nx's
+    ((r - 1) / (n - 1)) * ((r - 1) / total distance) when every node is a source.
+
+    Returns:
+        Tuple of (scores indexed by node id, error bound of the mean incoming
+        distances at the given confidence, deepest BFS level seen)
+    """
+    n = graph.num_nodes
+    if n <= 1:
+        return np.zeros(n), 0.0, 0
+
+    sources = sample_pivots(n, samples, seed)
+    batch = SOURCES_PER_WORD * WORDS_PER_BATCH
+    tasks = [sources[i:i + batch] for i in range(0, len(sources), batch)]
+    results = _run_tasks(graph, _closeness_task, tasks, workers)
+    reached = np.sum([result[0] for result in results], axis=0)
+    distance_sum = np.sum([result[1] for result in results], axis=0)
+    diameter = max(result[2] for result in results)
+
+    other_sources = np.full(n, len(sources), dtype=float)
+    other_sources[sources] -= 1
+    scores = np.zeros(n)
+    reachable = (distance_sum > 0) & (other_sources > 0)
+    scores[reachable] = reached[reachable] ** 2 / (other_sources[reachable] * distance_sum[reachable])
+    return scores, closeness_error_bound(n, len(sources), diameter, confidence), diameter
+
+#%% Parse command line arguments
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Sampled betweenness and closeness centrality of the scraped network')
+    parser.add_argument('--adj-list', default=ADJ_LIST_FILE, help=f'Adjacency list to load (default: {ADJ_LIST_FILE})')
+    parser.add_argument('--samples', type=int, default=DEFAULT_SAMPLES, help=f'Pivots per measure (default: {DEFAULT_SAMPLES})')
+    parser.add_argument('--betweenness-error', type=float, default=None, help='Choose the pivot count for this betweenness error bound instead')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes (default: all CPUs)')
+    parser.add_argument('--seed', type=int, default=None, help='Seed of the pivot sample')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Confidence of the error bounds (default: 0.95)')
+    parser.add_argument('--top', type=int, default=20, help='Accounts per ranking (default: 20)')
+    parser.add_argument('--json', default=None, help='Also write the rankings and bounds to this JSON file')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    graph = compact_graph.load_compact_graph(args.adj_list)
+    samples = args.samples
+    if args.betweenness_error is not None:
+        samples = samples_for_betweenness_error(graph.num_nodes, args.betweenness_error, args.confidence)
+    print(f"Loaded {graph.num_nodes} nodes and {graph.num_edges} edges, using {min(samples, graph.num_nodes)} pivots on {args.workers} workers")
+
+    start = time.time()
+    betweenness, betweenness_error = approximate_betweenness(graph, samples, args.workers, args.seed, args.confidence)
+    print(f"Betweenness in {time.time() - start:.1f}s, error <= {betweenness_error:.4g} at {args.confidence:.0%} confidence")
+
+    start = time.time()
+    closeness, closeness_error, diameter = approximate_closeness(graph, samples, args.workers, args.seed, args.confidence)
+    print(f"Closeness in {time.time() - start:.1f}s, mean distance error <= {closeness_error:.3g} hops (deepest level {diameter})")
+
+    tables = {
+        "betweenness": graph_analytics.top_k(graph, betweenness, args.top),
+        "closeness": graph_analytics.top_k(graph, closeness, args.top)
+    }
+    for name, rows in tables.items():
+        print(f"\n{name}")
+        for rank, (account, value) in enumerate(rows, 1):
+            print(f"{rank:>3}. {account:<32} {value:.6g}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "samples": min(samples, graph.num_nodes),
+                "confidence": args.confidence,
+                "betweenness_error": betweenness_error,
+                "closeness_mean_distance_error": closeness_error,
+                "diameter": diameter,
+                **tables
+            }, f, indent=2)
+        print(f"\nRankings saved to {args.json}")
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Community detection on the compact graph, exported to Gephi.
+
+The communities of the network graph used to be computed in Gephi after
+exporting Full_graph.gexf by hand. Here they are computed on the CSR arrays of
+a CompactGraph, treating follows as undirected ties (a mutual follow counts
+twice), with two methods:
+    - label propagation: every account repeatedly takes the label most of its
+      neighbors have; one round for all accounts is a sort of the edge array
+    - Louvain: accounts move to the neighboring community with the best
+      modularity gain, all at once with NumPy, and the communities found are
+      merged into single nodes for the next level. As in Leiden, communities
+      that are not connected are split before merging, so every community is
+      connected
+The community ids are written as node attributes of a streamed GEXF file that
+Gephi can color by (Appearance > Nodes > Partition > community).
+
+Usage:
+    python3 communities.py --seed 0
+    python3 communities.py --method louvain --resolution 1.5 --gexf louvain.gexf --json communities.json
+"""
+import json
+import time
+import argparse
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+import compact_graph
+
+ADJ_LIST_FILE = "adjList.txt"
+GEXF_FILE = "communities.gexf"  # Not Full_graph.gexf, which is tracked in the repository
+GEXF_BATCH_SIZE = 50000  # Nodes or edges formatted per write
+
+#%% Undirected edge arrays
+def undirected_edges(graph):
+    """
+    Symmetric weighted edge arrays of a CompactGraph.
+
+    Returns:
+        Tuple of (sources, targets, weights) sorted by source; every tie appears
+        in both directions and a mutual follow has weight 2
+    """
+    n = graph.num_nodes
+    sources = graph.edge_sources().astype(np.int64)
+    targets = graph.indices.astype(np.int64)
+    keys, weights = np.unique(
+        np.concatenate((sources * n + targets, targets * n + sources)), return_counts=True
+    )
+    return keys // n, keys % n, weights.astype(float)
+
+def _best_per_node(nodes, values):
+    """
+    Index of the largest value of each node in arrays sorted by node (ties: first).
+
+    Returns:
+        Indices into nodes/values, one per distinct node
+    """
+    starts = np.flatnonzero(np.r_[True, nodes[1:] != nodes[:-1]])
+    best = np.maximum.reduceat(values, starts)
+    run = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(nodes)]))
+    candidates = np.flatnonzero(values >= best[run])
+    first = np.r_[True, run[candidates[1:]] != run[candidates[:-1]]]
+    return candidates[first]
+
+def _neighbor_communities(sources, targets, weights, labels, n):
+    """Total edge weight from every node to each neighboring community (self-loops excluded)"""
+    keep = sources != targets
+    keys, inverse = np.unique(sources[keep] * n + labels[targets[keep]], return_inverse=True)
+    return keys // n, keys % n, np.bincount(inverse, weights[keep])
+
+def sort_by_size(labels):
+    """Renumber community labels 0, 1, ... from the largest community down (ties by label)"""
+    _, labels = np.unique(labels, return_inverse=True)
+    order = np.argsort(-np.bincount(labels), kind="stable")
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    return rank[labels]
+
+#%% Modularity
+def _modularity(sources, targets, weights, labels, node_weights, resolution=1.0):
+    """Modularity of a partition of symmetric weighted edge arrays"""
+    total = weights.sum()
+    if total == 0:
+        return 0.0
+    inside = labels[sources] == labels[targets]
+    community_weights = np.bincount(labels, node_weights)
+    return float(weights[inside].sum() / total - resolution * ((community_weights / total) ** 2).sum())
+
+def modularity(graph, labels, resolution=1.0):
+    """Modularity of a partition (community label per node id) of the undirected graph"""
+    sources, targets, weights = undirected_edges(graph)
+    node_weights = np.bincount(sources, weights, minlength=graph.num_nodes)
+    return _modularity(sources, targets, weights, np.asarray(labels), node_weights, resolution)
+
+#%% Label propagation
+def label_propagation(graph, max_iter=100, update_fraction=0.5, tol=1e-3, seed=None):
+    """
+    Communities by semi-synchronous label propagation.
+
+    Each round a random update_fraction of the accounts takes the label with
+    the largest weight among its neighbors (keeping its own label when that
+    is one of the largest, other ties broken at random). Updating only part of
+    the accounts per round stops the label swaps between neighbors that fully
+    synchronous rounds get stuck in.
+
+    Args:
+        graph: CompactGraph
+        max_iter: Maximum number of rounds
+        update_fraction: Share of the accounts updated per round
+        tol: Stop once less than this share of the accounts would change label
+        seed: Seed of the tie-breaking and update order
+
+    Returns:
+        Tuple of (community id per node id, largest community 0, rounds used)
+    """
+    n = graph.num_nodes
+    rng = np.random.default_rng(seed)
+    sources, targets, weights = undirected_edges(graph)
+    labels = np.arange(n, dtype=np.int64)
+
+    for iteration in range(1, max_iter + 1):
+        nodes, communities, counts = _neighbor_communities(sources, targets, weights, labels, n)
+        if not len(nodes):
+            break
+        # Weights are whole numbers: the noise only breaks ties and the own label wins them
+        scores = counts + 0.5 * rng.random(len(counts)) + 0.5 * (communities == labels[nodes])
+        best = _best_per_node(nodes, scores)
+        changed = communities[best] != labels[nodes[best]]
+        if changed.sum() <= tol * n:
+            break
+        update = changed & (rng.random(len(best)) < update_fraction)
+        labels[nodes[best[update]]] = communities[best[update]]
+    return sort_by_size(labels), iteration
+
+#%% Louvain
+def _local_moves(sources, targets, weights, node_weights, resolution, rng, max_sweeps, tol):
+    """
+    Move nodes to the neighboring community with the largest modularity gain.
+
+    All nodes with a positive gain are evaluated at once, and a random half of
+    them moves per sweep. A sweep that lowers modularity is undone and the
+    share of moving nodes halved.
+
+    Returns:
+        Community label per node (labels are node ids)
+    """
+    n = len(node_weights)
+    total = weights.sum()
+    labels = np.arange(n, dtype=np.int64)
+    quality = _modularity(sources, targets, weights, labels, node_weights, resolution)
+    move_fraction = 0.5
+
+    for _ in range(max_sweeps):
+        nodes, communities, weight_to = _neighbor_communities(sources, targets, weights, labels, n)
+        if not len(nodes):
+            break
+        community_weights = np.bincount(labels, node_weights, minlength=n)
+        degree = node_weights[nodes]
+        own = communities == labels[nodes]
+        # Gain of joining each neighboring community, with the node itself taken out of its own
+        gain = weight_to - resolution * degree * (community_weights[communities] - np.where(own, degree, 0)) / total
+        current = -resolution * node_weights * (community_weights[labels] - node_weights) / total
+        current[nodes[own]] = gain[own]
+
+        best = _best_per_node(nodes, gain)
+        movers = best[gain[best] > current[nodes[best]] + 1e-12]
+        if not len(movers):
+            break
+        movers = movers[rng.random(len(movers)) < move_fraction]
+
+        previous = labels.copy()
+        labels[nodes[movers]] = communities[movers]
+        new_quality = _modularity(sources, targets, weights, labels, node_weights, resolution)
+        if new_quality < quality:
+            labels = previous
+            move_fraction /= 2
+            if move_fraction < 1e-3:
+                break
+            continue
+        improvement = new_quality - quality
+        quality = new_quality
+        if improvement < tol:
+            break
+    return labels
+
+def _split_disconnected(sources, targets, labels):
+    """Split every community into its connected parts (the Leiden guarantee)"""
+    n = len(labels)
+    inside = labels[sources] == labels[targets]
+    adjacency = sp.csr_matrix(
+        (np.ones(int(inside.sum()), dtype=np.int8), (sources[inside], targets[inside])), shape=(n, n)
+    )
+    _, parts = connected_components(adjacency, directed=False)
+    return parts.astype(np.int64)
+
+def louvain(graph, resolution=1.0, seed=None, max_levels=20, max_sweeps=50, tol=1e-6):
+    """
+    Communities maximizing modularity with the Louvain method.
+
+    Args:
+        graph: CompactGraph
+        resolution: Above 1 favors smaller communities, below 1 larger ones
+        seed: Seed of the random order of the moves
+        max_levels: Maximum number of merge levels
+        max_sweeps: Maximum number of move sweeps per level
+        tol: A level ends when a sweep improves modularity by less than this
+
+    Returns:
+        Tuple of (community id per node id, largest community 0, modularity)
+    """
+    n = graph.num_nodes
+    rng = np.random.default_rng(seed)
+    sources, targets, weights = undirected_edges(graph)
+    node_weights = np.bincount(sources, weights, minlength=n)
+    membership = np.arange(n, dtype=np.int64)
+
+    level_sources, level_targets, level_weights, level_node_weights = sources, targets, weights, node_weights
+    for _ in range(max_levels):
+        labels = _local_moves(
+            level_sources, level_targets, level_weights, level_node_weights, resolution, rng, max_sweeps, tol
+        )
+        labels = _split_disconnected(level_sources, level_targets, labels)
+        count = labels.max() + 1 if len(labels) else 0
+        if count == len(level_node_weights):
+            break
+
+        # Merge every community into one node, its internal ties into a self-loop
+        membership = labels[membership]
+        keys, inverse = np.unique(labels[level_sources] * count + labels[level_targets], return_inverse=True)
+        level_sources, level_targets = keys // count, keys % count
+        level_weights = np.bincount(inverse, level_weights)
+        level_node_weights = np.bincount(labels, level_node_weights, minlength=count)
+
+    return sort_by_size(membership), _modularity(sources, targets, weights, membership, node_weights, resolution)
+
+#%% Output
+def community_sizes(labels):
+    """Number of accounts in every community, indexed by community id"""
+    return np.bincount(labels) if len(labels) else np.zeros(0, dtype=np.int64)
+
+def community_table(graph, labels, k=10, members=5):
+    """
+    The k largest communities with their most followed members.
+
+    Returns:
+        List of dictionaries with keys 'community', 'size' and 'top_members'
+    """
+    sizes = community_sizes(labels)
+    in_degrees = graph.in_degrees()
+    table = []
+    for community in range(min(k, len(sizes))):
+        ids = np.flatnonzero(labels == community)
+        top = ids[np.argsort(-in_degrees[ids], kind="stable")[:members]]
+        table.append({
+            "community": community,
+            "size": int(sizes[community]),
+            "top_members": [graph.interner.names[i] for i in top]
+        })
+    return table
+
+def write_gexf(graph, gexf_file, attributes=None):
+    """
+    Write the graph as a GEXF 1.2 file for Gephi, streaming nodes and edges.
+
+    Args:
+        graph: CompactGraph
+        gexf_file: Output path
+        attributes: Optional {name: integer array indexed by node id}, written as node attributes
+    """
+    attributes = attributes or {}
+    names = graph.interner.names
+    columns = [np.asarray(values) for values in attributes.values()]
+
+    with open(gexf_file, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<gexf xmlns="http://www.gexf.net/1.2draft" version="1.2">\n')
+        f.write('  <graph defaultedgetype="directed" mode="static">\n')
+        if attributes:
+            f.write('    <attributes class="node" mode="static">\n')
+            for index, name in enumerate(attributes):
+                f.write(f'      <attribute id="{index}" title={quoteattr(name)} type="integer" />\n')
+            f.write('    </attributes>\n')
+
+        f.write('    <nodes>\n')
+        for start in range(0, graph.num_nodes, GEXF_BATCH_SIZE):
+            lines = []
+            for node_id in range(start, min(start + GEXF_BATCH_SIZE, graph.num_nodes)):
+                name = quoteattr(names[node_id])
+                if columns:
+                    values = "".join(
+                        f'<attvalue for="{index}" value="{int(column[node_id])}" />' for index, column in enumerate(columns)
+                    )
+                    lines.append(f'      <node id={name} label={name}><attvalues>{values}</attvalues></node>\n')
+                else:
+                    lines.append(f'      <node id={name} label={name} />\n')
+            f.write("".join(lines))
+        f.write('    </nodes>\n')
+
+        f.write('    <edges>\n')
+        sources = graph.edge_sources()
+        for start in range(0, graph.num_edges, GEXF_BATCH_SIZE):
+            stop = min(start + GEXF_BATCH_SIZE, graph.num_edges)
+            f.write("".join(
+                f'      <edge id="{edge_id}" source={quoteattr(names[source])} target={quoteattr(names[target])} />\n'
+                for edge_id, source, target in zip(
+                    range(start, stop), sources[start:stop].tolist(), graph.indices[start:stop].tolist()
+                )
+            ))
+        f.write('    </edges>\n')
+        f.write('  </graph>\n')
+        f.write('</gexf>\n')
+
+#%% Parse command line arguments
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Community detection on the scraped network with GEXF export for Gephi')
+    parser.add_argument('--adj-list', default=ADJ_LIST_FILE, help=f'Adjacency list to load (default: {ADJ_LIST_FILE})')
+    parser.add_argument('--method', choices=['louvain', 'label-propagation', 'both'], default='both', help='Method to run (default: both)')
+    parser.add_argument('--resolution', type=float, default=1.0, help='Louvain resolution (default: 1.0)')
+    parser.add_argument('--seed', type=int, default=None, help='Seed of the random move and tie-breaking order')
+    parser.add_argument('--top', type=int, default=10, help='Largest communities to list (default: 10)')
+    parser.add_argument('--gexf', default=GEXF_FILE, help=f'GEXF file to write with the community ids (default: {GEXF_FILE}, "" to skip)')
+    parser.add_argument('--json', default=None, help='Also write the community of every account to this JSON file')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    graph = compact_graph.load_compact_graph(args.adj_list)
+    print(f"Loaded {graph.num_nodes} nodes and {graph.num_edges} edges")
+
+    results = {}
+    if args.method in ("louvain", "both"):
+        start = time.time()
+        labels, quality = louvain(graph, args.resolution, args.seed)
+        print(f"Louvain: {len(community_sizes(labels))} communities, modularity {quality:.4f} in {time.time() - start:.1f}s")
+        results["community"] = (labels, quality)
+    if args.method in ("label-propagation", "both"):
+        start = time.time()
+        labels, rounds = label_propagation(graph, seed=args.seed)
+        quality = modularity(graph, labels)
+        print(f"Label propagation: {len(community_sizes(labels))} communities, modularity {quality:.4f} after {rounds} rounds in {time.time() - start:.1f}s")
+        results["label_propagation"] = (labels, quality)
+
+    for attribute, (labels, _) in results.items():
+        print(f"\n{attribute}")
+        for row in community_table(graph, labels, args.top):
+            print(f"{row['community']:>4}. {row['size']:>7} accounts  {', '.join(row['top_members'])}")
+
+    if args.gexf:
+        start = time.time()
+        write_gexf(graph, args.gexf, {attribute: labels for attribute, (labels, _) in results.items()})
+        print(f"\nGraph with {', '.join(results)} attributes written to {args.gexf} in {time.time() - start:.1f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                attribute: {
+                    "modularity": quality,
+                    "sizes": community_sizes(labels).tolist(),
+                    "communities": dict(zip(graph.interner.names, labels.tolist()))
+                }
+                for attribute, (labels, quality) in results.items()
+            }, f, indent=2)
+        print(f"Communities saved to {args.json}")
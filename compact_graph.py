@@ -0,0 +1,256 @@
+"""
+Compact graph core for the scraped Instagram network.
+
+Usernames are interned to int32 ids and edges are stored as a CSR/CSC pair of
+NumPy arrays (out-edges and in-edges), which needs a small fraction of the
+memory of the dict-of-lists built by essentialRoutines.adjList_to_dict or a
+NetworkX DiGraph. Conversions to and from NetworkX and the adjList.txt format
+are provided so the notebook and the analysis modules can share one loader.
+"""
+import os
+from array import array
+
+import numpy as np
+
+class NodeInterner:
+    """Bidirectional username <-> int32 id table (ids are assigned in first-seen order)"""
+
+    def __init__(self, names=None):
+        self.names = []
+        self.ids = {}
+        for name in names or []:
+            self.intern(name)
+
+    def intern(self, name):
+        """Return the id of name, assigning the next free id if it is new"""
+        node_id = self.ids.get(name)
+        if node_id is None:
+            node_id = len(self.names)
+            self.ids[name] = node_id
+            self.names.append(name)
+        return node_id
+
+    def get(self, name, default=None):
+        return self.ids.get(name, default)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def __getitem__(self, node_id):
+        return self.names[node_id]
+
+def _csr_from_pairs(row, col, num_nodes):
+    """Build (indptr, indices) for rows sorted by (row, col) - inputs must already be sorted"""
+    counts = np.bincount(row, minlength=num_nodes)
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, col.astype(np.int32, copy=False)
+
+class CompactGraph:
+    """
+    Directed graph stored as CSR (out-edges) and CSC (in-edges) arrays.
+
+    Attributes:
+        interner: NodeInterner mapping usernames to node ids
+        indptr, indices: CSR arrays - successors of node i are indices[indptr[i]:indptr[i+1]]
+        in_indptr, in_indices: CSC arrays - predecessors of node i, laid out the same way
+    """
+
+    def __init__(self, interner, indptr, indices, in_indptr, in_indices):
+        self.interner = interner
+        self.indptr = indptr
+        self.indices = indices
+        self.in_indptr = in_indptr
+        self.in_indices = in_indices
+
+    #%% Construction
+    @classmethod
+    def from_id_edges(cls, interner, sources, targets):
+        """
+        Build a graph from parallel arrays of source and target ids.
+        Duplicate edges are removed.
+        """
+        num_nodes = len(interner)
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+
+        # Deduplicate and sort by (source, target) through a single int64 key
+        keys = np.unique(sources * max(num_nodes, 1) + targets)
+        src = (keys // max(num_nodes, 1)).astype(np.int32)
+        dst = (keys % max(num_nodes, 1)).astype(np.int32)
+
+        indptr, indices = _csr_from_pairs(src, dst, num_nodes)
+
+        # CSC: the same edges ordered by (target, source)
+        order = np.lexsort((src, dst))
+        in_indptr, in_indices = _csr_from_pairs(dst[order], src[order], num_nodes)
+
+        return cls(interner, indptr, indices, in_indptr, in_indices)
+
+    @classmethod
+    def from_edges(cls, edges, nodes=None):
+        """Build a graph from (source, target) username pairs plus optional isolated nodes"""
+        interner = NodeInterner()
+        sources = array('i')
+        targets = array('i')
+        for node in nodes or []:
+            interner.intern(node)
+        for source, target in edges:
+            sources.append(interner.intern(source))
+            targets.append(interner.intern(target))
+        return cls.from_id_edges(interner, np.frombuffer(sources, dtype=np.int32), np.frombuffer(targets, dtype=np.int32))
+
+    @classmethod
+    def from_adj_list_lines(cls, lines):
+        """
+        Build a graph from adjacency list lines. As with nx.read_adjlist, the
+        first name on a line is the follower and every following name is an
+        account it follows.
+        """
+        interner = NodeInterner()
+        sources = array('i')
+        targets = array('i')
+        for line in lines:
+            parts = line.split()
+            if not parts:
+                continue
+            source = interner.intern(parts[0])
+            for followed in parts[1:]:
+                sources.append(source)
+                targets.append(interner.intern(followed))
+        return cls.from_id_edges(interner, np.frombuffer(sources, dtype=np.int32), np.frombuffer(targets, dtype=np.int32))
+
+    @classmethod
+    def from_adj_list(cls, adj_list_file):
+        """Load a graph from an adjList.txt file without building intermediate dicts"""
+        with open(adj_list_file, "r") as adj_file:
+            return cls.from_adj_list_lines(adj_file)
+
+    @classmethod
+    def from_networkx(cls, G):
+        """Build a graph from a NetworkX (Di)Graph; undirected edges are added in both directions"""
+        edges = G.edges()
+        if not G.is_directed():
+            edges = [pair for u, v in edges for pair in ((u, v), (v, u))]
+        return cls.from_edges(edges, nodes=G.nodes())
+
+    #%% Export
+    def to_networkx(self):
+        """Return the graph as a NetworkX DiGraph"""
+        import networkx as nx
+
+        G = nx.DiGraph()
+        G.add_nodes_from(self.interner.names)
+        names = self.interner.names
+        G.add_edges_from((names[u], names[v]) for u, v in self.iter_id_edges())
+        return G
+
+    def to_adj_list(self, adj_list_file):
+        """
+        Write the graph as a sorted adjacency list (one relation per line).
+
+        Returns:
+            Number of relations written
+        """
+        names = self.interner.names
+        relations = sorted(f"{names[u]} {names[v]}" for u, v in self.iter_id_edges())
+        tmp_path = adj_list_file + ".tmp"
+        with open(tmp_path, "w") as adj_file:
+            for relation in relations:
+                adj_file.write(f"{relation}\n")
+        os.replace(tmp_path, adj_list_file)
+        return len(relations)
+
+    def to_dict(self):
+        """Return the dict-of-lists format produced by essentialRoutines.adjList_to_dict"""
+        names = self.interner.names
+        return {
+            names[u]: [names[v] for v in self.indices[self.indptr[u]:self.indptr[u + 1]]]
+            for u in range(self.num_nodes)
+            if self.indptr[u + 1] > self.indptr[u]
+        }
+
+    #%% Accessors
+    @property
+    def num_nodes(self):
+        return len(self.interner)
+
+    @property
+    def num_edges(self):
+        return int(self.indptr[-1])
+
+    def node_id(self, name):
+        """Return the id of a username (KeyError if it is not in the graph)"""
+        return self.interner.ids[name]
+
+    def node_name(self, node_id):
+        return self.interner.names[node_id]
+
+    def edge_sources(self):
+        """Source id of every CSR edge, aligned with self.indices"""
+        return np.repeat(np.arange(self.num_nodes, dtype=np.int32), np.diff(self.indptr))
+
+    def iter_id_edges(self):
+        """Yield (source_id, target_id) pairs in CSR order"""
+        for u in range(self.num_nodes):
+            for v in self.indices[self.indptr[u]:self.indptr[u + 1]]:
+                yield u, int(v)
+
+    def successor_ids(self, node_id):
+        """Ids of the accounts node_id follows (read-only view into the CSR arrays)"""
+        return self.indices[self.indptr[node_id]:self.indptr[node_id + 1]]
+
+    def predecessor_ids(self, node_id):
+        """Ids of the accounts following node_id (read-only view into the CSC arrays)"""
+        return self.in_indices[self.in_indptr[node_id]:self.in_indptr[node_id + 1]]
+
+    def out_neighbors(self, name):
+        """Usernames followed by name"""
+        names = self.interner.names
+        return [names[v] for v in self.successor_ids(self.node_id(name))]
+
+    def in_neighbors(self, name):
+        """Usernames following name"""
+        names = self.interner.names
+        return [names[u] for u in self.predecessor_ids(self.node_id(name))]
+
+    def out_degrees(self):
+        """Following count of every node within the graph (int array indexed by id)"""
+        return np.diff(self.indptr)
+
+    def in_degrees(self):
+        """Follower count of every node within the graph (int array indexed by id)"""
+        return np.diff(self.in_indptr)
+
+    def out_degree(self, name):
+        node_id = self.node_id(name)
+        return int(self.indptr[node_id + 1] - self.indptr[node_id])
+
+    def in_degree(self, name):
+        node_id = self.node_id(name)
+        return int(self.in_indptr[node_id + 1] - self.in_indptr[node_id])
+
+    def has_edge(self, source, target):
+        if source not in self.interner or target not in self.interner:
+            return False
+        successors = self.successor_ids(self.node_id(source))
+        # Successors are sorted, so a binary search is enough
+        position = np.searchsorted(successors, self.node_id(target))
+        return position < len(successors) and successors[position] == self.node_id(target)
+
+    def top_by_degree(self, k=10, direction="in"):
+        """Return the k (username, degree) pairs with the highest in- or out-degree"""
+        degrees = self.in_degrees() if direction == "in" else self.out_degrees()
+        k = min(k, self.num_nodes)
+        if k <= 0:
+            return []
+        top = np.argpartition(-degrees, k - 1)[:k]
+        top = top[np.lexsort((top, -degrees[top]))]
+        return [(self.interner.names[i], int(degrees[i])) for i in top]
+
+def load_compact_graph(adj_list_file):
+    """Load adjList.txt into a CompactGraph"""
+    return CompactGraph.from_adj_list(adj_list_file)
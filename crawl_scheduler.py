@@ -0,0 +1,110 @@
+"""
+Yield-aware ordering of the crawl queue.
+
+Every queued account gets a priority equal to the number of new edges it is
+expected to add to the graph per minute of scraping, and the queue is reordered
+so the best accounts are scraped first. The estimate uses only data that is
+already stored:
+    - follower/following counts from the progress table (or a fresh pre-check)
+    - edges already known for the account (its in-degree counts followers we
+      have seen, its out-degree the accounts we know it follows)
+    - the rate-limit flag and the time of the last attempt
+Accounts above the follower/following limits yield nothing, since
+scrapingFollowing skips their lists. Accounts with the same expected yield
+(typically several with unknown counts) are ordered by their stored PageRank
+score, so the more central accounts are scraped first. In a multi-hop crawl the ranking is done
+within each depth, so the crawl stays breadth-first.
+"""
+import math
+import time
+
+# Cost model of scraping one account (seconds)
+ACCOUNT_OVERHEAD_SECONDS = 15.0  # Profile load, opening both dialogs and the pause between accounts
+SECONDS_PER_PAGE = 2.0           # One scroll of a followers/following dialog
+USERS_PER_PAGE = 12              # Rows Instagram renders per scroll
+
+DEFAULT_EXPECTED_COUNT = 300     # Followers (or following) assumed for an account with unknown counts
+RATE_LIMIT_COOLDOWN = 6 * 3600   # Seconds for the yield of a rate-limited account to mostly recover
+
+def expected_yield(candidate, follower_limit, following_limit, prior_count=DEFAULT_EXPECTED_COUNT, now=None):
+    """
+    Estimate what scraping a queued account will bring.
+
+    Args:
+        candidate: Dictionary as yielded by GraphStore.queue_candidates
+        follower_limit, following_limit: Accounts above these counts are not scraped
+        prior_count: Count assumed for followers/following when it is unknown
+
+    Returns:
+        Tuple of (new_edges_per_minute, expected_new_edges, expected_minutes)
+    """
+    followers = candidate.get("followers_count")
+    following = candidate.get("following_count")
+    if followers is None:
+        followers = max(prior_count, candidate.get("in_degree", 0))
+    if following is None:
+        following = max(prior_count, candidate.get("out_degree", 0))
+
+    if followers > follower_limit or following > following_limit:
+        # Only the profile is loaded before the account is skipped
+        return 0.0, 0.0, ACCOUNT_OVERHEAD_SECONDS / 60
+
+    new_edges = max(0, followers - candidate.get("in_degree", 0)) + max(0, following - candidate.get("out_degree", 0))
+
+    # A rate-limited account returns few users until Instagram's limit has recovered
+    if candidate.get("rate_limited") and candidate.get("timestamp"):
+        elapsed = (now or time.time()) - candidate["timestamp"]
+        new_edges *= 1 - math.exp(-max(0, elapsed) / RATE_LIMIT_COOLDOWN)
+
+    pages = math.ceil(followers / USERS_PER_PAGE) + math.ceil(following / USERS_PER_PAGE)
+    minutes = (ACCOUNT_OVERHEAD_SECONDS + pages * SECONDS_PER_PAGE) / 60
+    return new_edges / minutes, new_edges, minutes
+
+def _median_known_count(candidates, follower_limit, following_limit):
+    """Median followers + following of the queued accounts with known counts, per list"""
+    counts = sorted(
+        (c["followers_count"] + c["following_count"]) / 2 for c in candidates
+        if c["followers_count"] is not None and c["following_count"] is not None
+        and c["followers_count"] <= follower_limit and c["following_count"] <= following_limit
+    )
+    if not counts:
+        return DEFAULT_EXPECTED_COUNT
+    return counts[len(counts) // 2]
+
+def rank_queue(store, follower_limit, following_limit, observed_counts=None, now=None):
+    """
+    Rank the queued accounts by expected new edges per minute.
+
+    Args:
+        store: GraphStore holding the crawl queue
+        follower_limit, following_limit: Limits above which accounts are not scraped
+        observed_counts: Optional {username: (followers, following)} from a fresh pre-check
+
+    Returns:
+        List of (link, new_edges_per_minute) pairs, shallowest depth first and
+        best first within a depth (ties by PageRank score, then queue order)
+    """
+    candidates = list(store.queue_candidates())
+    for candidate in candidates:
+        observed = (observed_counts or {}).get(candidate["username"])
+        if observed is not None:
+            candidate["followers_count"], candidate["following_count"] = observed
+
+    prior_count = _median_known_count(candidates, follower_limit, following_limit)
+    scored = []
+    for index, candidate in enumerate(candidates):
+        rate, _, _ = expected_yield(candidate, follower_limit, following_limit, prior_count, now)
+        scored.append((candidate.get("depth") or 1, -rate, -(candidate.get("rank_score") or 0.0), index, candidate["link"]))
+    scored.sort()
+    return [(link, -negative_rate) for _, negative_rate, _, _, link in scored]
+
+def schedule_queue(store, follower_limit, following_limit, observed_counts=None):
+    """
+    Reorder the crawl queue so the accounts with the best expected yield are dequeued first.
+
+    Returns:
+        The ranking as returned by rank_queue
+    """
+    ranking = rank_queue(store, follower_limit, following_limit, observed_counts)
+    store.move_links_to_front([link for link, _ in ranking])
+    return ranking
@@ -0,0 +1,158 @@
+"""
+Append-only journal for adjacency list relations.
+
+Scrapers append only the relations they just discovered to a journal file that
+sits next to adjList.txt (adjList.txt.journal). A compaction step folds the
+journal into the sorted, deduplicated adjList.txt that nx.read_adjlist and the
+analysis notebook consume, so each scraped account only pays for its own edges
+instead of a full read/sort/rewrite of the adjacency list.
+"""
+import os
+import threading
+
+import external_sort
+
+JOURNAL_SUFFIX = ".journal"
+COMPACTING_SUFFIX = ".compacting"
+
+# Guards appends and the journal -> compacting rotation
+_journal_lock = threading.Lock()
+# Only one compaction may rewrite adjList.txt at a time
+_compaction_lock = threading.Lock()
+_background_thread = None
+
+def journal_path_for(adj_list_file):
+    """Path of the journal that belongs to an adjacency list file"""
+    return adj_list_file + JOURNAL_SUFFIX
+
+def _compacting_path_for(adj_list_file):
+    return journal_path_for(adj_list_file) + COMPACTING_SUFFIX
+
+def append_relations(relations, adj_list_file):
+    """
+    Append relations to the journal of an adjacency list file.
+
+    Args:
+        relations: Iterable of "follower followed" strings
+        adj_list_file: Path of the adjacency list the journal belongs to
+
+    Returns:
+        Number of relations written to the journal
+    """
+    lines = []
+    for relation in relations:
+        relation = relation.strip()
+        if relation:  # Skip empty lines
+            lines.append(f"{relation}\n")
+
+    if not lines:
+        return 0
+
+    with _journal_lock:
+        with open(journal_path_for(adj_list_file), "a") as journal_h:
+            journal_h.writelines(lines)
+            journal_h.flush()
+            os.fsync(journal_h.fileno())
+
+    return len(lines)
+
+def iter_relations(adj_list_file):
+    """
+    Yield every relation recorded for an adjacency list, including the ones
+    that are still waiting in the journal and have not been compacted yet.
+    Relations may repeat between the compacted file and the journal.
+    """
+    for path in (adj_list_file, _compacting_path_for(adj_list_file), journal_path_for(adj_list_file)):
+        if not os.path.exists(path):
+            continue
+        with open(path, "r") as file_h:
+            for line in file_h:
+                line = line.strip()
+                if line:  # Skip empty lines
+                    yield line
+
+def pending_journal_size(adj_list_file):
+    """Number of bytes waiting in the journal (including an interrupted compaction)"""
+    size = 0
+    for path in (_compacting_path_for(adj_list_file), journal_path_for(adj_list_file)):
+        if os.path.exists(path):
+            size += os.path.getsize(path)
+    return size
+
+def _rotate_journal(adj_list_file):
+    """
+    Move the live journal aside so appends can continue while it is compacted.
+    A leftover file from an interrupted compaction is kept and extended.
+    """
+    journal_path = journal_path_for(adj_list_file)
+    compacting_path = _compacting_path_for(adj_list_file)
+
+    with _journal_lock:
+        if not os.path.exists(journal_path):
+            return os.path.exists(compacting_path)
+
+        if os.path.exists(compacting_path):
+            with open(journal_path, "r") as journal_h, open(compacting_path, "a") as compacting_h:
+                for line in journal_h:
+                    compacting_h.write(line)
+            os.remove(journal_path)
+        else:
+            os.replace(journal_path, compacting_path)
+
+    return True
+
+def compact_journal(adj_list_file, memory_budget=external_sort.DEFAULT_MEMORY_BUDGET):
+    """
+    Fold the journal into adjList.txt, producing a sorted and deduplicated file.
+    The merge is an external sort, so memory use stays within memory_budget.
+
+    Args:
+        adj_list_file: Path of the adjacency list to compact
+        memory_budget: Approximate bytes of relations held in memory at once
+
+    Returns:
+        Number of relations added to adjList.txt by this compaction
+    """
+    with _compaction_lock:
+        if not _rotate_journal(adj_list_file):
+            return 0
+
+        compacting_path = _compacting_path_for(adj_list_file)
+        existing_count = external_sort.count_lines(adj_list_file)
+
+        # The output replaces adjList.txt atomically, so readers never see a half-written file
+        unique_count, _ = external_sort.sort_unique_lines(
+            [adj_list_file, compacting_path], adj_list_file, memory_budget=memory_budget
+        )
+        os.remove(compacting_path)
+
+    added = max(0, unique_count - existing_count)
+    print(f"Compacted edge journal into {adj_list_file}: {added} new relationships (total: {unique_count})")
+    return added
+
+def compact_in_background(adj_list_file):
+    """
+    Start a compaction on a daemon thread unless one is already running.
+
+    Returns:
+        The compaction thread, or None if a compaction is already in progress
+    """
+    global _background_thread
+
+    if _background_thread is not None and _background_thread.is_alive():
+        return None
+
+    def _run():
+        try:
+            compact_journal(adj_list_file)
+        except Exception as e:
+            print(f"Background compaction of {adj_list_file} failed: {e}")
+
+    _background_thread = threading.Thread(target=_run, name="edge-journal-compaction", daemon=True)
+    _background_thread.start()
+    return _background_thread
+
+def wait_for_background_compaction(timeout=None):
+    """Block until a running background compaction has finished"""
+    if _background_thread is not None:
+        _background_thread.join(timeout)
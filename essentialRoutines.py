@@ -6,11 +6,15 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
 import random
 import json
 from selenium.webdriver import ActionChains
 import os
 import datetime
+import adaptive_wait
+import instrumentation
 
 # Add global variables to track cursors
 _last_cursors = {
@@ -30,15 +34,501 @@ _rate_limit_info = {
     }
 }
 
+# Base URL of the site being scraped (benchmark_scraper points it at the local fixture server)
+INSTAGRAM_URL = "https://www.instagram.com"
+
+CHROMEDRIVER_PATH = "/Users/chenyusu/Documents/GitHub/Instagram-Network_scraping_and_analysis/chromedriver"  # Chromedriver path
+
 # Rate limit constants
 RATE_LIMIT_THRESHOLD = 10  # Instagram typically limits to 10 users per request
 RATE_LIMIT_WAIT_TIME = 600  # 10 minutes in seconds - base wait time
 MAX_RATE_LIMIT_RETRIES = 5  # Maximum number of retries before giving up
 
+# Upper bounds in seconds for the condition-based waits. Each wait returns as soon
+# as the page changes; adaptive_wait records the observed latency per step so
+# these caps can be tuned from WAIT_LATENCY_FILE.
+WAIT_CAPS = {
+    'login_page': 5.0,      # Login form rendered
+    'login_submit': 5.0,    # Redirect away from the login page
+    'profile_load': 3.0,    # Profile header rendered after navigation
+    'dialog_open': 3.0,     # Followers/following dialog shows rows
+    'dialog_close': 1.0,    # Dialog removed after pressing Escape
+    'resume_scroll': 0.7,   # New rows after a bulk resume scroll
+    'resume_settle': 3.0,   # Rows after the last bulk resume scroll
+    'scroll': 0.5,          # New rows after a single scroll
+    'scroll_batch': 3.0,    # New rows after a batch of scrolls (default scroll_timeout)
+    'fixed_scroll': 1.0     # New rows after a fixed-distance scroll
+}
+WAIT_LATENCY_FILE = os.path.join("instagram_data", "wait_latencies.json")
+
+# Returns [row count, scrollHeight] of the dialog; arguments[0] is the scrollable div (optional)
+DIALOG_STATE_JS = """
+const rows = document.querySelectorAll("div[role='dialog'] a[href*='/']").length;
+const height = arguments[0] ? arguments[0].scrollHeight : 0;
+return [rows, height];
+"""
+
+class RateLimitSuspended(Exception):
+    """
+    Raised by scrape_whole_list(suspend_on_rate_limit=True) instead of sleeping
+    through the rate limit back-off.
+    
+    Attributes:
+        list_type: 'followers' or 'following'
+        profile_link: Profile whose list was being scraped
+        usernames: Usernames collected before the rate limit (including resume_from_saved)
+        resume_at: Unix time after which scraping can resume
+        cursor: Resume cursor for the list (see read_list_cursor), or None
+    """
+    def __init__(self, list_type, profile_link, usernames, resume_at, cursor=None):
+        super().__init__(f"Rate limited while scraping {list_type} of {profile_link}, resume after {datetime.datetime.fromtimestamp(resume_at).strftime('%H:%M:%S')}")
+        self.list_type = list_type
+        self.profile_link = profile_link
+        self.usernames = usernames
+        self.resume_at = resume_at
+        self.cursor = cursor
+
 def get_last_cursor(list_type):
     """Get the last cursor for the specified list type"""
     return _last_cursors.get(list_type)
 
+class UsernameAccumulator:
+    """
+    Insertion-ordered set of usernames with O(1) membership checks.
+    Counts new and duplicate usernames seen since the last start_page() call.
+    With a page_step, the time between start_page() calls and the new users of
+    each page are recorded by the instrumentation.
+    """
+    def __init__(self, initial=None, page_step=None):
+        self._usernames = dict.fromkeys(initial or [])
+        self.page_new = 0
+        self.page_duplicates = 0
+        self.page_step = page_step
+        self._page_timer = None
+
+    def start_page(self):
+        """Reset the per-page counters"""
+        self.finish_page()
+        self.page_new = 0
+        self.page_duplicates = 0
+        if self.page_step:
+            self._page_timer = instrumentation.start_timer()
+
+    def finish_page(self):
+        """Record the time and new users of the current page"""
+        instrumentation.stop_timer(self.page_step, self._page_timer, self.page_new)
+        self._page_timer = None
+
+    def add(self, username):
+        """Add a username, returning True if it was not collected before"""
+        if username in self._usernames:
+            self.page_duplicates += 1
+            return False
+        self._usernames[username] = None
+        self.page_new += 1
+        return True
+
+    def __contains__(self, username):
+        return username in self._usernames
+
+    def __len__(self):
+        return len(self._usernames)
+
+    def to_list(self):
+        return list(self._usernames)
+
+# Collects the usernames linked from the followers/following dialog in a single
+# WebDriver round trip, applying the same href filtering as the Selenium fallback
+DIALOG_USERNAMES_JS = """
+const seen = new Set();
+const usernames = [];
+for (const link of document.querySelectorAll("div[role='dialog'] a[href*='/']")) {
+    const href = link.href;
+    if (!href || href.includes('/p/') || href.includes('/explore/') || href.includes('/stories/')) {
+        continue;
+    }
+    const parts = href.split('/');
+    const username = href.endsWith('/') ? parts[parts.length - 2] : parts[parts.length - 1];
+    if (username && !seen.has(username)) {
+        seen.add(username);
+        usernames.push(username);
+    }
+}
+return usernames;
+"""
+
+@instrumentation.timed("extract_dialog_usernames", users=len)
+def extract_dialog_usernames(driver):
+    """
+    Extract the deduplicated usernames shown in the open dialog with one execute_script call.
+    
+    Returns:
+        List of usernames in page order, or None if the script failed
+    """
+    try:
+        usernames = driver.execute_script(DIALOG_USERNAMES_JS)
+    except Exception as e:
+        print(f"JavaScript username extraction failed: {e}")
+        return None
+    if not isinstance(usernames, list):
+        return None
+    return [username for username in usernames if isinstance(username, str) and username]
+
+# Installs a MutationObserver on the open dialog that pushes every newly rendered
+# username into window.__igUsernameBuffer. Rows already in the dialog are
+# harvested at install time, so nothing is missed if the list is virtualized.
+DIALOG_OBSERVER_INSTALL_JS = """
+const dialog = document.querySelector("div[role='dialog']");
+if (!dialog) {
+    return false;
+}
+if (window.__igDialogObserver) {
+    window.__igDialogObserver.disconnect();
+}
+window.__igUsernameBuffer = [];
+window.__igSeenUsernames = new Set();
+const harvest = (root) => {
+    const links = root.querySelectorAll ? Array.from(root.querySelectorAll("a[href*='/']")) : [];
+    if (root.matches && root.matches("a[href*='/']")) {
+        links.push(root);
+    }
+    for (const link of links) {
+        const href = link.href;
+        if (!href || href.includes('/p/') || href.includes('/explore/') || href.includes('/stories/')) {
+            continue;
+        }
+        const parts = href.split('/');
+        const username = href.endsWith('/') ? parts[parts.length - 2] : parts[parts.length - 1];
+        if (username && !window.__igSeenUsernames.has(username)) {
+            window.__igSeenUsernames.add(username);
+            window.__igUsernameBuffer.push(username);
+        }
+    }
+};
+harvest(dialog);
+const observer = new MutationObserver((mutations) => {
+    for (const mutation of mutations) {
+        for (const node of mutation.addedNodes) {
+            if (node.nodeType === 1) {
+                harvest(node);
+            }
+        }
+    }
+});
+observer.observe(dialog, {childList: true, subtree: true});
+window.__igDialogObserver = observer;
+return true;
+"""
+
+# Returns the usernames buffered since the last drain (null if no observer is installed)
+DIALOG_OBSERVER_DRAIN_JS = """
+if (!window.__igDialogObserver || !Array.isArray(window.__igUsernameBuffer)) {
+    return null;
+}
+const buffered = window.__igUsernameBuffer;
+window.__igUsernameBuffer = [];
+return buffered;
+"""
+
+def install_dialog_observer(driver):
+    """Install the username MutationObserver in the open dialog. Returns True on success"""
+    try:
+        return bool(driver.execute_script(DIALOG_OBSERVER_INSTALL_JS))
+    except Exception as e:
+        print(f"Could not install dialog observer: {e}")
+        return False
+
+def drain_dialog_observer(driver):
+    """
+    Return the usernames rendered since the previous drain.
+    
+    Returns:
+        List of new usernames (possibly empty), or None if the observer is gone
+        (e.g. after navigation) and has to be installed again
+    """
+    try:
+        usernames = driver.execute_script(DIALOG_OBSERVER_DRAIN_JS)
+    except Exception as e:
+        print(f"Could not drain dialog observer: {e}")
+        return None
+    if not isinstance(usernames, list):
+        return None
+    return [username for username in usernames if isinstance(username, str) and username]
+
+# Resuming from a cursor uses the private /api/v1/friendships/<user id>/<list>/
+# endpoint: it is what the followers/following dialog itself loads its rows
+# from (there is no public API for these lists), and requesting it with the
+# dialog's next_max_id token is the only way to continue a list from a saved
+# position without scrolling the dialog past every user collected before.
+# The endpoint rejects requests without the web app id instagram.com sends in
+# X-IG-App-ID; if Instagram changes it, the cursor resume fails and
+# scrape_whole_list falls back to scrolling the dialog.
+IG_APP_ID = "936619743392459"
+LIST_API_PAGE_SIZE = 12  # Users requested per API page when resuming from a cursor
+CURSOR_MAX_PAGES = 10  # Default API pages per cursor resume, like scrape_whole_list's max_pages
+
+# Wraps fetch and XMLHttpRequest so every followers/following API response the
+# dialog receives updates window.__igListCursor with the pagination token
+# (next_max_id), the number of rows loaded and the last username. Must run
+# before the dialog is opened.
+LIST_CURSOR_HOOK_JS = """
+window.__igListCursor = null;
+if (window.__igListCursorHook) {
+    return true;
+}
+window.__igListCursorHook = true;
+const pattern = /\\/api\\/v1\\/friendships\\/([^\\/]+)\\/(followers|following)\\//;
+const record = (url, data) => {
+    const match = pattern.exec(url || '');
+    if (!match || !data || !Array.isArray(data.users)) {
+        return;
+    }
+    const previous = window.__igListCursor;
+    const sameList = previous && previous.user_id === match[1] && previous.list_type === match[2];
+    const users = data.users;
+    window.__igListCursor = {
+        user_id: match[1],
+        list_type: match[2],
+        max_id: data.next_max_id ? String(data.next_max_id) : null,
+        loaded: (sameList ? previous.loaded : 0) + users.length,
+        last_username: users.length ? users[users.length - 1].username : (sameList ? previous.last_username : null)
+    };
+};
+const originalFetch = window.fetch;
+if (originalFetch) {
+    window.fetch = function (...args) {
+        return originalFetch.apply(this, args).then((response) => {
+            if (pattern.test(response.url)) {
+                response.clone().json().then((data) => record(response.url, data)).catch(() => {});
+            }
+            return response;
+        });
+    };
+}
+const originalOpen = XMLHttpRequest.prototype.open;
+XMLHttpRequest.prototype.open = function (method, url, ...rest) {
+    this.addEventListener('load', () => {
+        try {
+            record(this.responseURL || String(url), JSON.parse(this.responseText));
+        } catch (e) {}
+    });
+    return originalOpen.call(this, method, url, ...rest);
+};
+return true;
+"""
+
+# Fetches one page of a followers/following list from the API (async script:
+# arguments are user id, list type, page size, max_id and the callback)
+LIST_API_PAGE_JS = """
+const [userId, listType, count, maxId, done] = arguments;
+let url = '/api/v1/friendships/' + encodeURIComponent(userId) + '/' + listType + '/?count=' + count;
+if (maxId) {
+    url += '&max_id=' + encodeURIComponent(maxId);
+}
+fetch(url, {credentials: 'include', headers: {'X-IG-App-ID': '""" + IG_APP_ID + """'}})
+    .then((response) => response.json().catch(() => ({})).then((data) => ({status: response.status, data: data})))
+    .then(({status, data}) => done({
+        status: status,
+        api_status: data.status || null,
+        message: data.message || null,
+        usernames: (data.users || []).map((user) => user.username),
+        next_max_id: data.next_max_id ? String(data.next_max_id) : null
+    }))
+    .catch((error) => done({error: String(error)}));
+"""
+
+def install_list_cursor_hook(driver):
+    """Start recording the pagination cursor of the list dialog. Returns True on success"""
+    try:
+        return bool(driver.execute_script(LIST_CURSOR_HOOK_JS))
+    except Exception as e:
+        print(f"Could not install list cursor hook: {e}")
+        return False
+
+def read_list_cursor(driver, list_type, username):
+    """
+    Return the resume cursor for the rows the dialog has loaded so far.
+    
+    Returns:
+        Dictionary with 'username', 'list_type', 'user_id', 'max_id' (None at the
+        end of the list), 'offset' and 'last_username', or None if no API
+        response was recorded for this list
+    """
+    try:
+        cursor = driver.execute_script("return window.__igListCursor || null;")
+    except Exception:
+        return None
+    if not isinstance(cursor, dict) or cursor.get("list_type") != list_type:
+        return None
+    return {
+        "username": username,
+        "list_type": list_type,
+        "user_id": cursor.get("user_id"),
+        "max_id": cursor.get("max_id"),
+        "offset": cursor.get("loaded", 0),
+        "last_username": cursor.get("last_username"),
+        "updated_at": time.time()
+    }
+
+def fetch_list_page(driver, user_id, list_type, max_id=None, count=LIST_API_PAGE_SIZE):
+    """
+    Fetch one page of a followers/following list from the API in the page context.
+    
+    A page is throttled when the API answers 429 or "Please wait", or when it
+    returns fewer than count users (none included) while the list goes on.
+    A throttled page without users keeps max_id, so the same page is asked
+    for again.
+    
+    Returns:
+        Tuple of (usernames, next_max_id, throttled); next_max_id is None at the end of the list
+    """
+    result = driver.execute_async_script(LIST_API_PAGE_JS, user_id, list_type, count, max_id)
+    if not isinstance(result, dict) or "error" in result:
+        raise RuntimeError(f"List API request failed: {result.get('error') if isinstance(result, dict) else result}")
+    usernames = [username for username in result["usernames"] if isinstance(username, str) and username]
+    
+    if result.get("status") == 429 or (result.get("api_status") == "fail" and "wait" in (result.get("message") or "").lower()):
+        return usernames, max_id, True
+    if result.get("status", 200) >= 400:
+        raise RuntimeError(f"List API request failed: HTTP {result['status']} {result.get('message') or ''}".rstrip())
+    next_max_id = result["next_max_id"]
+    return usernames, next_max_id, next_max_id is not None and len(usernames) < count
+
+def is_resumable_cursor(cursor, list_type, username):
+    """True if cursor was saved for this list of this account and can seek past the collected users"""
+    return (
+        isinstance(cursor, dict) and cursor.get("list_type") == list_type and cursor.get("username") == username
+        and bool(cursor.get("user_id")) and bool(cursor.get("max_id"))
+    )
+
+def scrape_list_from_cursor(list_type, driver, profile_link, cursor, resume_from_saved=None, max_pages=CURSOR_MAX_PAGES, suspend_on_rate_limit=False):
+    """
+    Continue a followers/following list from a saved cursor through the list API.
+    
+    Each page is one request starting at the cursor's max_id, so the cost of
+    resuming does not depend on how many users were collected before. At most
+    max_pages pages are fetched; a list that goes on after them is returned
+    with a cursor whose max_id is still set, to be passed back next session.
+    
+    Returns:
+        Tuple of (usernames including resume_from_saved, new cursor); the
+        cursor's max_id is None only when the end of the list was reached
+    """
+    usernames = UsernameAccumulator(resume_from_saved, page_step="scrape_list_from_cursor.page")
+    cursor = dict(cursor)
+    print(f"Resuming {list_type} at offset {cursor.get('offset', 0)} (after {cursor.get('last_username')})")
+    
+    consecutive_rate_limits = 0
+    for page in range(1, max_pages + 1):
+        usernames.start_page()
+        page_usernames, next_max_id, throttled = fetch_list_page(driver, cursor["user_id"], list_type, cursor["max_id"])
+        for username in page_usernames:
+            usernames.add(username)
+        
+        cursor["max_id"] = next_max_id
+        cursor["offset"] = cursor.get("offset", 0) + len(page_usernames)
+        if page_usernames:
+            cursor["last_username"] = page_usernames[-1]
+        cursor["updated_at"] = time.time()
+        print(f"Cursor page {page}/{max_pages} for {list_type}: added {usernames.page_new} new users")
+        
+        if next_max_id is None:
+            print(f"Reached the end of the {list_type} list")
+            break
+        if page == max_pages:
+            print(f"Cursor resume of {list_type} stopped at the {max_pages}-page cap with more users left; keeping the cursor at offset {cursor['offset']} for the next session")
+            break
+        
+        # The API response itself tells when it is throttled (see fetch_list_page)
+        if throttled:
+            consecutive_rate_limits += 1
+        else:
+            consecutive_rate_limits = 0
+        if consecutive_rate_limits >= 2:
+            usernames.finish_page()
+            instrumentation.count("rate_limit_hits")
+            _rate_limit_info[list_type]['last_hit'] = datetime.datetime.now()
+            _rate_limit_info[list_type]['retry_count'] += 1
+            wait_time = RATE_LIMIT_WAIT_TIME * (1.5 ** min(4, _rate_limit_info[list_type]['retry_count']))
+            print(f"RATE LIMIT DETECTED: List API throttled for {consecutive_rate_limits} consecutive pages")
+            if suspend_on_rate_limit:
+                raise RateLimitSuspended(list_type, profile_link, usernames.to_list(), time.time() + wait_time, cursor)
+            print(f"Waiting {wait_time/60:.1f} minutes before continuing from the cursor...")
+            wait_timer = instrumentation.start_timer()
+            time.sleep(wait_time)
+            instrumentation.stop_timer("rate_limit_wait", wait_timer)
+            consecutive_rate_limits = 0
+    
+    usernames.finish_page()
+    _last_cursors[list_type] = cursor
+    return usernames.to_list(), cursor
+
+def get_dialog_state(driver, scroll_div=None):
+    """Return (row count, scrollHeight) of the open dialog, or None if it can't be read"""
+    try:
+        state = driver.execute_script(DIALOG_STATE_JS, scroll_div)
+        return tuple(state) if state else None
+    except Exception:
+        return None
+
+def wait_for_dialog_change(driver, scroll_div, previous_state, step, cap=None):
+    """
+    Wait until the dialog row count or scrollHeight differs from previous_state.
+    
+    Returns:
+        True if the dialog changed before the cap (WAIT_CAPS[step] by default)
+    """
+    def changed():
+        state = get_dialog_state(driver, scroll_div)
+        return state is not None and state != previous_state
+    return adaptive_wait.wait_until(changed, WAIT_CAPS[step] if cap is None else cap, step)
+
+def wait_for_dialog_rows(driver, step='dialog_open', cap=None):
+    """Wait until the followers/following dialog shows at least one row"""
+    def has_rows():
+        state = get_dialog_state(driver)
+        return state is not None and state[0] > 0
+    return adaptive_wait.wait_until(has_rows, WAIT_CAPS[step] if cap is None else cap, step)
+
+def wait_for_dialog_closed(driver, step='dialog_close', cap=None):
+    """Wait until no dialog is open"""
+    return adaptive_wait.wait_until(
+        lambda: not driver.find_elements(By.XPATH, "//div[@role='dialog']"),
+        WAIT_CAPS[step] if cap is None else cap, step
+    )
+
+def wait_for_profile(driver, step='profile_load', cap=None):
+    """Wait until the profile header with the follower/following counts is rendered"""
+    return adaptive_wait.wait_until(
+        lambda: driver.find_elements(By.XPATH, "//a[contains(@href, '/followers/')] | //header//ul/li"),
+        WAIT_CAPS[step] if cap is None else cap, step
+    )
+
+def create_driver(headless=False, chromedriver_path=CHROMEDRIVER_PATH):
+    """Start a Chrome webdriver with the options used by all scraping scripts"""
+    options = Options()
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--no-sandbox")
+    if headless:
+        options.add_argument("--headless")
+    options.add_argument("--window-size=1920,1080")
+    service = Service(executable_path=chromedriver_path)
+    return webdriver.Chrome(service=service, options=options)
+
+def emit_event(on_event, event, **data):
+    """
+    Pass a structured progress event to an on_event callback.
+
+    Events are dictionaries with an 'event' name, a 'timestamp' and the event's
+    fields, so callers no longer have to parse printed output.
+    """
+    if on_event is None:
+        return
+    try:
+        on_event(dict(data, event=event, timestamp=time.time()))
+    except Exception as e:
+        print(f"Error in {event} event callback: {e}")
+
 def dict_to_adjList(allNodes):
     adjList = []
     for person,following in allNodes.items():
@@ -57,6 +547,11 @@ def adjList_to_dict(adjList):
         
     return allNodes
 
+def adjList_to_compact(adjList):
+    """Build a CompactGraph (int32 ids + CSR/CSC arrays) from adjacency list lines"""
+    from compact_graph import CompactGraph
+    return CompactGraph.from_adj_list_lines(adjList)
+
 
 def check_if_stuck(prev_scrape_sizes, new_scrape_size):
     occurences = Counter(prev_scrape_sizes)
@@ -71,9 +566,13 @@ def check_if_stuck(prev_scrape_sizes, new_scrape_size):
     return (False, prev_scrape_sizes)
 
 
+@instrumentation.timed("login_insta")
 def login_insta(driver,username,password):
-    driver.get("https://www.instagram.com/accounts/login")
-    time.sleep(5)  # Increased wait time
+    driver.get(f"{INSTAGRAM_URL}/accounts/login")
+    adaptive_wait.wait_until(
+        lambda: driver.find_elements(By.XPATH, "//input[@name='username'] | //input[@type='password']"),
+        WAIT_CAPS['login_page'], 'login_page'
+    )
     
     # Input username and password
     try:
@@ -132,7 +631,10 @@ def login_insta(driver,username,password):
                 continue
         
         # Wait for login to complete
-        time.sleep(5)
+        adaptive_wait.wait_until(
+            lambda: "/accounts/login" not in driver.current_url,
+            WAIT_CAPS['login_submit'], 'login_submit'
+        )
         
         # Handle "Save Your Login Info" dialog if it appears
         try:
@@ -154,7 +656,7 @@ def login_insta(driver,username,password):
             pass
         
         # Check if login was successful
-        if "instagram.com/accounts/login" in driver.current_url:
+        if "/accounts/login" in driver.current_url:
             print("Login might have failed. Current URL still shows login page.")
         else:
             print("Logged in successfully!")
@@ -177,7 +679,7 @@ def get_following_links(driver, following_usernames=None):
     """
     # If we already have usernames from API, just construct the links directly
     if following_usernames and len(following_usernames) > 0:
-        links = [f"https://www.instagram.com/{username}/" for username in following_usernames]
+        links = [f"{INSTAGRAM_URL}/{username}/" for username in following_usernames]
         print(f"Created {len(links)} following links from usernames")
         return links
     
@@ -203,7 +705,7 @@ def get_following_links(driver, following_usernames=None):
                 for item in followList:
                     try:
                         href = item.get_attribute("href")
-                        if href and href.startswith("https://www.instagram.com/") and not "/p/" in href and href not in links:
+                        if href and href.startswith(f"{INSTAGRAM_URL}/") and not "/p/" in href and href not in links:
                             links.append(href)
                     except Exception as e:
                         print(f"Error getting href: {e}")
@@ -222,12 +724,12 @@ def get_following_links(driver, following_usernames=None):
         try:
             js_script = """
             const links = Array.from(document.querySelectorAll('a'))
-                .filter(a => a.href && a.href.startsWith('https://www.instagram.com/') && 
+                .filter(a => a.href && a.href.startsWith(arguments[0] + '/') && 
                         !a.href.includes('/p/') && !a.href.includes('/explore/'))
                 .map(a => a.href);
             return [...new Set(links)];  // Remove duplicates
             """
-            js_links = driver.execute_script(js_script)
+            js_links = driver.execute_script(js_script, INSTAGRAM_URL)
             if js_links and len(js_links) > 0:
                 links = js_links
         except Exception as e:
@@ -237,11 +739,51 @@ def get_following_links(driver, following_usernames=None):
     return links
 
 
-def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_from_saved=None, max_pages=10, aggressive_resume=False):
-    """Scrape followers or following list from a profile"""
+@instrumentation.timed("scrape_whole_list", users=lambda result: len(result[0]))
+def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_from_saved=None, max_pages=10, aggressive_resume=False, js_extraction=True, observer_mode=False, suspend_on_rate_limit=False):
+    """
+    Scrape followers or following list from a profile
+    
+    When a rate limit is detected the back-off is slept through, unless
+    suspend_on_rate_limit is set: then RateLimitSuspended is raised with the
+    usernames collected so far and the time the back-off ends, so the caller
+    can do other work in the meantime.
+    
+    The returned cursor records where the loaded rows end (the list API's
+    next_max_id, the row offset and the last username). Passing it back as
+    next_cursor continues the list from there through the list API instead of
+    scrolling the dialog past the users collected before.
+    
+    With js_extraction enabled, each page is read with a single execute_script
+    call (see extract_dialog_usernames); the per-element Selenium methods are
+    only used when that returns nothing.
+    
+    With observer_mode enabled, a MutationObserver in the dialog buffers newly
+    rendered usernames and each page only drains the new entries, so the cost
+    per page follows the number of new rows and rows removed by a virtualized
+    list are still collected.
+    """
+    profile_username = profile_link.rstrip('/').split('/')[-1]
+    
     # Get to profile
     driver.get(profile_link)
-    time.sleep(3)
+    wait_for_profile(driver)
+    
+    # Seek straight to the saved position when the cursor allows it
+    if is_resumable_cursor(next_cursor, list_type, profile_username):
+        try:
+            return scrape_list_from_cursor(
+                list_type, driver, profile_link, next_cursor, resume_from_saved=resume_from_saved,
+                max_pages=max_pages, suspend_on_rate_limit=suspend_on_rate_limit
+            )
+        except RateLimitSuspended:
+            raise
+        except Exception as e:
+            print(f"Could not resume {list_type} from the saved cursor, scrolling the dialog instead: {e}")
+    
+    # Record the dialog's own API responses to build the cursor
+    install_list_cursor_hook(driver)
+    cursor = None
     
     # First click the right button (followers or following)
     if list_type == "followers":
@@ -296,15 +838,15 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
                     return [], None
     
     # Wait for the modal to appear
-    time.sleep(3)
+    wait_for_dialog_rows(driver)
     
     # Initialize our containers
-    usernames = []
+    usernames = UsernameAccumulator(page_step="scrape_whole_list.page")
     resuming_with_existing = False
     existing_count = 0
     
     if resume_from_saved:
-        usernames = list(resume_from_saved)  # Make a copy of the existing data
+        usernames = UsernameAccumulator(resume_from_saved, page_step="scrape_whole_list.page")  # Copy of the existing data
         resuming_with_existing = len(usernames) > 0
         existing_count = len(usernames)
         print(f"Resuming with {len(usernames)} existing {list_type}")
@@ -330,7 +872,22 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
                 )
             except Exception as e:
                 print(f"Could not find scrollable area: {e}")
-                return usernames, None
+                return usernames.to_list(), None
+    
+    # Start buffering rendered rows before any scrolling happens
+    if observer_mode and not install_dialog_observer(driver):
+        print("Dialog observer unavailable, reading the full dialog on every page instead")
+        observer_mode = False
+    
+    def capture_cursor():
+        """Read the cursor, then collect every row loaded up to it so resuming skips nothing"""
+        captured = read_list_cursor(driver, list_type, profile_username)
+        rows = drain_dialog_observer(driver) if observer_mode else None
+        if rows is None and js_extraction:
+            rows = extract_dialog_usernames(driver)
+        for username in rows or []:
+            usernames.add(username)
+        return captured or cursor
     
     # If we're resuming with a lot of existing users, perform initial scrolls to get past them
     if (resuming_with_existing and existing_count > 20) or aggressive_resume:
@@ -348,6 +905,7 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
                 if i % 5 == 0:
                     print(f"Aggressive initial scroll {i+1}/{initial_scrolls_needed}")
                 
+                state = get_dialog_state(driver, scroll_div)
                 if i % 3 == 0:
                     # Scroll to bottom
                     driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", scroll_div)
@@ -355,8 +913,8 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
                     # Scroll a fixed large amount
                     driver.execute_script("arguments[0].scrollTop += 5000;", scroll_div)
                 
-                # Very short pauses for rapid scrolling
-                time.sleep(0.2)
+                # Very short waits for rapid scrolling
+                wait_for_dialog_change(driver, scroll_div, state, 'resume_scroll', cap=0.2)
             
             # Then do some slower, more thorough scrolls
             for i in range(initial_scrolls_needed // 2, initial_scrolls_needed):
@@ -364,6 +922,7 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
                     print(f"Aggressive initial scroll {i+1}/{initial_scrolls_needed}")
                 
                 # Mix of scrolling approaches
+                state = get_dialog_state(driver, scroll_div)
                 if i % 2 == 0:
                     # Normal scroll
                     driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", scroll_div)
@@ -372,8 +931,8 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
                     scroll_position = (i / initial_scrolls_needed) * 10000  # Approximate large value
                     driver.execute_script(f"arguments[0].scrollTop = {scroll_position};", scroll_div)
                 
-                # Medium pauses to let content load
-                time.sleep(0.7)
+                # Let content load, but no longer than needed
+                wait_for_dialog_change(driver, scroll_div, state, 'resume_scroll')
         else:
             # Standard approach for non-aggressive mode
             print(f"Performing initial scrolls to get past {existing_count} existing users")
@@ -381,14 +940,15 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
             initial_scrolls_needed = min(50, existing_count // 10)  # Cap at 50 to prevent excessive scrolling
             
             for i in range(initial_scrolls_needed):
+                state = get_dialog_state(driver, scroll_div)
                 driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", scroll_div)
-                # Shorter pauses between these initial scrolls
-                time.sleep(0.3)
+                # Shorter waits between these initial scrolls
+                wait_for_dialog_change(driver, scroll_div, state, 'resume_scroll', cap=0.3)
                 if i % 5 == 0:  # Log progress every 5 scrolls
                     print(f"Initial scroll {i+1}/{initial_scrolls_needed} to get past existing users")
         
-        # Final longer pause to ensure content loads after bulk scrolling
-        time.sleep(3)
+        # Final longer wait to ensure content loads after bulk scrolling
+        wait_for_dialog_change(driver, scroll_div, get_dialog_state(driver, scroll_div), 'resume_settle')
         print("Finished initial scrolling, now looking for new users")
 
     # Scroll through the list to load more items
@@ -437,37 +997,55 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
         print(f"Scrolling page {current_page}/{max_pages} for {list_type}")
         
         # Get current usernames
-        prev_count = len(usernames)
+        usernames.start_page()
         
-        # Try multiple methods to extract usernames
-        try:
-            # Method 1: Modern profile layout (most common)
-            elements = driver.find_elements(By.XPATH, "//div[@role='dialog']//a[contains(@href, '/')]")
-            
-            # Filter to only username links (not hashtags, etc.)
-            for element in elements:
-                href = element.get_attribute('href')
-                if href and '/p/' not in href and '/explore/' not in href and '/stories/' not in href:
-                    try:
-                        username = href.split('/')[-2] if href.endswith('/') else href.split('/')[-1]
-                        if username and username not in usernames and username != "":
-                            usernames.append(username)
-                            found_new_since_resuming = True
-                    except:
-                        pass
-        except:
-            pass
+        page_usernames = None
+        if observer_mode:
+            # Only take the rows rendered since the previous page
+            page_usernames = drain_dialog_observer(driver)
+            if page_usernames is None:
+                # The dialog was re-rendered (e.g. re-opened after a rate limit), start a new observer
+                if install_dialog_observer(driver):
+                    page_usernames = drain_dialog_observer(driver)
+        
+        # Read the whole page in one round trip when possible
+        if page_usernames is None and js_extraction:
+            page_usernames = extract_dialog_usernames(driver)
+        if page_usernames:
+            for username in page_usernames:
+                if usernames.add(username):
+                    found_new_since_resuming = True
+        
+        # Fall back to per-element extraction if no in-page read found anything
+        # (an empty drain just means no new rows were rendered)
+        use_fallback = not page_usernames and not (observer_mode and page_usernames is not None)
+        if use_fallback:
+            try:
+                # Method 1: Modern profile layout (most common)
+                elements = driver.find_elements(By.XPATH, "//div[@role='dialog']//a[contains(@href, '/')]")
+                
+                # Filter to only username links (not hashtags, etc.)
+                for element in elements:
+                    href = element.get_attribute('href')
+                    if href and '/p/' not in href and '/explore/' not in href and '/stories/' not in href:
+                        try:
+                            username = href.split('/')[-2] if href.endswith('/') else href.split('/')[-1]
+                            if username and usernames.add(username):
+                                found_new_since_resuming = True
+                        except:
+                            pass
+            except:
+                pass
             
         # Method 2: Alternative structure
-        if len(usernames) == prev_count:  # If Method 1 didn't find any new users
+        if use_fallback and usernames.page_new == 0:  # If Method 1 didn't find any new users
             try:
                 # Look for elements with username class
                 elements = driver.find_elements(By.XPATH, "//div[@role='dialog']//div[contains(@class, 'notranslate')]")
                 for element in elements:
                     try:
                         username = element.text
-                        if username and username not in usernames and username != "":
-                            usernames.append(username)
+                        if username and usernames.add(username):
                             found_new_since_resuming = True
                     except:
                         pass
@@ -475,14 +1053,13 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
                 pass
         
         # Method 3: Last resort - any link with short text
-        if len(usernames) == prev_count:  # If Methods 1 & 2 didn't find any new users
+        if use_fallback and usernames.page_new == 0:  # If Methods 1 & 2 didn't find any new users
             try:
                 elements = driver.find_elements(By.XPATH, "//div[@role='dialog']//a")
                 for element in elements:
                     try:
                         username = element.text
-                        if username and len(username) > 2 and len(username) < 30 and username not in usernames:
-                            usernames.append(username)
+                        if username and len(username) > 2 and len(username) < 30 and usernames.add(username):
                             found_new_since_resuming = True
                     except:
                         pass
@@ -490,9 +1067,8 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
                 pass
         
         # Check if we found any new users
-        new_users = len(usernames) - prev_count
-        filtered_count = len(elements) - new_users if 'elements' in locals() else "unknown"
-        print(f"Added {new_users} new users (filtered {filtered_count} duplicates)")
+        new_users = usernames.page_new
+        print(f"Added {new_users} new users (filtered {usernames.page_duplicates} duplicates)")
         
         # Check if we've hit Instagram's rate limit (exactly 10 new users)
         if new_users == RATE_LIMIT_THRESHOLD:
@@ -501,6 +1077,8 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
             if consecutive_rate_limits >= 2:
                 print(f"RATE LIMIT DETECTED: Exactly {RATE_LIMIT_THRESHOLD} users retrieved for {consecutive_rate_limits} consecutive pages")
                 rate_limit_hit = True
+                usernames.finish_page()
+                instrumentation.count("rate_limit_hits")
                 
                 # Update rate limit information
                 _rate_limit_info[list_type]['last_hit'] = datetime.datetime.now()
@@ -512,14 +1090,21 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
                 
                 print(f"Rate limit hit {_rate_limit_info[list_type]['retry_count']} times. Waiting {wait_time/60:.1f} minutes before retrying...")
                 
+                cursor = capture_cursor()
+                
                 # Close the modal to prevent session timeout
                 try:
                     actions = ActionChains(driver)
                     actions.send_keys(Keys.ESCAPE).perform()
-                    time.sleep(1)
+                    wait_for_dialog_closed(driver)
                 except:
                     pass
                 
+                # Leave the back-off to the caller
+                if suspend_on_rate_limit:
+                    print(f"Suspending {list_type} scraping with {len(usernames)} users collected")
+                    raise RateLimitSuspended(list_type, profile_link, usernames.to_list(), time.time() + wait_time, cursor)
+                
                 # Wait for the rate limit to refresh
                 wait_start = datetime.datetime.now()
                 wait_end = wait_start + datetime.timedelta(seconds=wait_time)
@@ -527,6 +1112,7 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
                 print(f"Rate limit wait started at {wait_start.strftime('%H:%M:%S')}, will continue at {wait_end.strftime('%H:%M:%S')}")
                 
                 # Wait with periodic updates
+                wait_timer = instrumentation.start_timer()
                 elapsed = 0
                 update_interval = min(300, wait_time / 5)  # Update every 5 minutes or 1/5 of wait time, whichever is smaller
                 
@@ -539,11 +1125,20 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
                         remaining = wait_time - elapsed
                         print(f"Rate limit wait: {elapsed/60:.1f} minutes elapsed, {remaining/60:.1f} minutes remaining")
                 
+                instrumentation.stop_timer("rate_limit_wait", wait_timer)
                 print("Rate limit wait completed. Resuming scraping...")
                 
                 # Re-navigate to profile and re-open the dialog
                 driver.get(profile_link)
-                time.sleep(3)
+                wait_for_profile(driver)
+                
+                # Continue from the cursor rather than scrolling past the collected users again
+                if is_resumable_cursor(cursor, list_type, profile_username):
+                    return scrape_list_from_cursor(
+                        list_type, driver, profile_link, cursor, resume_from_saved=usernames.to_list(),
+                        max_pages=max(1, max_pages - current_page + 1), suspend_on_rate_limit=suspend_on_rate_limit
+                    )
+                install_list_cursor_hook(driver)
                 
                 # Re-click the appropriate button
                 try:
@@ -558,7 +1153,7 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
                         )
                         following_button.click()
                     
-                    time.sleep(3)
+                    wait_for_dialog_rows(driver)
                     
                     # Re-find the scrollable div
                     try:
@@ -582,7 +1177,7 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
                     
                 except Exception as e:
                     print(f"Error re-opening dialog after rate limit wait: {e}")
-                    return usernames, None
+                    return usernames.to_list(), None
             
         else:
             consecutive_rate_limits = 0  # Reset counter if we didn't get exactly 10 users
@@ -634,7 +1229,10 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
         if aggressive_resume:
             num_scrolls = 6  # Even more scrolls in aggressive mode
             
+        batch_start_state = get_dialog_state(driver, scroll_div)
+        batch_loaded = False
         for _ in range(num_scrolls):
+            state = get_dialog_state(driver, scroll_div)
             # Use the current scroll strategy
             if aggressive_resume and not found_new_since_resuming:
                 try:
@@ -646,10 +1244,13 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
                 # Normal scrolling
                 driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", scroll_div)
                 
-            time.sleep(0.5)  # Short pause between scrolls
+            # Short wait between scrolls, ending as soon as new rows render
+            if wait_for_dialog_change(driver, scroll_div, state, 'scroll'):
+                batch_loaded = True
         
-        # Wait longer after the multiple scrolls to ensure content loads
-        time.sleep(scroll_timeout)
+        # Wait longer after the multiple scrolls if nothing has loaded yet
+        if not batch_loaded:
+            wait_for_dialog_change(driver, scroll_div, batch_start_state, 'scroll_batch', cap=scroll_timeout)
         
         # Check if we've reached the bottom
         new_height = driver.execute_script("return arguments[0].scrollHeight", scroll_div)
@@ -659,8 +1260,9 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
             # Try a more aggressive scroll by scrolling a fixed amount
             try:
                 # Try scrolling a fixed amount (3000px) in addition to normal scrolling
+                state = get_dialog_state(driver, scroll_div)
                 driver.execute_script("arguments[0].scrollTop += 3000;", scroll_div)
-                time.sleep(1)
+                wait_for_dialog_change(driver, scroll_div, state, 'fixed_scroll')
                 print("Attempted fixed-distance scroll to bypass potential UI limitations")
                 
                 # In aggressive mode, try even more radical approaches if we're stuck
@@ -669,8 +1271,9 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
                     positions = [0, 5000, 10000, 15000, 20000]
                     position = positions[current_page % len(positions)]
                     print(f"Trying scroll to position {position}px")
+                    state = get_dialog_state(driver, scroll_div)
                     driver.execute_script(f"arguments[0].scrollTop = {position};", scroll_div)
-                    time.sleep(1)
+                    wait_for_dialog_change(driver, scroll_div, state, 'fixed_scroll')
             except Exception as e:
                 print(f"Fixed scroll error: {e}")
                 
@@ -683,11 +1286,17 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
         
         current_page += 1
     
+    usernames.finish_page()
+    
+    # Remember where the loaded rows end before the dialog is closed
+    cursor = capture_cursor()
+    _last_cursors[list_type] = cursor
+    
     # Close the modal by clicking outside of it
     try:
         actions = ActionChains(driver)
         actions.send_keys(Keys.ESCAPE).perform()
-        time.sleep(1)
+        wait_for_dialog_closed(driver)
     except:
         pass
     
@@ -695,9 +1304,10 @@ def scrape_whole_list(list_type, driver, profile_link, next_cursor=None, resume_
     new_users_this_session = len(usernames) - existing_count
     print(f"Total {list_type} retrieved: {len(usernames)} ({new_users_this_session} new in this session)")
     
-    # Return the collected usernames and the cursor for potential future pagination
-    return usernames, None  # We don't track cursors in this version
+    # Return the collected usernames and the cursor for resuming the list
+    return usernames.to_list(), cursor
 
+@instrumentation.timed("get_profile_stats")
 def get_profile_stats(driver):
     """
     Extract profile statistics (followers, following, posts) from an Instagram profile page.
@@ -714,6 +1324,9 @@ def get_profile_stats(driver):
         'posts': 0
     }
     
+    # Return as soon as the header is rendered instead of relying on a fixed sleep by the caller
+    wait_for_profile(driver)
+    
     try:
         # Strategy 1: Classic selectors (old UI)
         try:
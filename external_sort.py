@@ -0,0 +1,128 @@
+"""
+Bounded-memory sort and deduplication of line-based files.
+
+Lines are collected into chunks that fit a memory budget, each chunk is sorted,
+deduplicated and written to a temporary run file, and the runs are combined
+with a k-way merge that drops repeated lines. Used to deduplicate and compact
+adjList.txt without holding the whole file, a set of it and a sorted copy in
+RAM at the same time.
+"""
+import os
+import heapq
+import tempfile
+
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024  # 64 MB
+MAX_MERGE_FANIN = 64  # Maximum number of run files merged at once
+LINE_OVERHEAD = 64  # Approximate per-string overhead of a Python str in a list
+
+def _write_run(lines, tmp_dir):
+    """Sort and deduplicate a chunk of lines and write it to a temporary run file"""
+    lines.sort()
+    fd, run_path = tempfile.mkstemp(prefix="sort_run_", suffix=".txt", dir=tmp_dir)
+    with os.fdopen(fd, "w") as run_h:
+        previous = None
+        for line in lines:
+            if line != previous:
+                run_h.write(f"{line}\n")
+                previous = line
+    return run_path
+
+def _iter_run(run_h):
+    for line in run_h:
+        yield line.rstrip("\n")
+
+def _merge_runs(run_paths, output_path):
+    """
+    Merge sorted run files into output_path, dropping repeated lines.
+
+    Returns:
+        Number of unique lines written
+    """
+    run_handles = [open(path, "r") for path in run_paths]
+    unique_count = 0
+    try:
+        with open(output_path, "w") as out_h:
+            previous = None
+            for line in heapq.merge(*[_iter_run(run_h) for run_h in run_handles]):
+                if line != previous:
+                    out_h.write(f"{line}\n")
+                    previous = line
+                    unique_count += 1
+    finally:
+        for run_h in run_handles:
+            run_h.close()
+    return unique_count
+
+def sort_unique_lines(input_paths, output_path, memory_budget=DEFAULT_MEMORY_BUDGET, tmp_dir=None):
+    """
+    Sort and deduplicate the non-empty lines of one or more files in bounded memory.
+
+    Args:
+        input_paths: Files to read (missing files are ignored). output_path may be one of them.
+        output_path: File receiving the sorted unique lines (replaced atomically)
+        memory_budget: Approximate number of bytes of lines held in memory per chunk
+        tmp_dir: Directory for run files (defaults to the directory of output_path)
+
+    Returns:
+        Tuple of (unique_count, duplicates_removed)
+    """
+    if tmp_dir is None:
+        tmp_dir = os.path.dirname(os.path.abspath(output_path))
+
+    run_paths = []
+    total_count = 0
+    try:
+        chunk = []
+        chunk_bytes = 0
+        for path in input_paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, "r") as in_h:
+                for line in in_h:
+                    line = line.strip()
+                    if not line:  # Skip empty lines
+                        continue
+                    chunk.append(line)
+                    chunk_bytes += len(line) + LINE_OVERHEAD
+                    total_count += 1
+                    if chunk_bytes >= memory_budget:
+                        run_paths.append(_write_run(chunk, tmp_dir))
+                        chunk = []
+                        chunk_bytes = 0
+        if chunk or not run_paths:
+            run_paths.append(_write_run(chunk, tmp_dir))
+        del chunk
+
+        # Reduce the number of runs until a single merge pass can combine them
+        while len(run_paths) > MAX_MERGE_FANIN:
+            merged_paths = []
+            for start in range(0, len(run_paths), MAX_MERGE_FANIN):
+                group = run_paths[start:start + MAX_MERGE_FANIN]
+                fd, merged_path = tempfile.mkstemp(prefix="sort_run_", suffix=".txt", dir=tmp_dir)
+                os.close(fd)
+                _merge_runs(group, merged_path)
+                for path in group:
+                    os.remove(path)
+                merged_paths.append(merged_path)
+            run_paths = merged_paths
+
+        tmp_output = output_path + ".tmp"
+        unique_count = _merge_runs(run_paths, tmp_output)
+        os.replace(tmp_output, output_path)
+    finally:
+        for path in run_paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    return unique_count, total_count - unique_count
+
+def count_lines(path):
+    """Count the non-empty lines of a file without loading it"""
+    if not os.path.exists(path):
+        return 0
+    count = 0
+    with open(path, "r") as in_h:
+        for line in in_h:
+            if line.strip():
+                count += 1
+    return count
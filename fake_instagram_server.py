@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Offline stand-in for the Instagram pages the scrapers touch.
+
+Serves a login form, a home page that requires the session cookie, profile pages with follower/following/post counts and a
+scrollable followers/following dialog that renders rows in batches after a
+configurable latency. Like Instagram, the dialog loads each batch from the
+/api/v1/friendships/<user id>/<list>/ endpoint, paginated with max_id. It can
+also imitate Instagram's throttling, where every request returns exactly 10 users. Used by benchmark_scraper.py to drive the
+real scraping functions in essentialRoutines through headless Selenium.
+
+Run standalone to poke at it in a browser:
+    python3 fake_instagram_server.py --port 8800 --followers 500 --following 300
+"""
+import json
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+DEFAULT_CONFIG = {
+    "followers": 200,        # Size of every profile's followers list
+    "following": 150,        # Size of every profile's following list
+    "posts": 12,
+    "page_size": 12,         # Rows rendered per load (Instagram renders about 12)
+    "latency_ms": 300,       # Delay before a requested batch of rows is rendered
+    "throttle_after": None,  # Once this many rows are loaded, only 10 rows are rendered per load
+    "virtualize": False      # Keep only the most recent rows in the DOM, like a virtualized list
+}
+THROTTLED_PAGE_SIZE = 10
+SESSION_COOKIE = "sessionid=fake-session"
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><title>Login</title></head>
+<body>
+<form method="post" action="/accounts/login/">
+    <input name="username" aria-label="Phone number, username, or email" type="text">
+    <input name="password" aria-label="Password" type="password">
+    <button type="submit">Log in</button>
+</form>
+</body></html>
+"""
+
+HOME_PAGE = """<!DOCTYPE html>
+<html><head><title>Home</title></head>
+<body>
+<nav><a href="/">Home</a> <a href="/direct/inbox/">Messages</a></nav>
+<main><h1>Home</h1></main>
+<div id="save-login"><button type="button" onclick="this.parentNode.remove()">Not Now</button></div>
+</body></html>
+"""
+
+PROFILE_PAGE = """<!DOCTYPE html>
+<html><head><title>@{username}</title></head>
+<body>
+<header>
+    <section>
+        <h2>{username}</h2>
+        <ul>
+            <li><span class="g47SY">{posts}</span> posts</li>
+            <li><a href="/{username}/followers/" data-list="followers"><span>{followers}</span> followers</a></li>
+            <li><a href="/{username}/following/" data-list="following"><span>{following}</span> following</a></li>
+        </ul>
+    </section>
+</header>
+<div id="dialog-root"></div>
+<script>
+const CONFIG = {config};
+const USERNAME = {username_json};
+
+function rowHtml(name) {{
+    return '<li style="height: 56px; list-style: none;">' +
+        '<a href="/' + name + '/"><span class="notranslate">' + name + '</span></a>' +
+        '</li>';
+}}
+
+function openDialog(listType) {{
+    const total = CONFIG[listType];
+    const root = document.getElementById('dialog-root');
+    root.innerHTML =
+        '<div role="dialog">' +
+        '<div><a href="/explore/">Explore</a> <a href="/p/pinned/">Pinned post</a></div>' +
+        '<div style="overflow-y: scroll; height: 420px;"><ul class="rows"></ul></div>' +
+        '</div>';
+    const scroller = root.querySelector('div[role="dialog"] div[style*="overflow"]');
+    const rows = scroller.querySelector('ul');
+    let maxId = null;
+    let finished = total === 0;
+    let loading = false;
+
+    function loadMore() {{
+        if (loading || finished) {{
+            return;
+        }}
+        loading = true;
+        setTimeout(() => {{
+            let url = '/api/v1/friendships/' + USERNAME + '/' + listType + '/?count=' + CONFIG.page_size;
+            if (maxId !== null) {{
+                url += '&max_id=' + maxId;
+            }}
+            fetch(url).then((response) => response.json()).then((data) => {{
+                rows.insertAdjacentHTML('beforeend', data.users.map((user) => rowHtml(user.username)).join(''));
+                maxId = data.next_max_id || null;
+                finished = maxId === null;
+                if (CONFIG.virtualize) {{
+                    while (rows.children.length > 3 * CONFIG.page_size) {{
+                        rows.removeChild(rows.firstElementChild);
+                    }}
+                }}
+                loading = false;
+            }});
+        }}, CONFIG.latency_ms);
+    }}
+
+    scroller.addEventListener('scroll', () => {{
+        if (scroller.scrollTop + scroller.clientHeight >= scroller.scrollHeight - 100) {{
+            loadMore();
+        }}
+    }});
+    loadMore();
+}}
+
+for (const link of document.querySelectorAll('a[data-list]')) {{
+    link.addEventListener('click', (event) => {{
+        event.preventDefault();
+        openDialog(link.dataset.list);
+    }});
+}}
+
+document.addEventListener('keydown', (event) => {{
+    if (event.key === 'Escape') {{
+        document.getElementById('dialog-root').innerHTML = '';
+    }}
+}});
+</script>
+</body></html>
+"""
+
+class FakeInstagramHandler(BaseHTTPRequestHandler):
+    """Request handler; the server's config dict is read from self.server.config"""
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output readable
+
+    def _send_html(self, html, status=200, headers=None):
+        body = html.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _redirect(self, location, headers=None):
+        self.send_response(302)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        parts = [part for part in path.split("/") if part]
+
+        if not parts:
+            # Like Instagram, the home page is only shown to a logged-in session
+            if SESSION_COOKIE in self.headers.get("Cookie", ""):
+                self._send_html(HOME_PAGE)
+            else:
+                self._redirect("/accounts/login/")
+        elif parts[:3] == ["api", "v1", "friendships"] and len(parts) == 5 and parts[4] in ("followers", "following"):
+            self._send_list_page(parts[3], parts[4], parse_qs(urlparse(self.path).query))
+        elif parts[0] == "accounts" and len(parts) > 1 and parts[1] == "login":
+            self._send_html(LOGIN_PAGE)
+        elif parts[0] in ("p", "explore", "stories"):
+            self._send_html("<html><body>Not a profile</body></html>")
+        elif len(parts) >= 2 and parts[1] in ("followers", "following"):
+            # Deep links behave like the profile page
+            self._redirect(f"/{parts[0]}/")
+        elif parts[0] == "favicon.ico":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        else:
+            config = self.server.config
+            username = parts[0]
+            self._send_html(PROFILE_PAGE.format(
+                username=username,
+                username_json=json.dumps(username),
+                posts=config["posts"],
+                followers=f"{config['followers']:,}",
+                following=f"{config['following']:,}",
+                config=json.dumps(config)
+            ))
+
+    def _send_list_page(self, username, list_type, query):
+        """Serve one page of a list; the fake user id is the username and max_id is the row offset"""
+        config = self.server.config
+        total = config[list_type]
+        offset = int(query.get("max_id", ["0"])[0])
+        count = int(query.get("count", [str(config["page_size"])])[0])
+        if config["throttle_after"] is not None and offset >= config["throttle_after"]:
+            count = THROTTLED_PAGE_SIZE
+        end = min(total, offset + count)
+        page = {
+            "users": [{"username": f"{username}_{list_type}_{index:05d}"} for index in range(offset, end)],
+            "status": "ok"
+        }
+        if end < total:
+            page["next_max_id"] = str(end)
+        body = json.dumps(page).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        if urlparse(self.path).path.startswith("/accounts/login"):
+            self._redirect("/", headers={"Set-Cookie": f"{SESSION_COOKIE}; Path=/"})
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+def start_server(port=0, **config):
+    """
+    Start the fixture server on a background thread.
+
+    Args:
+        port: Port to listen on (0 picks a free port)
+        **config: Overrides for DEFAULT_CONFIG
+
+    Returns:
+        (server, base_url) - call server.shutdown() to stop it
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeInstagramHandler)
+    server.config = dict(DEFAULT_CONFIG, **config)
+    thread = threading.Thread(target=server.serve_forever, name="fake-instagram", daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Offline fake Instagram fixture server')
+    parser.add_argument('--port', type=int, default=8800, help='Port to listen on (default: 8800)')
+    parser.add_argument('--followers', type=int, default=DEFAULT_CONFIG["followers"], help='Followers list size')
+    parser.add_argument('--following', type=int, default=DEFAULT_CONFIG["following"], help='Following list size')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_CONFIG["page_size"], help='Rows rendered per load')
+    parser.add_argument('--latency-ms', type=int, default=DEFAULT_CONFIG["latency_ms"], help='Render latency per load in milliseconds')
+    parser.add_argument('--throttle-after', type=int, default=None, help='Render exactly 10 rows per load after this many rows')
+    parser.add_argument('--virtualize', action='store_true', help='Drop old rows from the DOM like a virtualized list')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    server, base_url = start_server(
+        args.port,
+        followers=args.followers,
+        following=args.following,
+        page_size=args.page_size,
+        latency_ms=args.latency_ms,
+        throttle_after=args.throttle_after,
+        virtualize=args.virtualize
+    )
+    print(f"Fake Instagram serving at {base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+"""
+Sparse-matrix PageRank and HITS on the compact graph.
+
+nx.pagerank and nx.hits on the full graph build a NetworkX graph and its
+matrices from Python dicts on every call. Here the transition matrices are
+SciPy CSR matrices built directly on the CompactGraph CSR/CSC arrays, and the
+scores are found by vectorized power iteration with a configurable tolerance.
+PageRank follows the nx.pagerank definition (dangling nodes jump according to
+the personalization vector, convergence when the L1 change is below
+num_nodes * tol), can be personalized to seed accounts and can be warm-started
+from the scores of a previous run, which converges in a few iterations after
+a scraping session added some edges. IncrementalPageRank keeps the scores
+current while the crawl adds edges, with local updates around the new edges
+and periodic full reconvergence.
+
+Usage:
+    python3 graph_analytics.py --seed fretin98
+    python3 graph_analytics.py --top 50 --json rankings.json
+"""
+import os
+import json
+import time
+import argparse
+from collections import deque
+
+import numpy as np
+import scipy.sparse as sp
+
+import compact_graph
+
+DATA_DIR = "instagram_data"
+ADJ_LIST_FILE = "adjList.txt"
+SCORES_FILE = os.path.join(DATA_DIR, "pagerank_scores.npz")
+MY_ACCOUNT = "fretin98"
+
+class ConvergenceError(RuntimeError):
+    """Power iteration did not reach the tolerance within max_iter iterations"""
+
+    def __init__(self, method, max_iter, scores):
+        super().__init__(f"{method} did not converge in {max_iter} iterations")
+        self.scores = scores  # Last iterate, usable as a warm start for another attempt
+
+#%% Matrices and vectors
+def adjacency_matrix(graph):
+    """Return the adjacency matrix (A[u, v] = 1 when u follows v) as a CSR matrix sharing the graph arrays"""
+    n = graph.num_nodes
+    return sp.csr_matrix((np.ones(graph.num_edges), graph.indices, graph.indptr), shape=(n, n))
+
+def transposed_adjacency_matrix(graph):
+    """Return the transposed adjacency matrix as a CSR matrix built on the in-edge (CSC) arrays"""
+    n = graph.num_nodes
+    return sp.csr_matrix((np.ones(graph.num_edges), graph.in_indices, graph.in_indptr), shape=(n, n))
+
+def transition_matrix_transposed(graph):
+    """
+    Return P^T, where P[u, v] = 1 / out_degree(u) for every edge u -> v.
+    A PageRank step is then x_new = P^T x, one sparse matrix-vector product.
+    """
+    n = graph.num_nodes
+    out_degrees = graph.out_degrees().astype(float)
+    weights = 1.0 / out_degrees[graph.in_indices]
+    return sp.csr_matrix((weights, graph.in_indices, graph.in_indptr), shape=(n, n))
+
+def node_vector(graph, values, default=0.0):
+    """
+    Turn {username: value} into a vector indexed by node id.
+
+    Usernames that are not in the graph are ignored and nodes without a value
+    get default.
+    """
+    vector = np.full(graph.num_nodes, default, dtype=float)
+    ids = graph.interner.ids
+    for name, value in values.items():
+        node_id = ids.get(name)
+        if node_id is not None:
+            vector[node_id] = value
+    return vector
+
+def personalization_vector(graph, seeds):
+    """
+    Build a normalized restart distribution.
+
+    Args:
+        seeds: A username, a list of usernames (equal weights) or {username: weight}
+
+    Returns:
+        Vector summing to 1 (ValueError when no seed is in the graph)
+    """
+    if isinstance(seeds, str):
+        seeds = [seeds]
+    if not isinstance(seeds, dict):
+        seeds = {seed: 1.0 for seed in seeds}
+    vector = node_vector(graph, seeds)
+    total = vector.sum()
+    if total <= 0:
+        raise ValueError(f"None of the seed accounts {sorted(seeds)[:5]} are in the graph")
+    return vector / total
+
+def _start_vector(graph, start):
+    """Normalized start vector from None (uniform), a vector or {username: score}"""
+    n = graph.num_nodes
+    if start is None:
+        return np.full(n, 1.0 / n)
+    if isinstance(start, dict):
+        # Nodes new since the previous run start at the mean previous score
+        known = list(start.values())
+        vector = node_vector(graph, start, default=np.mean(known) if known else 1.0 / n)
+    else:
+        vector = np.asarray(start, dtype=float)
+        if vector.shape != (n,):
+            raise ValueError(f"Start vector has {vector.shape[0]} entries for {n} nodes")
+        vector = vector.copy()
+    total = vector.sum()
+    return vector / total if total > 0 else np.full(n, 1.0 / n)
+
+#%% Scores
+def pagerank(graph, alpha=0.85, personalization=None, start=None, tol=1e-6, max_iter=100):
+    """
+    Compute PageRank by power iteration.
+
+    Args:
+        graph: CompactGraph
+        alpha: Damping factor
+        personalization: Optional seeds (see personalization_vector); restarts
+            and dangling nodes jump to them instead of to a uniform node
+        start: Optional warm start, a vector indexed by node id or {username: score}
+        tol: Convergence when the L1 change of an iteration is below num_nodes * tol
+        max_iter: Maximum number of iterations (ConvergenceError when exceeded)
+
+    Returns:
+        Tuple of (scores vector indexed by node id summing to 1, iterations used)
+    """
+    n = graph.num_nodes
+    if n == 0:
+        return np.zeros(0), 0
+
+    transition_t = transition_matrix_transposed(graph)
+    restart = np.full(n, 1.0 / n) if personalization is None else personalization_vector(graph, personalization)
+    dangling = graph.out_degrees() == 0
+    x = _start_vector(graph, start)
+
+    for iteration in range(1, max_iter + 1):
+        previous = x
+        x = alpha * (transition_t @ previous + previous[dangling].sum() * restart) + (1 - alpha) * restart
+        if np.abs(x - previous).sum() < n * tol:
+            return x, iteration
+    raise ConvergenceError("PageRank", max_iter, x)
+
+def personalized_pagerank(graph, seeds=MY_ACCOUNT, alpha=0.85, start=None, tol=1e-6, max_iter=100):
+    """PageRank restarting at the seed accounts (by default your own account)"""
+    return pagerank(graph, alpha=alpha, personalization=seeds, start=start, tol=tol, max_iter=max_iter)
+
+def hits(graph, start=None, tol=1e-8, max_iter=1000):
+    """
+    Compute HITS hub and authority scores by power iteration.
+
+    Args:
+        start: Optional warm start of the hub scores, a vector or {username: score}
+        tol: Convergence when the L1 change of the (max-normalized) hub scores is below num_nodes * tol
+
+    Returns:
+        Tuple of (hubs, authorities, iterations), each score vector summing to 1
+        like nx.hits(normalized=True)
+    """
+    n = graph.num_nodes
+    if n == 0:
+        return np.zeros(0), np.zeros(0), 0
+
+    adjacency = adjacency_matrix(graph)
+    adjacency_t = transposed_adjacency_matrix(graph)
+    hubs = _start_vector(graph, start)
+    hubs /= hubs.max()
+
+    for iteration in range(1, max_iter + 1):
+        previous = hubs
+        authorities = adjacency_t @ previous
+        hubs = adjacency @ authorities
+        peak = hubs.max()
+        if peak <= 0:
+            break
+        hubs /= peak
+        if np.abs(hubs - previous).sum() < n * tol:
+            break
+    else:
+        raise ConvergenceError("HITS", max_iter, hubs)
+
+    authorities = adjacency_t @ hubs
+    hub_total, authority_total = hubs.sum(), authorities.sum()
+    return (hubs / hub_total if hub_total > 0 else hubs,
+            authorities / authority_total if authority_total > 0 else authorities,
+            iteration)
+
+#%% Output
+def top_k(graph, scores, k=20):
+    """Return the k (username, score) pairs with the highest scores, ties by node id"""
+    k = min(k, graph.num_nodes)
+    if k <= 0:
+        return []
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.lexsort((top, -scores[top]))]
+    return [(graph.interner.names[i], float(scores[i])) for i in top]
+
+def scores_to_dict(graph, scores):
+    """Return {username: score} like the NetworkX functions"""
+    return dict(zip(graph.interner.names, scores.tolist()))
+
+def save_scores(graph, scores_by_name, scores_file=SCORES_FILE):
+    """Save named score vectors ({name: vector}) with the usernames, for warm starts of later runs"""
+    os.makedirs(os.path.dirname(scores_file) or ".", exist_ok=True)
+    np.savez_compressed(scores_file, usernames=np.array(graph.interner.names), **scores_by_name)
+
+def load_scores(scores_file=SCORES_FILE):
+    """
+    Load scores saved by save_scores.
+
+    Returns:
+        {name: {username: score}}, empty when the file does not exist
+    """
+    if not os.path.exists(scores_file):
+        return {}
+    with np.load(scores_file) as saved:
+        usernames = saved["usernames"].tolist()
+        return {
+            name: dict(zip(usernames, saved[name].tolist()))
+            for name in saved.files if name != "usernames"
+        }
+
+def ranking_tables(graph, k=20, seed=None, previous=None, tol=1e-6):
+    """
+    Compute the ranking tables of the analysis notebook.
+
+    Args:
+        graph: CompactGraph
+        k: Rows per PageRank/HITS table (the degree tables keep the notebook's 10)
+        seed: Optional account for a personalized PageRank table
+        previous: Optional scores from load_scores used as warm starts
+
+    Returns:
+        Tuple of ({table name: [(account, value)]}, {name: score vector})
+    """
+    previous = previous or {}
+    page_ranks, _ = pagerank(graph, start=previous.get("pagerank"), tol=tol)
+    hubs, authorities, _ = hits(graph, start=previous.get("hubs"))
+
+    tables = {
+        "followers": graph.top_by_degree(10, direction="in"),
+        "following": graph.top_by_degree(10, direction="out"),
+        "pagerank": top_k(graph, page_ranks, k),
+        "hits_hubs": top_k(graph, hubs, k),
+        "hits_authorities": top_k(graph, authorities, k)
+    }
+    scores = {"pagerank": page_ranks, "hubs": hubs, "authorities": authorities}
+
+    if seed is not None:
+        personalized, _ = personalized_pagerank(graph, seed, start=previous.get("personalized_pagerank"), tol=tol)
+        tables["personalized_pagerank"] = top_k(graph, personalized, k)
+        scores["personalized_pagerank"] = personalized
+    return tables, scores
+
+#%% Incremental PageRank
+class IncrementalPageRank:
+    """
+    PageRank kept up to date while the crawl adds edges.
+
+    The scores start from a full power iteration on a CompactGraph. Edges added
+    afterwards are kept in per-node overlay lists and update the scores by
+    residual pushes: a new edge moves part of its follower's score to the new
+    account, and every account whose pending change (residual) exceeds
+    local_tol times the mean score takes it and passes alpha of it on to the
+    accounts it follows. Smaller residuals wait for later pushes, so the work
+    stays around the new edges.
+
+    The teleport and dangling terms add the same amount to every account, and
+    scaling that amount only scales the solution, so pushes keep it fixed at
+    its value from the last full iteration and the normalized scores still
+    converge to the PageRank of the grown graph. reconverge(), a warm-started
+    power iteration on the merged graph, absorbs the residuals left below the
+    threshold and runs automatically once the added edges exceed
+    full_update_fraction of the graph.
+    """
+
+    def __init__(self, graph, scores=None, alpha=0.85, tol=1e-6, local_tol=1e-2,
+                 full_update_fraction=0.05, max_local_updates=200000):
+        """
+        Args:
+            graph: CompactGraph to start from (its interner is extended with new accounts)
+            scores: Optional warm start, a vector or {username: score} (e.g. GraphStore.load_rank_scores)
+            tol: Tolerance of the full power iterations
+            local_tol: Smallest residual pushed, relative to the mean score
+            full_update_fraction: Reconverge once this fraction of the edges was added incrementally
+            max_local_updates: Maximum pushes per add_edges call, the rest waits in the residuals
+        """
+        self.alpha = alpha
+        self.tol = tol
+        self.local_tol = local_tol
+        self.full_update_fraction = full_update_fraction
+        self.max_local_updates = max_local_updates
+        self.interner = graph.interner
+        self.local_updates = 0
+        self._reset(graph, scores)
+
+    @classmethod
+    def from_store(cls, store, **kwargs):
+        """Build the ranking of the edges in a GraphStore, warm-started from its saved scores"""
+        graph = compact_graph.CompactGraph.from_edges(store.iter_edges())
+        return cls(graph, scores=store.load_rank_scores() or None, **kwargs)
+
+    def _reset(self, graph, start):
+        """Make graph the base graph and converge the scores on it"""
+        self.graph = graph
+        # The interner keeps growing, the CSR arrays cover the nodes known when they were built
+        self.base_nodes = len(graph.indptr) - 1
+        self.overlay_out = {}
+        self.overlay_pairs = set()
+        self.added_edges = 0
+        self.out_degrees = graph.out_degrees().astype(np.int64)
+        if self.base_nodes:
+            self.scores, self.iterations = pagerank(graph, self.alpha, start=start, tol=self.tol)
+        else:
+            self.scores, self.iterations = np.zeros(0), 0
+        self.residuals = np.zeros(self.base_nodes)
+        # Uniform term every account receives: teleport plus the spread dangling rank
+        dangling_mass = self.scores[self.out_degrees == 0].sum()
+        self.source = ((1 - self.alpha) + self.alpha * dangling_mass) / max(self.base_nodes, 1)
+
+    @property
+    def num_nodes(self):
+        return len(self.interner)
+
+    @property
+    def num_edges(self):
+        return self.graph.num_edges + self.added_edges
+
+    def _successors(self, node_id):
+        """Ids of the accounts node_id follows in the base graph and the overlay"""
+        base = self.graph.successor_ids(node_id) if node_id < self.base_nodes else np.zeros(0, dtype=np.int32)
+        extra = self.overlay_out.get(node_id)
+        return np.concatenate((base, extra)) if extra else base
+
+    def _has_edge(self, source_id, target_id):
+        if (source_id, target_id) in self.overlay_pairs:
+            return True
+        if source_id >= self.base_nodes or target_id >= self.base_nodes:
+            return False
+        successors = self.graph.successor_ids(source_id)
+        position = np.searchsorted(successors, target_id)
+        return position < len(successors) and successors[position] == target_id
+
+    def _grow(self):
+        """Give accounts interned since the last call the uniform term as initial score"""
+        missing = self.num_nodes - len(self.scores)
+        if missing > 0:
+            self.scores = np.concatenate((self.scores, np.full(missing, self.source)))
+            self.residuals = np.concatenate((self.residuals, np.zeros(missing)))
+            self.out_degrees = np.concatenate((self.out_degrees, np.zeros(missing, dtype=np.int64)))
+
+    def add_edges(self, edges):
+        """
+        Add (follower, followed) edges and update the scores around them.
+
+        Returns:
+            Number of edges that were new
+        """
+        new_edges = 0
+        touched = set()
+        for source, target in edges:
+            source_id = self.interner.intern(source)
+            target_id = self.interner.intern(target)
+            if source_id == target_id or self._has_edge(source_id, target_id):
+                continue
+            self._grow()
+
+            # source now splits alpha * score over one more account
+            degree = self.out_degrees[source_id]
+            share = self.alpha * self.scores[source_id]
+            if degree:
+                successors = self._successors(source_id)
+                self.residuals[successors] -= share / degree - share / (degree + 1)
+                touched.update(successors.tolist())
+            self.residuals[target_id] += share / (degree + 1)
+            touched.add(target_id)
+
+            self.overlay_pairs.add((source_id, target_id))
+            self.overlay_out.setdefault(source_id, []).append(target_id)
+            self.out_degrees[source_id] += 1
+            new_edges += 1
+        self._grow()
+        if not new_edges:
+            return 0
+        self.added_edges += new_edges
+
+        if self.added_edges > self.full_update_fraction * max(self.graph.num_edges, 1):
+            self.reconverge()
+        else:
+            self._propagate(touched)
+        return new_edges
+
+    def _propagate(self, seeds):
+        """
+        Push the residuals above the threshold, starting from the seed nodes.
+
+        Returns:
+            Number of pushes
+        """
+        threshold = self.local_tol / max(self.num_nodes, 1)
+        queue = deque(node_id for node_id in seeds if abs(self.residuals[node_id]) > threshold)
+        queued = set(queue)
+
+        updates = 0
+        while queue and updates < self.max_local_updates:
+            node_id = queue.popleft()
+            queued.discard(node_id)
+            residual = self.residuals[node_id]
+            self.scores[node_id] += residual
+            self.residuals[node_id] = 0.0
+            updates += 1
+
+            degree = self.out_degrees[node_id]
+            if not degree:
+                # Rank of accounts without out-edges is part of the fixed uniform term
+                continue
+            successors = self._successors(node_id)
+            self.residuals[successors] += self.alpha * residual / degree
+            for successor in successors[np.abs(self.residuals[successors]) > threshold].tolist():
+                if successor not in queued:
+                    queued.add(successor)
+                    queue.append(successor)
+        self.local_updates += updates
+        return updates
+
+    def reconverge(self):
+        """
+        Merge the added edges into the base graph and run a warm-started full power iteration.
+
+        Returns:
+            Number of iterations used
+        """
+        self._grow()
+        if self.overlay_pairs or self.base_nodes != self.num_nodes:
+            added = np.array(sorted(self.overlay_pairs), dtype=np.int64).reshape(-1, 2)
+            graph = compact_graph.CompactGraph.from_id_edges(
+                self.interner,
+                np.concatenate((np.repeat(np.arange(self.base_nodes), np.diff(self.graph.indptr)), added[:, 0])),
+                np.concatenate((self.graph.indices.astype(np.int64), added[:, 1]))
+            )
+        else:
+            graph = self.graph
+        self._reset(graph, self.scores + self.residuals)
+        return self.iterations
+
+    def normalized_scores(self):
+        """Current scores as a vector indexed by node id summing to 1"""
+        total = self.scores.sum()
+        return self.scores / total if total > 0 else self.scores
+
+    def top_k(self, k=20):
+        """The k accounts with the highest current scores as (username, score) pairs"""
+        return top_k(self, self.normalized_scores(), k)
+
+    def save(self, store):
+        """Store the current scores in a GraphStore (GraphStore.top_ranked reads them back)"""
+        store.save_rank_scores(zip(self.interner.names, self.normalized_scores().tolist()))
+
+#%% Parse command line arguments
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='PageRank and HITS rankings of the scraped network')
+    parser.add_argument('--adj-list', default=ADJ_LIST_FILE, help=f'Adjacency list to load (default: {ADJ_LIST_FILE})')
+    parser.add_argument('--top', type=int, default=20, help='Accounts per ranking (default: 20)')
+    parser.add_argument('--seed', default=None, help='Also rank by PageRank personalized to this account')
+    parser.add_argument('--tol', type=float, default=1e-6, help='PageRank tolerance per node (default: 1e-6)')
+    parser.add_argument('--scores', default=SCORES_FILE, help=f'Score file used for warm starts (default: {SCORES_FILE})')
+    parser.add_argument('--cold-start', action='store_true', help='Ignore the saved scores')
+    parser.add_argument('--json', default=None, help='Also write the ranking tables to this JSON file')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    start = time.time()
+    graph = compact_graph.load_compact_graph(args.adj_list)
+    print(f"Loaded {graph.num_nodes} nodes and {graph.num_edges} edges in {time.time() - start:.2f}s")
+
+    start = time.time()
+    previous = {} if args.cold_start else load_scores(args.scores)
+    tables, scores = ranking_tables(graph, k=args.top, seed=args.seed, previous=previous, tol=args.tol)
+    print(f"Computed rankings in {time.time() - start:.2f}s{' (warm start)' if previous else ''}")
+    # Keep the saved scores of rankings not computed this time (e.g. another --seed)
+    for name, values in previous.items():
+        scores.setdefault(name, node_vector(graph, values))
+    save_scores(graph, scores, args.scores)
+
+    for name, rows in tables.items():
+        print(f"\n{name}")
+        for rank, (account, value) in enumerate(rows, 1):
+            print(f"{rank:>3}. {account:<32} {value:.6g}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(tables, f, indent=2)
+        print(f"\nRankings saved to {args.json}")
@@ -0,0 +1,639 @@
+"""
+Embedded SQLite store for the scraped Instagram graph.
+
+Holds the edge list, the per-account scraping progress, the crawl queue, the
+set of accounts ever queued (the BFS visited set), a cache of profile
+follower/following counts, the scrapes suspended by a rate limit and the
+latest PageRank scores in a single database file (instagram_data/graph.db)
+so that inserts, "already processed?" checks and neighbor lookups are
+indexed operations instead of whole-file scans. adjList.txt,
+scraping_progress.json and followingLinks.txt remain the interchange
+formats: the import/export adapters below convert between them and the
+store.
+"""
+import os
+import json
+import time
+import sqlite3
+from contextlib import contextmanager
+
+DATA_DIR = "instagram_data"
+DB_FILE = os.path.join(DATA_DIR, "graph.db")
+INSERT_BATCH_SIZE = 5000  # Rows per executemany call when importing files
+PROFILE_STATS_TTL = 24 * 3600  # Seconds cached profile counts are trusted instead of reloading the profile
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS edges (
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    UNIQUE (source, target)
+);
+CREATE INDEX IF NOT EXISTS idx_edges_source ON edges (source);
+CREATE INDEX IF NOT EXISTS idx_edges_target ON edges (target);
+
+CREATE TABLE IF NOT EXISTS progress (
+    username TEXT PRIMARY KEY,
+    processed INTEGER NOT NULL DEFAULT 0,
+    skipped INTEGER NOT NULL DEFAULT 0,
+    rate_limited INTEGER NOT NULL DEFAULT 0,
+    followers_count INTEGER,
+    following_count INTEGER,
+    timestamp REAL,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS crawl_queue (
+    link TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    added_at REAL NOT NULL,
+    depth INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_crawl_queue_position ON crawl_queue (position);
+
+CREATE TABLE IF NOT EXISTS visited (
+    username TEXT PRIMARY KEY,
+    depth INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_visited_depth ON visited (depth);
+
+CREATE TABLE IF NOT EXISTS profile_stats (
+    username TEXT PRIMARY KEY,
+    followers INTEGER NOT NULL,
+    following INTEGER NOT NULL,
+    posts INTEGER,
+    fetched_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS suspended_jobs (
+    link TEXT PRIMARY KEY,
+    list_type TEXT NOT NULL,
+    collected INTEGER NOT NULL,
+    resume_at REAL NOT NULL,
+    suspended_at REAL NOT NULL,
+    cursor TEXT
+);
+
+CREATE TABLE IF NOT EXISTS rank_scores (
+    username TEXT PRIMARY KEY,
+    score REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+def username_from_link(link):
+    """Extract the username from an Instagram profile link"""
+    return link.strip().rstrip('/').split('/')[-1].strip()
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+class GraphStore:
+    """SQLite-backed edge, progress and crawl-queue store (WAL mode)"""
+
+    def __init__(self, db_path=DB_FILE):
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._add_missing_column("crawl_queue", "depth", "INTEGER NOT NULL DEFAULT 1")
+        self._add_missing_column("suspended_jobs", "cursor", "TEXT")
+        self.conn.executescript(SCHEMA)
+        self._seed_visited()
+        self._drop_follower_seeds()
+        self.conn.commit()
+
+    def _add_missing_column(self, table, column, definition):
+        """Add a column introduced after the table was created (no-op for new or current tables)"""
+        columns = [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]
+        if columns and column not in columns:
+            self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    def _seed_visited(self):
+        """Fill an empty visited set with the queued and scraped accounts (depth 1 for the scraped ones)"""
+        if self.conn.execute("SELECT 1 FROM visited LIMIT 1").fetchone() is not None:
+            return
+        # Edge sources are not seeded: followers of a scraped account are sources without being scraped
+        self.conn.execute(
+            "INSERT OR IGNORE INTO visited (username, depth) "
+            "SELECT username, depth FROM crawl_queue "
+            "UNION ALL SELECT username, 1 FROM progress"
+        )
+
+    def _drop_follower_seeds(self):
+        """
+        Remove the depth-1 visited entries of accounts neither queued nor scraped,
+        left by stores that seeded the visited set from every edge source
+        """
+        self.conn.execute(
+            "DELETE FROM visited WHERE depth = 1 "
+            "AND NOT EXISTS (SELECT 1 FROM crawl_queue WHERE crawl_queue.username = visited.username) "
+            "AND NOT EXISTS (SELECT 1 FROM progress WHERE progress.username = visited.username)"
+        )
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @contextmanager
+    def transaction(self):
+        """Group several writes into one transaction (committed on success)"""
+        try:
+            yield self.conn
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    #%% Edges
+    def add_edges(self, edges):
+        """
+        Insert edges in a single transaction, ignoring ones already stored.
+
+        Args:
+            edges: Iterable of (source, target) pairs
+
+        Returns:
+            List of the (source, target) pairs that were not stored before
+        """
+        inserted = []
+        with self.transaction() as conn:
+            for source, target in edges:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO edges (source, target) VALUES (?, ?)", (source, target)
+                )
+                if cursor.rowcount > 0:
+                    inserted.append((source, target))
+        return inserted
+
+    def has_edge(self, source, target):
+        row = self.conn.execute(
+            "SELECT 1 FROM edges WHERE source = ? AND target = ?", (source, target)
+        ).fetchone()
+        return row is not None
+
+    def has_out_edges(self, username):
+        """True if the account follows anyone in the stored graph"""
+        row = self.conn.execute("SELECT 1 FROM edges WHERE source = ? LIMIT 1", (username,)).fetchone()
+        return row is not None
+
+    def out_neighbors(self, username):
+        """Accounts followed by username"""
+        rows = self.conn.execute("SELECT target FROM edges WHERE source = ?", (username,))
+        return [row[0] for row in rows]
+
+    def in_neighbors(self, username):
+        """Accounts following username"""
+        rows = self.conn.execute("SELECT source FROM edges WHERE target = ?", (username,))
+        return [row[0] for row in rows]
+
+    def out_degree(self, username):
+        return self.conn.execute("SELECT COUNT(*) FROM edges WHERE source = ?", (username,)).fetchone()[0]
+
+    def in_degree(self, username):
+        return self.conn.execute("SELECT COUNT(*) FROM edges WHERE target = ?", (username,)).fetchone()[0]
+
+    def edge_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+
+    def iter_edges(self):
+        """Yield all edges ordered by (source, target)"""
+        for row in self.conn.execute("SELECT source, target FROM edges ORDER BY source, target"):
+            yield row[0], row[1]
+
+    #%% Progress
+    def set_progress(self, username, record):
+        """Store the progress record of an account (same shape as scraping_progress.json entries)"""
+        self._upsert_progress(self.conn, username, record)
+        self.conn.commit()
+
+    def _upsert_progress(self, conn, username, record):
+        conn.execute(
+            "INSERT OR REPLACE INTO progress "
+            "(username, processed, skipped, rate_limited, followers_count, following_count, timestamp, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                username,
+                int(bool(record.get("processed", False))),
+                int(bool(record.get("skipped", False))),
+                int(bool(record.get("rate_limited", False))),
+                record.get("followers_count"),
+                record.get("following_count"),
+                record.get("timestamp", time.time()),
+                json.dumps(record)
+            )
+        )
+
+    def get_progress(self, username):
+        """Return the progress record of an account, or None if it was never scraped"""
+        row = self.conn.execute("SELECT data FROM progress WHERE username = ?", (username,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def is_processed(self, username):
+        """True if the account has a progress record that is not flagged as rate-limited"""
+        row = self.conn.execute(
+            "SELECT rate_limited FROM progress WHERE username = ?", (username,)
+        ).fetchone()
+        return row is not None and not row[0]
+
+    def progress_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM progress").fetchone()[0]
+
+    def all_progress(self):
+        """Return every progress record as a dict keyed by username"""
+        rows = self.conn.execute("SELECT username, data FROM progress ORDER BY timestamp")
+        return {username: json.loads(data) for username, data in rows}
+
+    #%% Profile stats cache
+    def save_profile_stats(self, username, followers, following, posts=None, fetched_at=None):
+        """Cache the counts read from a profile page"""
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO profile_stats (username, followers, following, posts, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (username, followers, following, posts, fetched_at or time.time())
+            )
+
+    def get_cached_profile_stats(self, username, max_age=PROFILE_STATS_TTL):
+        """
+        Return the cached counts of a profile if they are recent enough.
+
+        Args:
+            username: Instagram username
+            max_age: Maximum age in seconds (None accepts any age, 0 never uses the cache)
+
+        Returns:
+            Dictionary with keys 'followers', 'following', 'posts' and 'fetched_at', or None
+        """
+        row = self.conn.execute(
+            "SELECT followers, following, posts, fetched_at FROM profile_stats WHERE username = ?", (username,)
+        ).fetchone()
+        if row is None:
+            return None
+        followers, following, posts, fetched_at = row
+        if max_age is not None and time.time() - fetched_at >= max_age:
+            return None
+        return {"followers": followers, "following": following, "posts": posts, "fetched_at": fetched_at}
+
+    def prune_profile_stats(self, max_age=PROFILE_STATS_TTL):
+        """Delete cached counts older than max_age seconds. Returns the number deleted"""
+        with self.transaction() as conn:
+            cursor = conn.execute("DELETE FROM profile_stats WHERE fetched_at < ?", (time.time() - max_age,))
+        return cursor.rowcount
+
+    #%% Suspended scrapes
+    def suspend_job(self, link, list_type, collected, resume_at, cursor=None):
+        """Record a scrape interrupted by a rate limit, to be resumed after resume_at (from cursor if given)"""
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO suspended_jobs (link, list_type, collected, resume_at, suspended_at, cursor) VALUES (?, ?, ?, ?, ?, ?)",
+                (link.strip(), list_type, collected, resume_at, time.time(), json.dumps(cursor) if cursor else None)
+            )
+
+    def suspended_jobs(self):
+        """Return the suspended scrapes as dictionaries, earliest resume time first"""
+        rows = self.conn.execute(
+            "SELECT link, list_type, collected, resume_at, suspended_at, cursor FROM suspended_jobs ORDER BY resume_at"
+        )
+        return [
+            {
+                "link": link, "list_type": list_type, "collected": collected, "resume_at": resume_at,
+                "suspended_at": suspended_at, "cursor": json.loads(cursor) if cursor else None
+            }
+            for link, list_type, collected, resume_at, suspended_at, cursor in rows
+        ]
+
+    def resume_time(self):
+        """Time the latest rate limit back-off ends, or None if no scrape is suspended"""
+        return self.conn.execute("SELECT MAX(resume_at) FROM suspended_jobs").fetchone()[0]
+
+    def clear_suspended_job(self, link):
+        """Forget a suspended scrape once it has been resumed"""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM suspended_jobs WHERE link = ?", (link.strip(),))
+
+    def clear_unqueued_suspended_jobs(self):
+        """Forget suspended scrapes whose link is not in the crawl queue. Returns the number cleared"""
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "DELETE FROM suspended_jobs WHERE NOT EXISTS "
+                "(SELECT 1 FROM crawl_queue WHERE crawl_queue.link = suspended_jobs.link)"
+            )
+        return cursor.rowcount
+
+    #%% PageRank scores
+    def save_rank_scores(self, scores):
+        """Replace the stored PageRank scores with (username, score) pairs"""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM rank_scores")
+            for batch in _batched(scores, INSERT_BATCH_SIZE):
+                conn.executemany("INSERT OR REPLACE INTO rank_scores (username, score) VALUES (?, ?)", batch)
+
+    def load_rank_scores(self):
+        """Return the stored PageRank scores as {username: score}"""
+        return dict(self.conn.execute("SELECT username, score FROM rank_scores"))
+
+    def top_ranked(self, limit=20):
+        """Return the (username, score) pairs with the highest stored PageRank scores"""
+        return self.conn.execute(
+            "SELECT username, score FROM rank_scores ORDER BY score DESC, username LIMIT ?", (limit,)
+        ).fetchall()
+
+    #%% Crawl queue
+    def enqueue_links(self, links, depth=1):
+        """
+        Append links to the tail of the crawl queue, ignoring ones already queued.
+
+        The accounts are also marked visited at the given depth (or keep the
+        lower depth they were first found at).
+
+        Returns:
+            Number of links added
+        """
+        added = 0
+        with self.transaction() as conn:
+            position = conn.execute("SELECT COALESCE(MAX(position), 0) FROM crawl_queue").fetchone()[0]
+            now = time.time()
+            for link in links:
+                link = str(link).strip()
+                if not link:
+                    continue
+                username = username_from_link(link)
+                conn.execute(
+                    "INSERT INTO visited (username, depth) VALUES (?, ?) "
+                    "ON CONFLICT (username) DO UPDATE SET depth = MIN(depth, excluded.depth)",
+                    (username, depth)
+                )
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO crawl_queue (link, username, position, added_at, depth) VALUES (?, ?, ?, ?, ?)",
+                    (link, username, position + 1, now, depth)
+                )
+                if cursor.rowcount > 0:
+                    position += 1
+                    added += 1
+        return added
+
+    def enqueue_frontier(self, links, depth, quota=None):
+        """
+        Append newly discovered accounts to the tail of the crawl queue.
+
+        Unlike enqueue_links, accounts that were ever queued before (at any
+        depth) are ignored, so every account is crawled at most once.
+
+        Args:
+            links: Profile links of the discovered accounts
+            depth: Number of hops from the scraped user's own account
+            quota: Maximum number of accounts ever queued at this depth (None for no limit)
+
+        Returns:
+            Number of links added
+        """
+        added = 0
+        with self.transaction() as conn:
+            position = conn.execute("SELECT COALESCE(MAX(position), 0) FROM crawl_queue").fetchone()[0]
+            depth_count = conn.execute("SELECT COUNT(*) FROM visited WHERE depth = ?", (depth,)).fetchone()[0]
+            now = time.time()
+            for link in links:
+                if quota is not None and depth_count >= quota:
+                    break
+                link = str(link).strip()
+                if not link:
+                    continue
+                username = username_from_link(link)
+                cursor = conn.execute("INSERT OR IGNORE INTO visited (username, depth) VALUES (?, ?)", (username, depth))
+                if cursor.rowcount == 0:
+                    continue
+                depth_count += 1
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO crawl_queue (link, username, position, added_at, depth) VALUES (?, ?, ?, ?, ?)",
+                    (link, username, position + 1, now, depth)
+                )
+                if cursor.rowcount > 0:
+                    position += 1
+                    added += 1
+        return added
+
+    def mark_visited(self, usernames, depth=0):
+        """Record accounts that must never be queued by enqueue_frontier (e.g. the crawl's own account at depth 0)"""
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO visited (username, depth) VALUES (?, ?) "
+                "ON CONFLICT (username) DO UPDATE SET depth = MIN(depth, excluded.depth)",
+                [(username, depth) for username in usernames]
+            )
+
+    def link_depth(self, link):
+        """Depth a queued link was discovered at, or None if it is not queued"""
+        row = self.conn.execute("SELECT depth FROM crawl_queue WHERE link = ?", (link.strip(),)).fetchone()
+        return row[0] if row else None
+
+    def visited_count(self, depth=None):
+        """Number of accounts ever queued, optionally only the ones at the given depth"""
+        if depth is None:
+            return self.conn.execute("SELECT COUNT(*) FROM visited").fetchone()[0]
+        return self.conn.execute("SELECT COUNT(*) FROM visited WHERE depth = ?", (depth,)).fetchone()[0]
+
+    def queued_links(self):
+        """Return queued links in queue order"""
+        rows = self.conn.execute("SELECT link FROM crawl_queue ORDER BY position")
+        return [row[0] for row in rows]
+
+    def peek_links(self, limit=1):
+        """Return up to limit links from the head of the queue without removing them"""
+        rows = self.conn.execute("SELECT link FROM crawl_queue ORDER BY position LIMIT ?", (limit,))
+        return [row[0] for row in rows]
+
+    def dequeue_link(self):
+        """
+        Return the link at the head of the queue, or None if the queue is empty.
+
+        The link stays queued until ack_link or requeue_link is called, so a
+        session that crashes while scraping it retries it next time.
+        """
+        links = self.peek_links(1)
+        return links[0] if links else None
+
+    def ack_link(self, link):
+        """Remove a finished link from the queue. Returns True if it was queued"""
+        with self.transaction() as conn:
+            cursor = conn.execute("DELETE FROM crawl_queue WHERE link = ?", (link.strip(),))
+        return cursor.rowcount > 0
+
+    def remove_links(self, links):
+        """Remove several links from the queue in one transaction. Returns the number removed"""
+        removed = 0
+        with self.transaction() as conn:
+            for batch in _batched((link.strip() for link in links), 500):
+                placeholders = ",".join("?" * len(batch))
+                removed += conn.execute(f"DELETE FROM crawl_queue WHERE link IN ({placeholders})", batch).rowcount
+        return removed
+
+    def remove_processed_links(self):
+        """
+        Remove queued links whose account is processed (see is_processed), except
+        suspended scrapes. Returns the number removed
+        """
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "DELETE FROM crawl_queue WHERE EXISTS (SELECT 1 FROM progress WHERE progress.username = crawl_queue.username AND progress.rate_limited = 0) "
+                "AND NOT EXISTS (SELECT 1 FROM suspended_jobs WHERE suspended_jobs.link = crawl_queue.link)"
+            )
+        return cursor.rowcount
+
+    def requeue_link(self, link):
+        """Move a link to the tail of the queue (e.g. after a failed attempt). Returns True if it was queued"""
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE crawl_queue SET position = (SELECT COALESCE(MAX(position), 0) + 1 FROM crawl_queue) WHERE link = ?",
+                (link.strip(),)
+            )
+        return cursor.rowcount > 0
+
+    def move_links_to_front(self, links):
+        """Move queued links to the head of the queue, keeping their given order"""
+        links = [link.strip() for link in links]
+        if not links:
+            return
+        with self.transaction() as conn:
+            head = conn.execute("SELECT COALESCE(MIN(position), 0) FROM crawl_queue").fetchone()[0]
+            start = head - len(links)
+            conn.executemany(
+                "UPDATE crawl_queue SET position = ? WHERE link = ?",
+                [(start + offset, link) for offset, link in enumerate(links)]
+            )
+
+    def queue_size(self):
+        return self.conn.execute("SELECT COUNT(*) FROM crawl_queue").fetchone()[0]
+
+    def queue_candidates(self):
+        """
+        Yield every queued link in queue order with what the store knows about
+        its account: progress (or cached profile) counts, rate-limit flag, the
+        edges already held and its stored PageRank score (None if unranked).
+        """
+        rows = self.conn.execute(
+            "SELECT q.link, q.username, COALESCE(p.followers_count, s.followers), COALESCE(p.following_count, s.following), "
+            "p.rate_limited, p.skipped, p.timestamp, q.depth, "
+            "(SELECT COUNT(*) FROM edges WHERE edges.target = q.username), "
+            "(SELECT COUNT(*) FROM edges WHERE edges.source = q.username), r.score "
+            "FROM crawl_queue q LEFT JOIN progress p ON p.username = q.username "
+            "LEFT JOIN profile_stats s ON s.username = q.username "
+            "LEFT JOIN rank_scores r ON r.username = q.username "
+            "ORDER BY q.position"
+        )
+        for link, username, followers, following, rate_limited, skipped, timestamp, depth, in_degree, out_degree, rank_score in rows:
+            yield {
+                "link": link,
+                "username": username,
+                "followers_count": followers,
+                "following_count": following,
+                "rate_limited": bool(rate_limited),
+                "skipped": bool(skipped),
+                "timestamp": timestamp,
+                "depth": depth,
+                "in_degree": in_degree,
+                "out_degree": out_degree,
+                "rank_score": rank_score
+            }
+
+    #%% Import/export adapters
+    def import_adj_list(self, adj_list_file):
+        """
+        Load relations from an adjacency list file ("follower followed" per line).
+
+        Returns:
+            Number of edges that were not stored before
+        """
+        if not os.path.exists(adj_list_file):
+            return 0
+
+        def _edges():
+            with open(adj_list_file, "r") as adj_file:
+                for line in adj_file:
+                    parts = line.split()
+                    # Lines may list several followed accounts (networkx adjlist format)
+                    for followed in parts[1:]:
+                        yield parts[0], followed
+
+        before = self.edge_count()
+        with self.transaction() as conn:
+            for batch in _batched(_edges(), INSERT_BATCH_SIZE):
+                conn.executemany("INSERT OR IGNORE INTO edges (source, target) VALUES (?, ?)", batch)
+        return self.edge_count() - before
+
+    def export_adj_list(self, adj_list_file):
+        """
+        Write all edges as a sorted adjacency list file, one relation per line.
+
+        Returns:
+            Number of relations written
+        """
+        count = 0
+        tmp_path = adj_list_file + ".tmp"
+        with open(tmp_path, "w") as adj_file:
+            for source, target in self.iter_edges():
+                adj_file.write(f"{source} {target}\n")
+                count += 1
+        os.replace(tmp_path, adj_list_file)
+        return count
+
+    def import_progress_json(self, progress_file):
+        """Load records from scraping_progress.json. Returns number of records imported"""
+        if not os.path.exists(progress_file):
+            return 0
+        with open(progress_file, "r") as f:
+            progress_data = json.load(f)
+        with self.transaction() as conn:
+            for username, record in progress_data.items():
+                self._upsert_progress(conn, username, record)
+        return len(progress_data)
+
+    def export_progress_json(self, progress_file):
+        """Write all progress records in the scraping_progress.json format"""
+        progress_data = self.all_progress()
+        with open(progress_file, "w") as f:
+            json.dump(progress_data, f, indent=2)
+        return len(progress_data)
+
+    def import_links_file(self, links_file):
+        """Append the links from followingLinks.txt to the crawl queue"""
+        if not os.path.exists(links_file):
+            return 0
+        with open(links_file, "r") as links_h:
+            return self.enqueue_links(links_h)
+
+    def export_links_file(self, links_file):
+        """Write the crawl queue in the followingLinks.txt format (one link per line)"""
+        links = self.queued_links()
+        with open(links_file, "w") as links_h:
+            links_h.writelines([f"{link}\n" for link in links])
+        return len(links)
+
+    def bootstrap_from_files(self, adj_list_file=None, progress_file=None, links_file=None):
+        """Import the plain files into empty tables (first run after switching to the store)"""
+        if adj_list_file and self.edge_count() == 0:
+            imported = self.import_adj_list(adj_list_file)
+            if imported:
+                print(f"Imported {imported} relationships from {adj_list_file} into {self.db_path}")
+        if progress_file and self.progress_count() == 0:
+            imported = self.import_progress_json(progress_file)
+            if imported:
+                print(f"Imported {imported} progress records from {progress_file} into {self.db_path}")
+        if links_file and self.queue_size() == 0:
+            imported = self.import_links_file(links_file)
+            if imported:
+                print(f"Imported {imported} links from {links_file} into {self.db_path}")
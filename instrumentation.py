@@ -0,0 +1,171 @@
+"""
+Per-call timing of the scraping pipeline.
+
+Functions decorated with @timed, the pages of the followers/following lists and
+the rate limit waits record how long each call took and how many users it
+produced. At the end of a session save_session_report writes the samples, the
+counters and a p50/p95 summary per step to a JSON file and prints the summary
+as a table. Nothing is recorded until enable() is called; while disabled a
+timed call costs one flag check.
+"""
+import os
+import json
+import time
+import datetime
+import functools
+
+import adaptive_wait
+
+DATA_DIR = "instagram_data"
+PROFILE_REPORT_DIR = os.path.join(DATA_DIR, "profiles")
+
+_enabled = False
+_session_started = None
+# step name -> list of [seconds, users, succeeded]
+_calls = {}
+# counter name -> accumulated amount
+_counters = {}
+
+def enable():
+    """Start recording calls (the session starts now unless it already started)"""
+    global _enabled, _session_started
+    _enabled = True
+    if _session_started is None:
+        _session_started = time.time()
+
+def disable():
+    """Stop recording calls; the samples recorded so far are kept"""
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def record_call(step, seconds, users=0, succeeded=True):
+    """Record one call of a step"""
+    _calls.setdefault(step, []).append([round(seconds, 4), users or 0, bool(succeeded)])
+
+def start_timer():
+    """Start timing a block of code; returns None while instrumentation is disabled"""
+    return time.monotonic() if _enabled else None
+
+def stop_timer(step, started, users=0, succeeded=True):
+    """Record the block started with start_timer() as one call of a step"""
+    if started is not None:
+        record_call(step, time.monotonic() - started, users, succeeded)
+
+def count(name, amount=1):
+    """Add to a session counter"""
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + amount
+
+def timed(step, users=None):
+    """
+    Decorator recording the duration of every call of a function.
+
+    Args:
+        step: Name the calls are recorded under
+        users: Optional callable turning the return value into the number of users produced
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+
+            started = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                record_call(step, time.monotonic() - started, 0, False)
+                raise
+
+            produced = 0
+            if users is not None and result is not None:
+                try:
+                    produced = users(result)
+                except Exception:
+                    pass
+            record_call(step, time.monotonic() - started, produced)
+            return result
+        return wrapper
+    return decorator
+
+def summarize(calls_by_step):
+    """Return count, failures, total/p50/p95/max seconds, users and users/sec for each step"""
+    summary = {}
+    for step, samples in calls_by_step.items():
+        latencies = sorted(sample[0] for sample in samples)
+        total_seconds = sum(latencies)
+        users = sum(sample[1] for sample in samples)
+        summary[step] = {
+            "count": len(samples),
+            "failures": sum(1 for sample in samples if not sample[2]),
+            "total_seconds": round(total_seconds, 3),
+            "p50": adaptive_wait.percentile(latencies, 0.5),
+            "p95": adaptive_wait.percentile(latencies, 0.95),
+            "max": latencies[-1] if latencies else None,
+            "users": users,
+            "users_per_sec": round(users / total_seconds, 2) if users and total_seconds > 0 else None
+        }
+    return summary
+
+def session_report():
+    """Report of the calls, counters and condition waits recorded in this session"""
+    return {
+        "started": _session_started,
+        "finished": time.time(),
+        "summary": summarize(_calls),
+        "counters": dict(_counters),
+        "waits": adaptive_wait.latency_summary(),
+        "samples": {step: list(samples) for step, samples in _calls.items()}
+    }
+
+def print_summary(summary):
+    """Print a step summary as a table, slowest total first"""
+    header = f"{'step':<32} {'calls':>6} {'fail':>5} {'total s':>9} {'p50 s':>8} {'p95 s':>8} {'users':>7} {'users/s':>8}"
+    print(header)
+    print("-" * len(header))
+    for step, stats in sorted(summary.items(), key=lambda item: -item[1]["total_seconds"]):
+        users_per_sec = stats["users_per_sec"] if stats["users_per_sec"] is not None else "-"
+        print(
+            f"{step:<32} {stats['count']:>6} {stats['failures']:>5} {stats['total_seconds']:>9} "
+            f"{stats['p50']:>8} {stats['p95']:>8} {stats['users']:>7} {users_per_sec:>8}"
+        )
+
+def save_session_report(report_dir=PROFILE_REPORT_DIR, label="session"):
+    """
+    Write the report of the current session to a new JSON file, print its
+    summary and start a new session.
+
+    Must be called before adaptive_wait.save_latency_report, which clears the
+    condition waits included in the report.
+
+    Returns:
+        Path of the report file, or None when instrumentation is disabled
+    """
+    global _session_started
+    if not _enabled:
+        return None
+
+    report = session_report()
+    os.makedirs(report_dir, exist_ok=True)
+    stamp = datetime.datetime.fromtimestamp(report["finished"]).strftime("%Y%m%d_%H%M%S")
+    report_file = os.path.join(report_dir, f"{label}_{stamp}.json")
+    suffix = 1
+    while os.path.exists(report_file):
+        suffix += 1
+        report_file = os.path.join(report_dir, f"{label}_{stamp}_{suffix}.json")
+
+    with open(report_file, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\nSession profile ({report['finished'] - (report['started'] or report['finished']):.0f}s) saved to {report_file}")
+    print_summary(report["summary"])
+    for name, amount in sorted(report["counters"].items()):
+        print(f"  {name}: {round(amount, 3)}")
+
+    _calls.clear()
+    _counters.clear()
+    _session_started = time.time()
+    return report_file
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Link prediction scores on the compact graph from sparse matrix products.
+
+The notebook scores candidate follows with nx.jaccard_coefficient and
+nx.preferential_attachment over explicit lists of unconnected pairs, which
+are built with a list scan per candidate and scored pair by pair in Python.
+Here the graph is taken as undirected (like G.to_undirected() in the notebook)
+and, for a batch of source accounts, the common neighbors with every other
+account are one sparse product of their adjacency rows with the adjacency
+matrix. Jaccard and Adamic-Adar are derived from the same product, and
+preferential attachment from the degrees alone. Accounts already connected to
+the source are dropped and the k best of each source are selected with a
+heap. Scores follow the networkx definitions:
+    - common_neighbors: |N(u) & N(v)|
+    - jaccard: |N(u) & N(v)| / |N(u) | N(v)|
+    - adamic_adar: sum of 1 / log(degree(w)) over the common neighbors w
+    - preferential_attachment: degree(u) * degree(v)
+Only accounts with a positive score are candidates, so for the first three
+these are the accounts two hops away.
+
+Usage:
+    python3 link_prediction.py --source fretin98 --method jaccard
+    python3 link_prediction.py --sources-file accounts.txt --method all --top 10 --json predictions.json
+"""
+import json
+import time
+import heapq
+import argparse
+
+import numpy as np
+import scipy.sparse as sp
+
+import compact_graph
+
+ADJ_LIST_FILE = "adjList.txt"
+MY_ACCOUNT = "fretin98"
+METHODS = ("common_neighbors", "jaccard", "adamic_adar", "preferential_attachment")
+DEFAULT_BATCH_SIZE = 1024  # Source accounts per sparse product
+
+#%% Matrices
+def undirected_adjacency(graph):
+    """0/1 CSR matrix of the undirected graph without self-loops"""
+    n = graph.num_nodes
+    sources = graph.edge_sources()
+    targets = graph.indices
+    keep = sources != targets
+    adjacency = sp.csr_matrix(
+        (np.ones(int(keep.sum())), (sources[keep], targets[keep])), shape=(n, n)
+    )
+    adjacency = (adjacency + adjacency.T).tocsr()
+    adjacency.data[:] = 1.0
+    return adjacency
+
+def _node_ids(graph, accounts):
+    """Ids of the accounts in the graph, in the given order (ValueError when none is)"""
+    if isinstance(accounts, str):
+        accounts = [accounts]
+    ids = [graph.interner.get(account) for account in accounts]
+    ids = np.array([node_id for node_id in ids if node_id is not None], dtype=np.int64)
+    if not len(ids):
+        raise ValueError(f"None of the source accounts {list(accounts)[:5]} are in the graph")
+    return ids
+
+def neighbor_scores(adjacency, sources, method="jaccard", degrees=None):
+    """
+    Scores of a batch of source nodes against every node sharing a neighbor with them.
+
+    Args:
+        adjacency: Matrix from undirected_adjacency
+        sources: Array of source node ids
+        method: 'common_neighbors', 'jaccard' or 'adamic_adar'
+        degrees: Optional degree array of adjacency (computed when not given)
+
+    Returns:
+        CSR matrix with a row per source; sources themselves and their neighbors have no entry
+    """
+    if degrees is None:
+        degrees = np.diff(adjacency.indptr)
+    rows = adjacency[sources]
+    if method == "adamic_adar":
+        # A common neighbor has degree >= 2, so the logarithm is positive
+        weights = np.zeros(len(degrees))
+        weights[degrees > 1] = 1.0 / np.log(degrees[degrees > 1])
+        products = rows @ sp.diags(weights) @ adjacency
+    elif method in ("common_neighbors", "jaccard"):
+        products = rows @ adjacency
+    else:
+        raise ValueError(f"Unknown method {method!r}, expected one of {METHODS[:3]}")
+
+    # Subtracting the entries at the sources' neighbors leaves exact zeros there
+    products = (products - products.multiply(rows)).tocoo()
+    row, col, value = products.row, products.col, products.data
+    keep = (col != sources[row]) & (value != 0)
+    row, col, value = row[keep], col[keep], value[keep]
+    if method == "jaccard":
+        value = value / (degrees[sources[row]] + degrees[col] - value)
+    return sp.csr_matrix((value, (row, col)), shape=products.shape)
+
+#%% Top-k selection
+def _top_k_rows(matrix, k):
+    """Heap selection of the k largest entries of every row as (node id, score) lists (ties by node id)"""
+    results = []
+    for i in range(matrix.shape[0]):
+        start, end = matrix.indptr[i], matrix.indptr[i + 1]
+        best = heapq.nlargest(k, zip(matrix.data[start:end].tolist(), (-matrix.indices[start:end]).tolist()))
+        results.append([(-negative_id, score) for score, negative_id in best])
+    return results
+
+def _top_k_preferential_attachment(adjacency, sources, k, degrees):
+    """k highest-degree nodes not connected to each source, scored degree(source) * degree(node)"""
+    by_degree = np.argsort(-degrees, kind="stable")
+    by_degree = by_degree[degrees[by_degree] > 0]
+    results = []
+    for source in sources.tolist():
+        if degrees[source] == 0:
+            results.append([])
+            continue
+        # At most degree + 1 of the highest-degree nodes are excluded
+        head = by_degree[:k + degrees[source] + 1]
+        excluded = np.isin(head, adjacency.indices[adjacency.indptr[source]:adjacency.indptr[source + 1]]) | (head == source)
+        results.append([(node_id, float(degrees[source] * degrees[node_id])) for node_id in head[~excluded][:k].tolist()])
+    return results
+
+def predict_links(graph, sources=MY_ACCOUNT, method="jaccard", k=20, batch_size=DEFAULT_BATCH_SIZE, adjacency=None):
+    """
+    Best k accounts not yet connected to each source account.
+
+    Args:
+        graph: CompactGraph
+        sources: A username or a list of usernames (accounts not in the graph are skipped)
+        method: One of METHODS
+        k: Candidates per source
+        batch_size: Sources scored per sparse product, bounding its memory
+        adjacency: Optional matrix from undirected_adjacency, reused across calls
+
+    Returns:
+        Dictionary {source: [(candidate, score), ...]} with the best candidate first
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method!r}, expected one of {METHODS}")
+    if adjacency is None:
+        adjacency = undirected_adjacency(graph)
+    degrees = np.diff(adjacency.indptr)
+    names = graph.interner.names
+    source_ids = _node_ids(graph, sources)
+
+    predictions = {}
+    for start in range(0, len(source_ids), batch_size):
+        batch = source_ids[start:start + batch_size]
+        if method == "preferential_attachment":
+            rows = _top_k_preferential_attachment(adjacency, batch, k, degrees)
+        else:
+            rows = _top_k_rows(neighbor_scores(adjacency, batch, method, degrees), k)
+        for source, row in zip(batch.tolist(), rows):
+            predictions[names[source]] = [(names[node_id], float(score)) for node_id, score in row]
+    return predictions
+
+def top_pairs(graph, method="jaccard", k=20, sources=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Best k unconnected pairs of the graph (or of pairs involving the given sources).
+
+    Returns:
+        List of (account 1, account 2, score) triples, best first; each pair appears once
+    """
+    if sources is None:
+        sources = graph.interner.names
+    predictions = predict_links(graph, sources, method, k, batch_size)
+    pairs = {}
+    for source, candidates in predictions.items():
+        for candidate, score in candidates:
+            pairs[min(source, candidate), max(source, candidate)] = score
+    return [(u, v, score) for score, (u, v) in heapq.nlargest(k, ((score, pair) for pair, score in pairs.items()), key=lambda item: item[0])]
+
+#%% Parse command line arguments
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Link prediction for accounts of the scraped network')
+    parser.add_argument('--adj-list', default=ADJ_LIST_FILE, help=f'Adjacency list to load (default: {ADJ_LIST_FILE})')
+    parser.add_argument('--source', action='append', default=None, help=f'Account to predict links for, repeatable (default: {MY_ACCOUNT})')
+    parser.add_argument('--sources-file', default=None, help='File with one source account per line (batch mode)')
+    parser.add_argument('--method', choices=METHODS + ('all',), default='jaccard', help='Score to rank candidates by (default: jaccard)')
+    parser.add_argument('--top', type=int, default=20, help='Candidates per source (default: 20)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help=f'Sources per sparse product (default: {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--json', default=None, help='Also write the predictions to this JSON file')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    sources = list(args.source or [])
+    if args.sources_file:
+        with open(args.sources_file, 'r') as f:
+            sources.extend(line.strip() for line in f if line.strip())
+    sources = sources or [MY_ACCOUNT]
+
+    graph = compact_graph.load_compact_graph(args.adj_list)
+    adjacency = undirected_adjacency(graph)
+    print(f"Loaded {graph.num_nodes} nodes and {graph.num_edges} edges")
+
+    results = {}
+    for method in (METHODS if args.method == 'all' else (args.method,)):
+        start = time.time()
+        results[method] = predict_links(graph, sources, method, args.top, args.batch_size, adjacency)
+        print(f"{method}: {len(results[method])} sources scored in {time.time() - start:.2f}s")
+
+    # Print the tables of the first few sources, the JSON file holds all of them
+    for method, predictions in results.items():
+        for source in list(predictions)[:5]:
+            print(f"\n{method} for {source}")
+            for rank, (candidate, score) in enumerate(predictions[source], 1):
+                print(f"{rank:>3}. {candidate:<32} {score:.6g}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nPredictions saved to {args.json}")
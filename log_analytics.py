@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+Throughput analytics over the auto_scrape logs.
+
+auto_scrape.setup_logging writes one logs/auto_scrape_<time>.log per run (older
+runs wrote to auto_scrape.log). ingest_logs reads only the bytes appended to
+each log since the previous run and turns the lines it recognises into events:
+session start/end, accounts processed or skipped, relations added, users and
+profile counts fetched, rate limits, batch sizes and waits. The events are kept
+in a small columnar JSON store, so later runs never re-read old log data.
+
+build_summary groups the events into scraping sessions and reports throughput
+per session, per day and hour of the day, by the interval since the previous
+session and by batch size. Those are the numbers to tune MIN_INTERVAL_MINUTES,
+MAX_SESSIONS_PER_DAY and the batch sizes of auto_scrape with.
+
+Usage:
+    python3 log_analytics.py
+    python3 log_analytics.py --rebuild --json throughput.json
+"""
+import os
+import re
+import glob
+import json
+import datetime
+import argparse
+
+import adaptive_wait
+
+DATA_DIR = "instagram_data"
+LOG_DIR = "logs"
+LEGACY_LOG_FILE = "auto_scrape.log"
+EVENT_STORE_FILE = os.path.join(DATA_DIR, "log_events.json")
+SUMMARY_FILE = os.path.join(DATA_DIR, "log_throughput.json")
+STORE_VERSION = 2
+
+# Upper bounds (minutes) of the interval bins used to compare sessions by the pause before them
+INTERVAL_BINS = [15, 30, 60, 120, 240, 480]
+
+LOG_LINE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),(\d{3}) - [A-Z]+ - (.*)$")
+
+# (kind, pattern) pairs tried in order; the first group, if any, is the event value
+EVENT_PATTERNS = [
+    ("script_start", re.compile(r"Auto Scraper Starting$")),
+    ("script_end", re.compile(r"^(?:Auto-scraper script ended|Scraper interrupted by user)")),
+    ("account_session_start", re.compile(r"^Starting new scraping session")),
+    ("following_session_start", re.compile(r"^Starting following accounts scraping session")),
+    ("session_end", re.compile(
+        r"^(?:Following accounts scraping session completed|Following session summary|Following scraping completed"
+        r"|Main scraping completed|Error running (?:following )?(?:accounts )?scraping session"
+        r"|SCRAPER: Session completed successfully|FOLLOWING SCRAPER: Browser closed)"
+    )),
+    ("batch_size", re.compile(r"^Using random batch size of (\d+) accounts")),
+    ("account_done", re.compile(r"^FOLLOWING SCRAPER: Completed (\d+)/\d+ accounts\.")),
+    ("account_skipped", re.compile(r"^FOLLOWING SCRAPER: (?:Account \S+ already processed\. Skipping|Early detection: Account has too many)")),
+    ("relations_added", re.compile(r"^(?:FOLLOWING )?SCRAPER: Added (\d+) new relationships to adjacency list")),
+    ("users_fetched", re.compile(r"^(?:FOLLOWING )?SCRAPER: Total (?:followers|following) retrieved: (?:(\d+)/\d+|\d+ \((\d+) new in this session\))")),
+    ("profile_counts", re.compile(r"^[A-Z][A-Z ]*: (?:[\w.]+: )?Followers: (\d+), Following: \d+$")),
+    ("rate_limit", re.compile(r"RATE LIMIT DETECTED")),  # Logged once per detection, before any retry or suspension
+    ("idle_wait", re.compile(r"^(?:Waiting (\d+) minutes until next session|Sessions completed\. Waiting)")),
+]
+
+SESSION_STARTS = {"account_session_start": "account", "following_session_start": "following"}
+SESSION_BOUNDARIES = {"script_start", "script_end", "idle_wait"}
+
+def parse_line(line):
+    """
+    Turn one log line into an event.
+
+    Returns:
+        Tuple of (unix time, kind, value or None), or None for lines that are not events
+    """
+    match = LOG_LINE_RE.match(line)
+    if not match:
+        return None
+    message = match.group(3).strip()
+    for kind, pattern in EVENT_PATTERNS:
+        event_match = pattern.search(message)
+        if event_match:
+            value = next((group for group in event_match.groups() if group is not None), None)
+            timestamp = datetime.datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S").timestamp() + int(match.group(2)) / 1000
+            return round(timestamp, 3), kind, int(value) if value is not None else None
+    return None
+
+def log_files(log_dir=LOG_DIR, legacy_log_file=LEGACY_LOG_FILE):
+    """Return the auto_scrape log files, the legacy single log first"""
+    files = [legacy_log_file] if os.path.exists(legacy_log_file) else []
+    return files + sorted(glob.glob(os.path.join(log_dir, "auto_scrape_*.log")))
+
+#%% Columnar event store
+def new_event_store():
+    """
+    Create an empty event store.
+
+    Events are stored column by column; file paths and event kinds are
+    dictionary-encoded as indices into file_names and kinds.
+    """
+    return {
+        "version": STORE_VERSION,
+        "files": {},          # path -> {"index", "offset", "head"}
+        "file_names": [],
+        "kinds": [],
+        "columns": {"time": [], "file": [], "kind": [], "value": []}
+    }
+
+def load_event_store(store_file=EVENT_STORE_FILE):
+    """Load the event store, or return an empty one when it is missing, unreadable or outdated"""
+    if os.path.exists(store_file):
+        try:
+            with open(store_file, "r") as f:
+                store = json.load(f)
+            if store.get("version") == STORE_VERSION:
+                return store
+            print(f"Event store {store_file} has an old format, rebuilding it")
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Could not read event store {store_file}: {e}. Rebuilding it")
+    return new_event_store()
+
+def save_event_store(store, store_file=EVENT_STORE_FILE):
+    """Write the event store atomically"""
+    os.makedirs(os.path.dirname(store_file) or ".", exist_ok=True)
+    temp_file = store_file + ".tmp"
+    with open(temp_file, "w") as f:
+        json.dump(store, f, separators=(",", ":"))
+    os.replace(temp_file, store_file)
+
+def _encode(values, value):
+    """Index of value in a dictionary-encoding list, appending it when new"""
+    try:
+        return values.index(value)
+    except ValueError:
+        values.append(value)
+        return len(values) - 1
+
+def _drop_file_events(store, file_index):
+    """Remove the events of one log file from the columns"""
+    columns = store["columns"]
+    keep = [row for row, index in enumerate(columns["file"]) if index != file_index]
+    for name in columns:
+        columns[name] = [columns[name][row] for row in keep]
+
+def _read_first_line(path):
+    with open(path, "rb") as f:
+        return f.readline().decode("utf-8", errors="replace").rstrip("\n")
+
+def ingest_logs(store, files):
+    """
+    Add the events from the bytes appended to each log file since the last ingest.
+
+    A file that shrank or whose first line changed was replaced, so its old
+    events are dropped and it is read again from the start. A trailing line
+    without a newline is left for the next ingest.
+
+    Returns:
+        Tuple of (bytes read, events added)
+    """
+    columns = store["columns"]
+    bytes_read = 0
+    events_added = 0
+    for path in files:
+        try:
+            size = os.path.getsize(path)
+            head = _read_first_line(path)
+        except OSError as e:
+            print(f"Skipping {path}: {e}")
+            continue
+
+        state = store["files"].get(path)
+        if state is None:
+            state = {"index": _encode(store["file_names"], path), "offset": 0, "head": head}
+            store["files"][path] = state
+        elif size < state["offset"] or state["head"] != head:
+            print(f"{path} was replaced, reading it again")
+            _drop_file_events(store, state["index"])
+            state.update(offset=0, head=head)
+
+        if size == state["offset"]:
+            continue
+
+        with open(path, "rb") as f:
+            f.seek(state["offset"])
+            data = f.read(size - state["offset"])
+        complete = data.rfind(b"\n") + 1
+        if complete == 0:
+            continue
+
+        for line in data[:complete].decode("utf-8", errors="replace").splitlines():
+            event = parse_line(line)
+            if event is None:
+                continue
+            timestamp, kind, value = event
+            columns["time"].append(timestamp)
+            columns["file"].append(state["index"])
+            columns["kind"].append(_encode(store["kinds"], kind))
+            columns["value"].append(value)
+            events_added += 1
+
+        state["offset"] += complete
+        bytes_read += complete
+    return bytes_read, events_added
+
+def iter_file_events(store):
+    """
+    Yield the events of each log file in log order, files ordered by their first event.
+
+    Yields:
+        Lists of (time, kind, value) tuples, one list per file
+    """
+    columns = store["columns"]
+    by_file = {}
+    for timestamp, file_index, kind, value in zip(columns["time"], columns["file"], columns["kind"], columns["value"]):
+        by_file.setdefault(file_index, []).append((timestamp, store["kinds"][kind], value))
+    for file_index in sorted(by_file, key=lambda index: by_file[index][0][0]):
+        yield by_file[file_index]
+
+#%% Sessions and throughput
+def _new_session(session_type, start):
+    return {
+        "type": session_type,
+        "start": start,
+        "end": start,
+        "ended": False,        # True when an explicit end line was logged
+        "batch_size": None,
+        "accounts": 0,
+        "skipped": 0,
+        "relations": 0,
+        "users": 0,
+        "profile_counts": 0,
+        "rate_limits": 0
+    }
+
+def build_sessions(store):
+    """
+    Group the events into scraping sessions.
+
+    A session starts at its start line and ends at an explicit end line, the
+    next session, a wait between sessions or the end of the script run. Its end
+    time is that of its last event.
+
+    Returns:
+        Tuple of (sessions in time order, event totals outside of any session)
+    """
+    sessions = []
+    outside = {"profile_counts": 0, "rate_limits": 0, "users": 0, "relations": 0}
+    for events in iter_file_events(store):
+        current = None
+        for timestamp, kind, value in events:
+            if kind in SESSION_STARTS or kind in SESSION_BOUNDARIES:
+                if current is not None:
+                    sessions.append(current)
+                current = _new_session(SESSION_STARTS[kind], timestamp) if kind in SESSION_STARTS else None
+                continue
+
+            target = current if current is not None else outside
+            if kind == "relations_added":
+                target["relations"] += value or 0
+            elif kind == "users_fetched":
+                target["users"] += value or 0
+            elif kind == "profile_counts":
+                target["profile_counts"] += 1
+            elif kind == "rate_limit":
+                target["rate_limits"] += 1
+            if current is None:
+                continue
+
+            current["end"] = timestamp
+            if kind == "account_done":
+                current["accounts"] += 1
+            elif kind == "account_skipped":
+                current["skipped"] += 1
+            elif kind == "batch_size":
+                current["batch_size"] = value
+            elif kind == "session_end":
+                current["ended"] = True
+                sessions.append(current)
+                current = None
+        if current is not None:
+            sessions.append(current)
+
+    sessions.sort(key=lambda session: session["start"])
+    previous_end = None
+    for session in sessions:
+        minutes = (session["end"] - session["start"]) / 60
+        session["minutes"] = round(minutes, 2)
+        session["relations_per_min"] = round(session["relations"] / minutes, 2) if minutes > 0 else None
+        session["gap_minutes"] = round((session["start"] - previous_end) / 60, 1) if previous_end is not None else None
+        previous_end = max(previous_end or session["end"], session["end"])
+    return sessions, outside
+
+def _group_stats(sessions):
+    """Session count, totals, rate-limited share and relations/min p50 of a group of sessions"""
+    rates = sorted(session["relations_per_min"] for session in sessions if session["relations_per_min"] is not None)
+    minutes = sum(session["minutes"] for session in sessions)
+    relations = sum(session["relations"] for session in sessions)
+    return {
+        "sessions": len(sessions),
+        "accounts": sum(session["accounts"] for session in sessions),
+        "relations": relations,
+        "users": sum(session["users"] for session in sessions),
+        "rate_limits": sum(session["rate_limits"] for session in sessions),
+        "rate_limited_share": round(sum(1 for session in sessions if session["rate_limits"]) / len(sessions), 3) if sessions else None,
+        "minutes": round(minutes, 1),
+        "relations_per_min": round(relations / minutes, 2) if minutes > 0 else None,
+        "relations_per_min_p50": adaptive_wait.percentile(rates, 0.5)
+    }
+
+def _interval_bin(gap_minutes):
+    if gap_minutes is None:
+        return "first"
+    lower = 0
+    for upper in INTERVAL_BINS:
+        if gap_minutes < upper:
+            return f"{lower}-{upper}m"
+        lower = upper
+    return f">={INTERVAL_BINS[-1]}m"
+
+def _columns(rows, keys):
+    """Turn a list of dictionaries into {key: [values]}"""
+    return {key: [row[key] for row in rows] for key in keys}
+
+def build_summary(store, bucket_minutes=60, session_type=None):
+    """
+    Compute the throughput statistics of the ingested events.
+
+    Args:
+        store: Event store filled by ingest_logs
+        bucket_minutes: Width of the time series buckets
+        session_type: Only group "account" or "following" sessions (default: both)
+
+    Returns:
+        Dictionary with totals, the per-bucket time series and sessions (both
+        as columns) and the groupings by interval, batch size, day and hour
+    """
+    sessions, outside = build_sessions(store)
+    if session_type is not None:
+        sessions = [session for session in sessions if session["type"] == session_type]
+
+    # Time series of the events themselves, so work outside of sessions is included
+    bucket_seconds = bucket_minutes * 60
+    buckets = {}
+    columns = store["columns"]
+    for timestamp, kind, value in zip(columns["time"], columns["kind"], columns["value"]):
+        kind = store["kinds"][kind]
+        bucket = buckets.setdefault(int(timestamp // bucket_seconds) * bucket_seconds, {
+            "sessions": 0, "accounts": 0, "relations": 0, "users": 0, "profile_counts": 0, "rate_limits": 0
+        })
+        if kind in SESSION_STARTS:
+            bucket["sessions"] += 1
+        elif kind == "account_done":
+            bucket["accounts"] += 1
+        elif kind == "relations_added":
+            bucket["relations"] += value or 0
+        elif kind == "users_fetched":
+            bucket["users"] += value or 0
+        elif kind == "profile_counts":
+            bucket["profile_counts"] += 1
+        elif kind == "rate_limit":
+            bucket["rate_limits"] += 1
+    series = [dict(bucket_start=start, **buckets[start]) for start in sorted(buckets)]
+
+    by_interval = {}
+    by_batch_size = {}
+    by_day = {}
+    by_hour = {}
+    for session in sessions:
+        started = datetime.datetime.fromtimestamp(session["start"])
+        by_interval.setdefault(_interval_bin(session["gap_minutes"]), []).append(session)
+        by_day.setdefault(started.strftime("%Y-%m-%d"), []).append(session)
+        by_hour.setdefault(started.hour, []).append(session)
+        if session["type"] == "following" and session["batch_size"] is not None:
+            by_batch_size.setdefault(session["batch_size"], []).append(session)
+
+    interval_order = ["first"] + [_interval_bin(upper - 1) for upper in INTERVAL_BINS] + [_interval_bin(INTERVAL_BINS[-1])]
+    session_keys = ["type", "start", "minutes", "gap_minutes", "batch_size", "accounts", "skipped",
+                    "relations", "users", "profile_counts", "rate_limits", "relations_per_min", "ended"]
+    return {
+        "generated": datetime.datetime.now().timestamp(),
+        "bucket_minutes": bucket_minutes,
+        "session_type": session_type,
+        "totals": dict(_group_stats(sessions), outside_sessions=outside,
+                       account_sessions=sum(1 for session in sessions if session["type"] == "account"),
+                       following_sessions=sum(1 for session in sessions if session["type"] == "following")),
+        "by_interval": {name: _group_stats(by_interval[name]) for name in interval_order if name in by_interval},
+        "by_batch_size": {str(size): _group_stats(by_batch_size[size]) for size in sorted(by_batch_size)},
+        "by_day": {day: _group_stats(by_day[day]) for day in sorted(by_day)},
+        "by_hour": {str(hour): _group_stats(by_hour[hour]) for hour in sorted(by_hour)},
+        "series": _columns(series, ["bucket_start", "sessions", "accounts", "relations", "users", "profile_counts", "rate_limits"]),
+        "sessions": _columns(sessions, session_keys)
+    }
+
+def print_summary(summary):
+    """Print the throughput summary as tables"""
+    totals = summary["totals"]
+    print(f"\n{totals['sessions']} sessions ({totals['account_sessions']} own account, {totals['following_sessions']} following accounts), "
+          f"{totals['accounts']} accounts, {totals['relations']} relations, {totals['rate_limits']} rate limits, "
+          f"{totals['relations_per_min']} relations/min")
+
+    header = f"{'':<12} {'sessions':>8} {'accounts':>8} {'relations':>9} {'rel/min':>8} {'p50':>8} {'rl share':>8}"
+    for title, groups in (("Interval before session", summary["by_interval"]),
+                          ("Batch size", summary["by_batch_size"]),
+                          ("Day", summary["by_day"]),
+                          ("Hour of day", summary["by_hour"])):
+        if not groups:
+            continue
+        print(f"\n{title}")
+        print(header)
+        print("-" * len(header))
+        for name, stats in groups.items():
+            print(
+                f"{name:<12} {stats['sessions']:>8} {stats['accounts']:>8} {stats['relations']:>9} "
+                f"{stats['relations_per_min'] if stats['relations_per_min'] is not None else '-':>8} "
+                f"{stats['relations_per_min_p50'] if stats['relations_per_min_p50'] is not None else '-':>8} "
+                f"{stats['rate_limited_share'] if stats['rate_limited_share'] is not None else '-':>8}"
+            )
+
+#%% Parse command line arguments
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Throughput statistics from the auto_scrape logs')
+    parser.add_argument('--log-dir', default=LOG_DIR, help=f'Directory of the auto_scrape_*.log files (default: {LOG_DIR})')
+    parser.add_argument('--store', default=EVENT_STORE_FILE, help=f'Event store file (default: {EVENT_STORE_FILE})')
+    parser.add_argument('--json', default=SUMMARY_FILE, help=f'Write the summary to this JSON file (default: {SUMMARY_FILE})')
+    parser.add_argument('--bucket-minutes', type=int, default=60, help='Width of the time series buckets in minutes (default: 60)')
+    parser.add_argument('--session-type', choices=['account', 'following'], default=None, help='Only group sessions of this type (default: both)')
+    parser.add_argument('--rebuild', action='store_true', help='Forget the ingested events and read all logs again')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    store = new_event_store() if args.rebuild else load_event_store(args.store)
+    bytes_read, events_added = ingest_logs(store, log_files(args.log_dir))
+    save_event_store(store, args.store)
+    print(f"Read {bytes_read / 1024:.0f} KB of new log data, {events_added} new events ({len(store['columns']['time'])} total)")
+
+    summary = build_summary(store, args.bucket_minutes, args.session_type)
+    with open(args.json, "w") as f:
+        json.dump(summary, f, indent=2)
+    print_summary(summary)
+    print(f"\nSummary saved to {args.json}")
@@ -0,0 +1,81 @@
+"""
+Local maintenance work done while scraping is suspended by a rate limit.
+
+Instead of sleeping through Instagram's back-off, the scraping loop hands the
+waiting time to run_maintenance, which runs tasks such as journal compaction,
+adjList.txt deduplication, exports and cache pruning one after another until
+the back-off ends, and then sleeps only for whatever time is left.
+"""
+import os
+import json
+import time
+
+import essentialRoutines
+
+DATA_DIR = "instagram_data"
+GRAPH_SUMMARY_FILE = os.path.join(DATA_DIR, "graph_summary.json")
+MAX_SLEEP_CHUNK = 60  # Seconds slept at once while waiting for the back-off to end
+
+def refresh_graph_summary(adj_list_file, summary_file=GRAPH_SUMMARY_FILE, top_k=20, store=None):
+    """
+    Rebuild the graph summary (node/edge counts and most followed accounts) from adjList.txt.
+    With a GraphStore, the accounts with the highest stored PageRank scores are included.
+
+    Returns:
+        The summary dictionary
+    """
+    import compact_graph  # NumPy is only needed for this task
+
+    graph = compact_graph.load_compact_graph(adj_list_file)
+    summary = {
+        "nodes": graph.num_nodes,
+        "edges": graph.num_edges,
+        "top_followed": graph.top_by_degree(top_k, direction="in"),
+        "top_following": graph.top_by_degree(top_k, direction="out"),
+        "updated_at": time.time()
+    }
+    if store is not None:
+        summary["top_pagerank"] = store.top_ranked(top_k)
+    with open(summary_file, "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+def run_maintenance(tasks, until, on_event=None):
+    """
+    Run maintenance tasks until a deadline, then wait for the rest of it.
+
+    Tasks run in the given order and each at most once; a task that does not
+    finish before the deadline delays the caller by its remaining run time.
+    Failing tasks are reported and skipped.
+
+    Args:
+        tasks: List of (name, callable) pairs
+        until: Unix time to return at
+        on_event: Optional callback receiving structured progress events (see essentialRoutines.emit_event)
+
+    Returns:
+        List of the names of the tasks that were run
+    """
+    completed = []
+    for name, task in tasks:
+        if time.time() >= until:
+            print("Back-off over, postponing remaining maintenance tasks")
+            break
+
+        start = time.time()
+        try:
+            result = task()
+            completed.append(name)
+            print(f"Maintenance task {name} done in {time.time() - start:.1f}s")
+            essentialRoutines.emit_event(on_event, "maintenance_task", task=name, seconds=round(time.time() - start, 3), result=result)
+        except Exception as e:
+            print(f"Maintenance task {name} failed: {e}")
+            essentialRoutines.emit_event(on_event, "error", step=f"maintenance:{name}", error=str(e))
+
+    remaining = until - time.time()
+    if remaining > 0:
+        print(f"Maintenance finished, waiting {remaining/60:.1f} more minutes for the rate limit back-off")
+    while remaining > 0:
+        time.sleep(min(MAX_SLEEP_CHUNK, remaining))
+        remaining = until - time.time()
+    return completed
@@ -11,6 +11,7 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+import essentialRoutines
 
 # Constants
 DATA_DIR = "instagram_data"
@@ -94,9 +95,13 @@ def login_insta(driver, username, password):
 
 def extract_usernames(driver):
     """Extract usernames from the followers modal"""
+    # Single round trip: filter and deduplicate in the page
+    usernames = essentialRoutines.extract_dialog_usernames(driver)
+    if usernames:
+        return usernames
     usernames = []
     
-    # Try multiple methods to extract usernames
+    # Fall back to per-element extraction
     try:
         # Method 1: Modern profile layout (most common)
         elements = driver.find_elements(By.XPATH, "//div[@role='dialog']//a[contains(@href, '/')]")
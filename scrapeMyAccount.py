@@ -1,18 +1,19 @@
 #%% Loading libraries
-import time
 import traceback
 import os
 import json
 import argparse
-from selenium import webdriver
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 import essentialRoutines
+import adaptive_wait
+import instrumentation
+import edge_journal
+import graph_store
+import session_cache
 
 #%% Define constants for file paths
 DATA_DIR = "instagram_data"
@@ -21,6 +22,7 @@ FOLLOWING_FILE = os.path.join(DATA_DIR, "following.json")
 CURSOR_FILE = os.path.join(DATA_DIR, "next_cursor.json")
 ADJ_LIST_FILE = os.path.join(DATA_DIR, "adjList.txt")
 FOLLOWING_LINKS_FILE = os.path.join(DATA_DIR, "followingLinks.txt")
+DB_FILE = os.path.join(DATA_DIR, "graph.db")
 
 #%% Helper functions
 def ensure_data_directory():
@@ -52,39 +54,231 @@ def dict_to_adj_list(following_dict):
 
 def update_adj_list_file(my_username, my_following):
     """Update adjacency list file with user's following"""
-    # Create list of relationships (one per line)
-    new_adj_list = []
-    for followed in my_following:
-        new_adj_list.append(f"{my_username} {followed}")
-    
-    # Load existing relationships to avoid duplicates
-    existing_relations = set()
-    if os.path.exists(ADJ_LIST_FILE):
-        with open(ADJ_LIST_FILE, "r") as file_h:
-            for line in file_h:
-                if line.strip():  # Skip empty lines
-                    existing_relations.add(line.strip())
-    
-    # Add new relationships without duplicates
-    new_count = 0
-    for relation in new_adj_list:
-        if relation not in existing_relations:
-            existing_relations.add(relation)
-            new_count += 1
-    
-    # Write back all relationships
-    with open(ADJ_LIST_FILE, "w") as file_h:
-        for relation in existing_relations:
-            file_h.write(f"{relation}\n")
+    with graph_store.GraphStore(DB_FILE) as store:
+        store.bootstrap_from_files(adj_list_file=ADJ_LIST_FILE)
+        
+        # The store's unique constraint filters out relationships we already have
+        inserted = store.add_edges((my_username, followed) for followed in my_following)
+        total = store.edge_count()
+    
+    # Append only the new relationships and fold them into adjList.txt
+    new_count = edge_journal.append_relations(
+        [f"{follower} {followed}" for follower, followed in inserted], ADJ_LIST_FILE
+    )
+    edge_journal.compact_journal(ADJ_LIST_FILE)
     
     print(f"Updated adjacency list file: {ADJ_LIST_FILE}")
-    print(f"Added {new_count} new relationships (total: {len(existing_relations)})")
+    print(f"Added {new_count} new relationships (total: {total})")
+
+def update_following_links_file(my_following_links, username=None):
+    """Add new following links to the crawl queue and export the queue to followingLinks.txt"""
+    with graph_store.GraphStore(DB_FILE) as store:
+        # The crawl starts from this account, so multi-hop crawls never queue it
+        if username:
+            store.mark_visited([username], depth=0)
+        # Links already queued keep their place; new ones go to the tail
+        added = store.enqueue_links(my_following_links)
+        store.export_links_file(FOLLOWING_LINKS_FILE)
+    print(f"Updated following links file: {FOLLOWING_LINKS_FILE} ({added} new links queued)")
+
+#%% Session functions
+def fetch_profile_stats(driver, username, max_age=0, on_event=None):
+    """
+    Open the user's profile and read the followers/following/posts counts.
+    
+    Args:
+        max_age: Seconds counts cached in the graph store are reused instead of
+            loading the profile (0 always loads it)
+    
+    Returns:
+        Dictionary with keys 'followers', 'following', and 'posts'
+    """
+    with graph_store.GraphStore(DB_FILE) as store:
+        cached_stats = store.get_cached_profile_stats(username, max_age)
+        if cached_stats is not None:
+            profile_stats = {key: cached_stats[key] or 0 for key in ("followers", "following", "posts")}
+            print(f"\nProfile Stats (cached): {profile_stats}")
+            print(f"Followers: {profile_stats['followers']}, Following: {profile_stats['following']}")
+            essentialRoutines.emit_event(on_event, "profile_stats", username=username, cached=True, **profile_stats)
+            return profile_stats
+        
+        driver.get(f"{essentialRoutines.INSTAGRAM_URL}/{username}/")
+        
+        # Get account information (waits for the profile header to render)
+        profile_stats = essentialRoutines.get_profile_stats(driver)
+        if profile_stats.get('followers') or profile_stats.get('following'):
+            store.save_profile_stats(username, profile_stats.get('followers', 0), profile_stats.get('following', 0), profile_stats.get('posts'))
+    
+    print(f"\nProfile Stats: {profile_stats}")
+    print(f"Followers: {profile_stats.get('followers', 0)}, Following: {profile_stats.get('following', 0)}")
+    essentialRoutines.emit_event(on_event, "profile_stats", username=username, cached=False, **profile_stats)
+    return profile_stats
+
+def scrape_own_list(list_type, driver, username, collected, total, next_cursor, max_pages=10, aggressive_resume=False, observer_mode=False, suspend_on_rate_limit=False, on_event=None):
+    """
+    Scrape the user's followers or following list, resuming from the usernames already collected.
+    
+    With suspend_on_rate_limit, a rate limit saves the partial list, records the
+    back-off in the graph store's suspended jobs and re-raises
+    essentialRoutines.RateLimitSuspended with the merged list as its collected attribute.
+    
+    Returns:
+        The merged list of usernames (unchanged if the list is already complete)
+    """
+    profile_link = f"{essentialRoutines.INSTAGRAM_URL}/{username}/"
+    print(f"\nScraping {list_type}...")
+    try:
+        # Check if we've already collected all or nearly all of the list
+        if len(collected) >= total or (len(collected) >= 0.95 * total and len(collected) > 0):
+            print(f"Already collected {len(collected)}/{total} {list_type} (≥95%). Skipping {list_type} scraping.")
+            essentialRoutines.emit_event(on_event, "list_skipped", list_type=list_type, collected=len(collected), total=total)
+            return collected
+        
+        previous_count = len(collected)
+        suspended = None
+        try:
+            new_usernames, next_cursor[list_type] = essentialRoutines.scrape_whole_list(
+                list_type, 
+                driver, 
+                profile_link,
+                next_cursor=next_cursor.get(list_type),
+                resume_from_saved=collected,
+                max_pages=max_pages,
+                aggressive_resume=aggressive_resume,
+                observer_mode=observer_mode,
+                suspend_on_rate_limit=suspend_on_rate_limit
+            )
+        except essentialRoutines.RateLimitSuspended as e:
+            # Keep what was collected before the rate limit and where it stopped
+            new_usernames = e.usernames
+            next_cursor[list_type] = e.cursor
+            suspended = e
+        
+        # Merge with existing usernames, remove duplicates
+        collected = list(dict.fromkeys(collected + new_usernames))
+        
+        print(f"Total {list_type} retrieved: {len(collected)}/{total}")
+        
+        # Save the list
+        save_data(collected, FOLLOWERS_FILE if list_type == "followers" else FOLLOWING_FILE)
+        save_data(next_cursor, CURSOR_FILE)
+        essentialRoutines.emit_event(
+            on_event, "list_scraped", list_type=list_type,
+            collected=len(collected), new=len(collected) - previous_count, total=total
+        )
+        
+        # The back-off is shared with scrapingFollowing, which does maintenance until it ends
+        with graph_store.GraphStore(DB_FILE) as store:
+            if suspended is not None:
+                store.suspend_job(profile_link, list_type, len(collected), suspended.resume_at, suspended.cursor)
+            else:
+                store.clear_suspended_job(profile_link)
+        if suspended is not None:
+            essentialRoutines.emit_event(
+                on_event, "rate_limit_suspended", account=username, list_type=list_type,
+                collected=len(collected), resume_at=suspended.resume_at
+            )
+            suspended.collected = collected
+            raise suspended
+    except essentialRoutines.RateLimitSuspended:
+        raise
+    except Exception as e:
+        print(f"Error scraping {list_type}: {e}")
+        traceback.print_exc()
+        essentialRoutines.emit_event(on_event, "error", step=list_type, error=str(e))
+    
+    return collected
 
-def update_following_links_file(my_following_links):
-    """Update file containing links to following accounts"""
-    with open(FOLLOWING_LINKS_FILE, "w") as file_h:
-        file_h.writelines([f"{link}\n" for link in my_following_links])
-    print(f"Updated following links file: {FOLLOWING_LINKS_FILE}")
+def run_account_session(driver, username, scrape_followers=True, scrape_following=True, resume=False, max_pages=10, aggressive_resume=False, observer_mode=False, stats_max_age=0, suspend_on_rate_limit=False, on_event=None):
+    """
+    Scrape the followers and following of a logged-in account.
+    
+    Args:
+        driver: Selenium webdriver instance logged in as username
+        username: Account to scrape
+        stats_max_age: Seconds cached profile counts are reused (0 always loads the profile)
+        suspend_on_rate_limit: End the session with the partial lists saved when a rate
+            limit is hit, instead of sleeping through the back-off
+        on_event: Optional callback receiving structured progress events (see essentialRoutines.emit_event)
+        
+    Returns:
+        Dictionary with the profile counts and the number of usernames collected
+    """
+    ensure_data_directory()
+    
+    # Check for previous session data
+    saved_followers = load_saved_data(FOLLOWERS_FILE, [])
+    saved_following = load_saved_data(FOLLOWING_FILE, [])
+    saved_cursor = load_saved_data(CURSOR_FILE, {})
+    
+    # Initialize variables for this session
+    my_followers = []
+    my_following = []
+    next_cursor = {"followers": None, "following": None}
+    
+    if resume and (saved_followers or saved_following or saved_cursor):
+        print("Resuming previous session...")
+        my_followers = saved_followers
+        my_following = saved_following
+        next_cursor = saved_cursor
+        print(f"Loaded {len(my_followers)} followers and {len(my_following)} following from previous session")
+    
+    profile_stats = fetch_profile_stats(driver, username, max_age=stats_max_age, on_event=on_event)
+    follower_count = profile_stats.get('followers', 0)
+    following_count = profile_stats.get('following', 0)
+    
+    list_options = {
+        "max_pages": max_pages,
+        "aggressive_resume": aggressive_resume,
+        "observer_mode": observer_mode,
+        "suspend_on_rate_limit": suspend_on_rate_limit,
+        "on_event": on_event
+    }
+    
+    try:
+        # Scrape followers if requested
+        if scrape_followers:
+            my_followers = scrape_own_list("followers", driver, username, my_followers, follower_count, next_cursor, **list_options)
+        
+        # Scrape following if requested
+        if scrape_following:
+            my_following = scrape_own_list("following", driver, username, my_following, following_count, next_cursor, **list_options)
+    except essentialRoutines.RateLimitSuspended as e:
+        if e.list_type == "followers":
+            my_followers = e.collected
+        else:
+            my_following = e.collected
+        print(f"Rate limited while scraping {e.list_type}; the remaining lists wait for the next session")
+    
+    # Get links to following accounts
+    links_count = 0
+    if my_following:
+        print("\nGetting links to following accounts...")
+        try:
+            # Get following profile links
+            my_following_links = essentialRoutines.get_following_links(driver, following_usernames=my_following)
+            update_following_links_file(my_following_links, username)
+            
+            # Update adjacency list
+            update_adj_list_file(username, my_following)
+            
+            links_count = len(my_following_links)
+            print(f"Retrieved {links_count} following links")
+            essentialRoutines.emit_event(on_event, "links_saved", count=links_count)
+        except Exception as e:
+            print(f"Error getting following links: {e}")
+            traceback.print_exc()
+            essentialRoutines.emit_event(on_event, "error", step="following_links", error=str(e))
+    
+    summary = {
+        "followers_total": follower_count,
+        "following_total": following_count,
+        "followers_collected": len(my_followers),
+        "following_collected": len(my_following),
+        "following_links": links_count
+    }
+    essentialRoutines.emit_event(on_event, "session_done", **summary)
+    return summary
 
 #%% Parse command line arguments
 def parse_arguments():
@@ -97,139 +291,35 @@ def parse_arguments():
     parser.add_argument('--headless', action='store_true', help='Run in headless mode')
     parser.add_argument('--max-pages', type=int, default=10, help='Maximum number of pages to scrape (default: 10)')
     parser.add_argument('--aggressive-resume', action='store_true', help='Use more aggressive scrolling when resuming with many existing users')
+    parser.add_argument('--fresh-login', action='store_true', help='Ignore the cached session and log in with the password')
+    parser.add_argument('--observer-mode', action='store_true', help='Collect usernames with an in-page MutationObserver instead of re-reading the dialog')
+    parser.add_argument('--profile', action='store_true', help='Time the scraping steps and write a session profile to instagram_data/profiles')
     return parser.parse_args()
 
 #%% Main execution
 if __name__ == "__main__":
     # Parse command line arguments
     args = parse_arguments()
+    if args.profile:
+        instrumentation.enable()
     
-    # Ensure data directory exists
-    ensure_data_directory()
-    
-    # Set up Chrome options
-    options = Options()
-    PATH = "/Users/chenyusu/Documents/GitHub/Instagram-Network_scraping_and_analysis/chromedriver"  # Chromedriver path
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--no-sandbox")
-    if args.headless:
-        options.add_argument("--headless")
-    options.add_argument("--window-size=1920,1080")
-    service = Service(executable_path=PATH)
-    driver = webdriver.Chrome(service=service, options=options)
+    driver = essentialRoutines.create_driver(headless=args.headless)
     
     try:
-        # Login to Instagram
-        essentialRoutines.login_insta(driver, args.username, args.password)
+        # Login to Instagram, reusing the cached session when it is still valid
+        session_cache.login_with_session_cache(driver, args.username, args.password, use_cache=not args.fresh_login)
         print(f"Logged in as {args.username}")
-        time.sleep(5)  # Wait for login to complete
         
-        # Check for previous session data
-        saved_followers = load_saved_data(FOLLOWERS_FILE, [])
-        saved_following = load_saved_data(FOLLOWING_FILE, [])
-        saved_cursor = load_saved_data(CURSOR_FILE, {})
-        
-        # Initialize variables for this session
-        my_followers = []
-        my_following = []
-        next_cursor = {"followers": None, "following": None}
-        
-        if args.resume and (saved_followers or saved_following or saved_cursor):
-            print("Resuming previous session...")
-            my_followers = saved_followers
-            my_following = saved_following
-            next_cursor = saved_cursor
-            print(f"Loaded {len(my_followers)} followers and {len(my_following)} following from previous session")
-        
-        # Navigate to user's profile
-        driver.get(f"https://www.instagram.com/{args.username}/")
-        time.sleep(3)
-        
-        # Get account information
-        profile_stats = essentialRoutines.get_profile_stats(driver)
-        follower_count = profile_stats.get('followers', 0)
-        following_count = profile_stats.get('following', 0)
-        
-        print(f"\nProfile Stats: {profile_stats}")
-        print(f"Followers: {follower_count}, Following: {following_count}")
-        
-        # Scrape followers if requested
-        if not args.no_followers:
-            print("\nScraping followers...")
-            try:
-                # Check if we've already collected all or nearly all followers
-                if len(my_followers) >= follower_count or (len(my_followers) >= 0.95 * follower_count and len(my_followers) > 0):
-                    print(f"Already collected {len(my_followers)}/{follower_count} followers (≥95%). Skipping followers scraping.")
-                else:
-                    new_followers, next_cursor['followers'] = essentialRoutines.scrape_whole_list(
-                        "followers", 
-                        driver, 
-                        f"https://www.instagram.com/{args.username}/",
-                        next_cursor=next_cursor.get('followers'),
-                        resume_from_saved=my_followers,
-                        max_pages=args.max_pages,
-                        aggressive_resume=args.aggressive_resume
-                    )
-                    
-                    # Merge with existing followers, remove duplicates
-                    my_followers.extend(new_followers)
-                    my_followers = list(dict.fromkeys(my_followers))  # Remove duplicates
-                    
-                    print(f"Total followers retrieved: {len(my_followers)}/{follower_count}")
-                    
-                    # Save followers data
-                    save_data(my_followers, FOLLOWERS_FILE)
-                    save_data(next_cursor, CURSOR_FILE)
-            except Exception as e:
-                print(f"Error scraping followers: {e}")
-                traceback.print_exc()
-        
-        # Scrape following if requested
-        if not args.no_following:
-            print("\nScraping following...")
-            try:
-                # Check if we've already collected all or nearly all following accounts
-                if len(my_following) >= following_count or (len(my_following) >= 0.95 * following_count and len(my_following) > 0):
-                    print(f"Already collected {len(my_following)}/{following_count} following accounts (≥95%). Skipping following scraping.")
-                else:
-                    new_following, next_cursor['following'] = essentialRoutines.scrape_whole_list(
-                        "following", 
-                        driver, 
-                        f"https://www.instagram.com/{args.username}/",
-                        next_cursor=next_cursor.get('following'),
-                        resume_from_saved=my_following,
-                        max_pages=args.max_pages,
-                        aggressive_resume=args.aggressive_resume
-                    )
-                    
-                    # Merge with existing following, remove duplicates
-                    my_following.extend(new_following)
-                    my_following = list(dict.fromkeys(my_following))  # Remove duplicates
-                    
-                    print(f"Total following retrieved: {len(my_following)}/{following_count}")
-                    
-                    # Save following data
-                    save_data(my_following, FOLLOWING_FILE)
-                    save_data(next_cursor, CURSOR_FILE)
-            except Exception as e:
-                print(f"Error scraping following: {e}")
-                traceback.print_exc()
-        
-        # Get links to following accounts
-        if my_following:
-            print("\nGetting links to following accounts...")
-            try:
-                # Get following profile links
-                my_following_links = essentialRoutines.get_following_links(driver, following_usernames=my_following)
-                update_following_links_file(my_following_links)
-                
-                # Update adjacency list
-                update_adj_list_file(args.username, my_following)
-                
-                print(f"Retrieved {len(my_following_links)} following links")
-            except Exception as e:
-                print(f"Error getting following links: {e}")
-                traceback.print_exc()
+        run_account_session(
+            driver,
+            args.username,
+            scrape_followers=not args.no_followers,
+            scrape_following=not args.no_following,
+            resume=args.resume,
+            max_pages=args.max_pages,
+            aggressive_resume=args.aggressive_resume,
+            observer_mode=args.observer_mode
+        )
         
         print("\nSession completed successfully!")
     
@@ -238,6 +328,18 @@ if __name__ == "__main__":
         traceback.print_exc()
     
     finally:
+        # Report where the session spent its time (before the wait latencies are cleared)
+        try:
+            instrumentation.save_session_report(label="account_session")
+        except Exception as e:
+            print(f"Error saving session profile: {e}")
+        
+        # Keep the observed wait latencies for tuning essentialRoutines.WAIT_CAPS
+        try:
+            adaptive_wait.save_latency_report(essentialRoutines.WAIT_LATENCY_FILE)
+        except Exception as e:
+            print(f"Error saving wait latency report: {e}")
+        
         # Close the driver
         driver.close()
         print("Browser closed.")
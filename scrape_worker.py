@@ -0,0 +1,117 @@
+"""
+Long-lived scraping worker.
+
+auto_scrape used to start a new python3 process for every session, which
+re-imported Selenium, launched a new browser, logged in again and then parsed
+the printed output to find the profile counts. ScrapeWorker keeps one logged-in
+browser across sessions and calls the scraping entry points of scrapeMyAccount
+and scrapingFollowing directly. Their progress is reported as structured events
+(see essentialRoutines.emit_event) and their results as dictionaries.
+"""
+import essentialRoutines
+import adaptive_wait
+import instrumentation
+import session_cache
+import scrapeMyAccount
+import scrapingFollowing
+
+MAX_SESSIONS_PER_BROWSER = 20  # Restart the browser after this many sessions to release its memory
+
+class ScrapeWorker:
+    """Keeps a logged-in webdriver warm between scraping sessions"""
+
+    def __init__(self, username, password, headless=True, on_event=None, max_sessions_per_browser=MAX_SESSIONS_PER_BROWSER):
+        self.username = username
+        self.password = password
+        self.headless = headless
+        self.on_event = on_event
+        self.max_sessions_per_browser = max_sessions_per_browser
+        self.driver = None
+        self.sessions_run = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def start(self):
+        """Launch the browser and log in (reusing the cached session when possible)"""
+        self.driver = essentialRoutines.create_driver(headless=self.headless)
+        self.sessions_run = 0
+        try:
+            reused = session_cache.login_with_session_cache(self.driver, self.username, self.password)
+        except Exception:
+            self._quit_driver()
+            raise
+        essentialRoutines.emit_event(self.on_event, "worker_started", username=self.username, reused_session=reused)
+
+    def is_alive(self):
+        """Check that the browser still responds"""
+        if self.driver is None:
+            return False
+        try:
+            self.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _ensure_driver(self):
+        """Start or restart the browser when it is missing, crashed or due for recycling"""
+        if self.driver is not None and self.sessions_run >= self.max_sessions_per_browser:
+            essentialRoutines.emit_event(self.on_event, "worker_recycled", sessions=self.sessions_run)
+            self._quit_driver()
+        elif self.driver is not None and not self.is_alive():
+            essentialRoutines.emit_event(self.on_event, "worker_restarted", reason="browser not responding")
+            self._quit_driver()
+        if self.driver is None:
+            self.start()
+        self.sessions_run += 1
+
+    def _run_session(self, session_func, *args, **kwargs):
+        """Run a scraping entry point with the warm driver and keep its wait latencies"""
+        self._ensure_driver()
+        try:
+            return session_func(self.driver, *args, on_event=self.on_event, **kwargs)
+        finally:
+            try:
+                instrumentation.save_session_report(label=session_func.__name__)
+            except Exception as e:
+                print(f"Error saving session profile: {e}")
+            try:
+                adaptive_wait.save_latency_report(essentialRoutines.WAIT_LATENCY_FILE)
+            except Exception as e:
+                print(f"Error saving wait latency report: {e}")
+
+    def fetch_profile_counts(self, max_age=0):
+        """
+        Read the follower/following counts of the worker's own profile.
+
+        Args:
+            max_age: Seconds counts cached in the graph store are reused instead of loading the profile
+
+        Returns:
+            Dictionary with keys 'followers', 'following', and 'posts'
+        """
+        return self._run_session(scrapeMyAccount.fetch_profile_stats, self.username, max_age=max_age)
+
+    def run_account_session(self, **options):
+        """Run scrapeMyAccount.run_account_session for the worker's account and return its summary"""
+        return self._run_session(scrapeMyAccount.run_account_session, self.username, **options)
+
+    def run_following_session(self, batch_size, **options):
+        """Run scrapingFollowing.run_following_session and return its summary"""
+        return self._run_session(scrapingFollowing.run_following_session, batch_size=batch_size, **options)
+
+    def _quit_driver(self):
+        if self.driver is None:
+            return
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"Error closing browser: {e}")
+        self.driver = None
+
+    def close(self):
+        """Close the browser"""
+        self._quit_driver()
@@ -4,15 +4,20 @@ import traceback
 import os
 import json
 import argparse
-from selenium import webdriver
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 import essentialRoutines
+import adaptive_wait
+import instrumentation
+import edge_journal
+import graph_store
+import external_sort
+import session_cache
+import crawl_scheduler
+import maintenance
 
 #%% Constants and helper functions
 DATA_DIR = "instagram_data"
@@ -22,7 +27,14 @@ CURSOR_FILE = os.path.join(DATA_DIR, "next_cursor.json")
 ADJ_LIST_FILE = os.path.join(DATA_DIR, "adjList.txt")
 FOLLOWING_LINKS_FILE = os.path.join(DATA_DIR, "followingLinks.txt")
 PROGRESS_FILE = os.path.join(DATA_DIR, "scraping_progress.json")
+DB_FILE = os.path.join(DATA_DIR, "graph.db")
 RATE_LIMIT_THRESHOLD = 10  # Instagram typically limits to 10 users per request
+FOLLOWER_LIMIT = 2000  # Accounts with more followers are not scraped
+FOLLOWING_LIMIT = 2000  # Accounts following more accounts are not scraped
+MAX_DEPTH = 1  # Hops from your own account to crawl (1 = only the accounts you follow)
+DEPTH_QUOTA = 5000  # Maximum number of accounts ever queued at each depth beyond 1
+COMPACT_EVERY_N_ACCOUNTS = 10  # Fold the edge journal into adjList.txt after this many accounts
+DEBUG = False  # Enabled with --debug or run_following_session(debug=True)
 
 def ensure_data_directory():
     """Ensure the data directory exists"""
@@ -43,10 +55,11 @@ def save_data(data, file_path):
         json.dump(data, f, indent=2)
     print(f"Saved data to {file_path}")
 
-def sanitize_and_save_links(links, file_path):
-    """Sanitize, deduplicate and save links to a file"""
+@instrumentation.timed("sanitize_links", users=len)
+def sanitize_links(links):
+    """Strip, validate and deduplicate links, keeping their order"""
     if DEBUG:
-        print(f"DEBUG: Sanitizing and saving {len(links)} links")
+        print(f"DEBUG: Sanitizing {len(links)} links")
     
     # Normalize and sanitize links
     clean_links = []
@@ -75,72 +88,16 @@ def sanitize_and_save_links(links, file_path):
             continue
         
         seen.add(link)
-        clean_links.append(link + '\n')  # Ensure newline at end
+        clean_links.append(link)
     
     if DEBUG:
         print(f"DEBUG: After sanitization: {len(clean_links)} links (removed {len(links) - len(clean_links)})")
     
-    # Save to file
-    try:
-        with open(file_path, 'w') as file_h:
-            file_h.writelines(clean_links)
-        if DEBUG:
-            print(f"DEBUG: Successfully saved {len(clean_links)} links to {file_path}")
-    except Exception as e:
-        print(f"ERROR: Failed to save links: {e}")
-    
     return clean_links
 
-#%% Parse command line arguments
-def parse_arguments():
-    parser = argparse.ArgumentParser(description='Instagram Following Accounts Scraper')
-    parser.add_argument('--username', default="fretin98", help='Instagram username')
-    parser.add_argument('--password', default="Lcy199818su!", help='Instagram password')
-    parser.add_argument('--batch-size', type=int, default=3, help='Number of accounts to scrape in this session')
-    parser.add_argument('--headless', action='store_true', help='Run in headless mode')
-    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
-    return parser.parse_args()
-
-#%% Setup and login
-args = parse_arguments()
-
-# Set debug flag
-DEBUG = args.debug
-if DEBUG:
-    print("DEBUG MODE ENABLED")
-
-ensure_data_directory()
-
-# Load existing data
-progress_data = load_saved_data(PROGRESS_FILE, {})
-print(f"Loaded scraping progress: {len(progress_data)} accounts processed")
-
-# Use command line arguments instead of input
-username = args.username
-password = args.password
-batch_size = args.batch_size
-
-print(f"Will process {batch_size} accounts in this session")
-
-# Set up Chrome options
-options = Options()
-PATH = "/Users/chenyusu/Documents/GitHub/Instagram-Network_scraping_and_analysis/chromedriver"  # Chromedriver path
-options.add_argument("--disable-dev-shm-usage")
-options.add_argument("--no-sandbox")
-if args.headless:
-    options.add_argument("--headless")
-options.add_argument("--window-size=1920,1080")
-service = Service(executable_path=PATH)
-driver = webdriver.Chrome(service=service, options=options)
-
-# Login
-essentialRoutines.login_insta(driver, username, password)
-time.sleep(5)
-
 #%% Scraping functions
-def load_links_and_adj_list():
-    """Load the links and adjacency list from files"""
-    # Load links
+def load_links():
+    """Load the links to scrape from file"""
     try:
         with open(FOLLOWING_LINKS_FILE, "r") as links_file:
             links = links_file.readlines()
@@ -149,114 +106,142 @@ def load_links_and_adj_list():
         print(f"Warning: {FOLLOWING_LINKS_FILE} not found. Starting with empty links list.")
         links = []
     
-    # Load adjacency list
-    try:
-        with open(ADJ_LIST_FILE, "r") as adj_file:
-            adj_list = adj_file.readlines()
-        print(f"Loaded adjacency list from {ADJ_LIST_FILE}")
-        all_nodes = essentialRoutines.adjList_to_dict(adj_list)
-    except FileNotFoundError:
-        print(f"Warning: {ADJ_LIST_FILE} not found. Starting with empty adjacency list.")
-        all_nodes = {}
-    
-    return links, all_nodes
+    return links
 
-def get_processed_accounts():
-    """Extract list of accounts that have already been processed from adjList.txt"""
-    processed_accounts = set()
-    
-    if os.path.exists(ADJ_LIST_FILE):
-        try:
-            with open(ADJ_LIST_FILE, "r") as adj_file:
-                for line in adj_file:
-                    parts = line.strip().split()
-                    if len(parts) >= 2:
-                        # The first part is the account that has been processed
-                        processed_accounts.add(parts[0])
-        except Exception as e:
-            print(f"Error reading adjList.txt: {e}")
-    
-    if DEBUG:
-        print(f"DEBUG: Found {len(processed_accounts)} already processed accounts in adjList.txt")
-    
-    return processed_accounts
+def is_account_processed(store, account_username, processed_accounts=()):
+    """
+    Check whether an account was completed in this session (processed_accounts)
+    or has a progress record that is not flagged as rate-limited. Having
+    out-edges is not enough: followers of a scraped account are edge sources too
+    """
+    return account_username in processed_accounts or store.is_processed(account_username)
 
-def deduplicate_adj_list():
-    """Remove duplicate entries from the adjacency list file"""
+@instrumentation.timed("deduplicate_adj_list")
+def deduplicate_adj_list(memory_budget=external_sort.DEFAULT_MEMORY_BUDGET):
+    """
+    Remove duplicate entries from the adjacency list file using a bounded-memory
+    external merge sort
+    
+    Returns:
+        Number of duplicate relations removed
+    """
     if not os.path.exists(ADJ_LIST_FILE):
         print(f"Warning: {ADJ_LIST_FILE} not found. No deduplication needed.")
-        return
+        return 0
     
+    dedup_path = ADJ_LIST_FILE + ".dedup"
     try:
-        # Read existing relations
-        with open(ADJ_LIST_FILE, "r") as adj_file:
-            relations = adj_file.readlines()
-        
-        # Normalize and deduplicate
-        unique_relations = set()
-        for relation in relations:
-            relation = relation.strip()
-            if relation:  # Skip empty lines
-                unique_relations.add(relation)
+        unique_count, duplicates = external_sort.sort_unique_lines([ADJ_LIST_FILE], dedup_path, memory_budget=memory_budget)
         
         # Check if any duplicates were found
-        if len(relations) != len(unique_relations):
-            print(f"Found {len(relations) - len(unique_relations)} duplicate relations in adjList.txt")
-            
-            # Write back unique relations
-            with open(ADJ_LIST_FILE, "w") as adj_file:
-                for relation in sorted(unique_relations):
-                    adj_file.write(f"{relation}\n")
-            
-            print(f"Deduplicated adjList.txt now contains {len(unique_relations)} unique relationships")
+        if duplicates > 0:
+            print(f"Found {duplicates} duplicate relations in adjList.txt")
+            os.replace(dedup_path, ADJ_LIST_FILE)
+            print(f"Deduplicated adjList.txt now contains {unique_count} unique relationships")
         else:
+            os.remove(dedup_path)
             print("No duplicates found in adjList.txt")
+        return duplicates
     
     except Exception as e:
         print(f"Error deduplicating adjList.txt: {e}")
+        if os.path.exists(dedup_path):
+            os.remove(dedup_path)
+        return 0
 
-def save_relations_to_adj_list(new_relations):
-    """Save new relations to adjList.txt with deduplication"""
-    # Load existing adjacency list to avoid duplicates
-    existing_relations = set()
-    if os.path.exists(ADJ_LIST_FILE):
-        with open(ADJ_LIST_FILE, "r") as adj_file:
-            for line in adj_file:
-                if line.strip():  # Skip empty lines
-                    existing_relations.add(line.strip())
-    
-    # Count new relationships
-    new_count = 0
-    for relation in new_relations:
-        if relation not in existing_relations:
-            existing_relations.add(relation)
-            new_count += 1
-    
-    # Write all relationships back to the file
-    with open(ADJ_LIST_FILE, "w") as adj_file:
-        for relation in sorted(existing_relations):
-            adj_file.write(f"{relation}\n")
-    
-    print(f"Added {new_count} new relationships to adjacency list (total: {len(existing_relations)})")
+@instrumentation.timed("save_relations_to_adj_list", users=lambda new_count: new_count)
+def save_relations_to_adj_list(store, new_edges, ranker=None):
+    """
+    Store (follower, followed) edges and append the ones not seen before to the adjacency list journal.
+    
+    Args:
+        store: GraphStore holding the edges
+        new_edges: (follower, followed) pairs
+        ranker: Optional graph_analytics.IncrementalPageRank updated with the new edges
+    """
+    inserted = store.add_edges(new_edges)
+    if ranker is not None and inserted:
+        ranker.add_edges(inserted)
+    
+    new_count = edge_journal.append_relations(
+        [f"{follower} {followed}" for follower, followed in inserted], ADJ_LIST_FILE
+    )
+    
+    print(f"Added {new_count} new relationships to adjacency list (total: {store.edge_count()})")
     return new_count
 
-def scrape_account(account_link, all_nodes):
-    """Scrape a single Instagram account"""
-    print(f"Processing: {account_link}")
-    account_username = account_link.rstrip('/').split('/')[-1].strip()
+def new_relation_delta(account):
+    """Create an empty delta of the relations discovered while scraping an account"""
+    return {
+        "account": account,
+        "follower_edges": [],   # (follower, account) pairs
+        "following_edges": []   # (account, followed) pairs
+    }
+
+def delta_edges(delta):
+    """Return all (follower, followed) edges of a relation delta"""
+    return delta["follower_edges"] + delta["following_edges"]
+
+def expand_frontier(store, delta, depth, max_depth=MAX_DEPTH, depth_quota=DEPTH_QUOTA):
+    """
+    Queue the accounts followed by a scraped account as the next BFS level.
     
-    # Check if we've already processed this account
-    if account_username in progress_data:
-        # If it was previously rate-limited, don't skip but re-scrape
-        if progress_data[account_username].get("rate_limited", False):
-            print(f"Account {account_username} was previously rate-limited. Re-attempting scrape.")
-        else:
-            print(f"Account {account_username} already processed. Skipping.")
-            return True, all_nodes
+    Args:
+        store: GraphStore holding the crawl queue and the visited set
+        delta: Relation delta returned by scrape_account
+        depth: Depth of the scraped account (1 for the accounts you follow)
+        max_depth: Deepest level to queue
+        depth_quota: Maximum number of accounts ever queued at each depth
+        
+    Returns:
+        Number of accounts added to the queue
+    """
+    if depth >= max_depth or not delta["following_edges"]:
+        return 0
+    links = [f"{essentialRoutines.INSTAGRAM_URL}/{followed}/" for _, followed in delta["following_edges"]]
+    added = store.enqueue_frontier(links, depth + 1, quota=depth_quota)
+    if added:
+        print(f"Queued {added} newly discovered accounts at depth {depth + 1}")
+    return added
+
+def start_ranker(store):
+    """
+    Compute the PageRank of the stored graph for incremental updates during the session.
+    
+    Returns:
+        graph_analytics.IncrementalPageRank, or None if NumPy/SciPy are not installed
+    """
+    try:
+        import graph_analytics  # NumPy and SciPy are only needed for the rankings
+    except ImportError as e:
+        print(f"PageRank updates disabled ({e})")
+        return None
+    
+    start = time.time()
+    ranker = graph_analytics.IncrementalPageRank.from_store(store)
+    ranker.save(store)
+    print(f"Ranked {ranker.num_nodes} accounts by PageRank in {time.time() - start:.1f}s")
+    return ranker
+
+def save_rankings(store, ranker, top_k=5):
+    """
+    Reconverge the incremental PageRank, store the scores for the crawl scheduler
+    and return the top_k most central accounts.
+    """
+    ranker.reconverge()
+    ranker.save(store)
+    return ranker.top_k(top_k)
+
+def load_profile_counts(driver, account_link, account_username):
+    """
+    Open a profile and read its username and follower/following counts.
     
+    Returns:
+        Tuple of (username, followers, following); counts that cannot be read are 0
+    """
     # Navigate to the account
     driver.get(account_link)
-    time.sleep(3)
+    essentialRoutines.wait_for_profile(driver)
     
     # Try to get the username from the page
     try:
@@ -280,10 +265,6 @@ def scrape_account(account_link, all_nodes):
     
     print(f"Scraping {curr_username}")
     
-    # Define limits for reasonable scraping
-    follower_limit = 2000
-    following_limit = 2000
-    
     # Get follower and following counts - use fastest method first
     try:
         # Try JavaScript approach first (fastest)
@@ -311,19 +292,6 @@ def scrape_account(account_link, all_nodes):
             curr_Followers = counts[0]
             curr_Following = counts[1]
             
-            # Early check if the account exceeds limits
-            if curr_Followers > follower_limit or curr_Following > following_limit:
-                print(f"Early detection: Account has too many followers ({curr_Followers}) or following ({curr_Following}). Skipping detailed scraping.")
-                # Record that we processed this account
-                progress_data[curr_username] = {
-                    "processed": True,
-                    "skipped": True,
-                    "followers_count": curr_Followers,
-                    "following_count": curr_Following,
-                    "timestamp": time.time()
-                }
-                save_data(progress_data, PROGRESS_FILE)
-                return True, all_nodes
         else:
             # If JS approach failed, set to None to try other methods
             curr_Followers = None
@@ -408,15 +376,68 @@ def scrape_account(account_link, all_nodes):
             curr_Followers = 0
             curr_Following = 0
     
+    return curr_username, curr_Followers, curr_Following
+
+@instrumentation.timed("scrape_account", users=lambda result: len(delta_edges(result[1])))
+def scrape_account(driver, store, account_link, stats_ttl=graph_store.PROFILE_STATS_TTL, suspend_on_rate_limit=False, resume_suspended=None, resume_cursor=None):
+    """
+    Scrape a single Instagram account
+    
+    Args:
+        suspend_on_rate_limit: Raise essentialRoutines.RateLimitSuspended instead of
+            sleeping through a rate limit back-off; the exception carries the
+            partial delta as its delta attribute
+        resume_suspended: List type ('followers' or 'following') a suspended scrape
+            stopped at; lists are resumed from the edges already stored for the
+            account and a followers list completed before the suspension is kept
+        resume_cursor: Cursor of the suspended list (see essentialRoutines.scrape_whole_list)
+    
+    Returns:
+        Tuple of (success, delta) where delta holds only the follower and
+        following edges discovered for this account (see new_relation_delta)
+    """
+    print(f"Processing: {account_link}")
+    account_username = account_link.rstrip('/').split('/')[-1].strip()
+    delta = new_relation_delta(account_username)
+    
+    # Check if we've already processed this account
+    previous_progress = store.get_progress(account_username)
+    if previous_progress is not None:
+        # If it was previously rate-limited, don't skip but re-scrape
+        if previous_progress.get("rate_limited", False):
+            print(f"Account {account_username} was previously rate-limited. Re-attempting scrape.")
+        else:
+            print(f"Account {account_username} already processed. Skipping.")
+            return True, delta
+    
+    # Counts read recently (e.g. by the pre-check) save loading the profile;
+    # scrape_whole_list opens the profile itself when the lists are scraped
+    cached_stats = store.get_cached_profile_stats(account_username, stats_ttl)
+    if cached_stats is not None:
+        curr_username = account_username
+        curr_Followers = cached_stats["followers"]
+        curr_Following = cached_stats["following"]
+        print(f"Scraping {curr_username} (profile stats cached {(time.time() - cached_stats['fetched_at']) / 60:.0f} minutes ago)")
+    else:
+        curr_username, curr_Followers, curr_Following = load_profile_counts(driver, account_link, account_username)
+        if curr_Followers or curr_Following:
+            store.save_profile_stats(account_username, curr_Followers, curr_Following)
+    delta["account"] = curr_username
+    
+    # Define limits for reasonable scraping
+    follower_limit = FOLLOWER_LIMIT
+    following_limit = FOLLOWING_LIMIT
+    
     print(f"{curr_username}: Followers: {curr_Followers}, Following: {curr_Following}")
     
     # Only scrape if counts are reasonable (below limit)
     success = False
+    suspended = None  # RateLimitSuspended raised by scrape_whole_list
     
     if curr_Followers > follower_limit or curr_Following > following_limit:
         print(f"Account has too many followers ({curr_Followers}) or following ({curr_Following}). Skipping detailed scraping.")
         # Just record that we processed this account
-        progress_data[curr_username] = {
+        progress_record = {
             "processed": True,
             "skipped": True,
             "followers_count": curr_Followers,
@@ -428,12 +449,21 @@ def scrape_account(account_link, all_nodes):
         followers = []
         following = []
         
+        list_options = {"suspend_on_rate_limit": suspend_on_rate_limit}
+        if resume_suspended:
+            print(f"Resuming suspended scrape of {curr_username} at its {resume_suspended}")
+        if resume_suspended == "following":
+            followers = store.in_neighbors(curr_username)
+        
         # Scrape followers if count is reasonable
-        if curr_Followers > 0 and curr_Followers <= follower_limit:
+        if resume_suspended != "following" and curr_Followers > 0 and curr_Followers <= follower_limit:
             try:
                 # Try to get followers using the API approach
                 print(f"Scraping {curr_Followers} followers for {curr_username}...")
-                followers_data = essentialRoutines.scrape_whole_list("followers", driver, account_link)
+                if resume_suspended:
+                    list_options["resume_from_saved"] = store.in_neighbors(curr_username)
+                    list_options["next_cursor"] = resume_cursor
+                followers_data = essentialRoutines.scrape_whole_list("followers", driver, account_link, **list_options)
                 
                 # Handle the case where scrape_whole_list returns a tuple (followers, cursor)
                 if isinstance(followers_data, tuple) and len(followers_data) >= 1:
@@ -442,28 +472,30 @@ def scrape_account(account_link, all_nodes):
                     followers = followers_data  # Use as is if not a tuple
                     
                 print(f"Retrieved {len(followers)} followers")
-                
-                # Add to adjacency list
-                for follower in followers:
-                    try:
-                        # Ensure follower is a string, not a list
-                        if isinstance(follower, str):
-                            if follower not in all_nodes:
-                                all_nodes[follower] = []
-                            all_nodes[follower].append(curr_username)
-                        else:
-                            print(f"Skipping non-string follower: {follower}")
-                    except Exception as e:
-                        print(f"Error adding follower {follower} to adjacency list: {e}")
+            except essentialRoutines.RateLimitSuspended as e:
+                # Keep the users collected before the rate limit
+                followers = e.usernames
+                suspended = e
             except Exception as e:
                 print(f"Error scraping followers: {e}")
+            
+            # Record follower edges (follower -> account)
+            for follower in followers:
+                # Ensure follower is a string, not a list
+                if isinstance(follower, str):
+                    delta["follower_edges"].append((follower, curr_username))
+                else:
+                    print(f"Skipping non-string follower: {follower}")
         
-        # Scrape following if count is reasonable
-        if curr_Following > 0 and curr_Following <= following_limit:
+        # Scrape following if count is reasonable (and the followers did not hit a rate limit)
+        if suspended is None and curr_Following > 0 and curr_Following <= following_limit:
             try:
                 # Try to get following using the API approach
                 print(f"Scraping {curr_Following} following for {curr_username}...")
-                following_data = essentialRoutines.scrape_whole_list("following", driver, account_link)
+                if resume_suspended:
+                    list_options["resume_from_saved"] = store.out_neighbors(curr_username)
+                    list_options["next_cursor"] = resume_cursor
+                following_data = essentialRoutines.scrape_whole_list("following", driver, account_link, **list_options)
                 
                 # Handle the case where scrape_whole_list returns a tuple (following, cursor)
                 if isinstance(following_data, tuple) and len(following_data) >= 1:
@@ -472,11 +504,18 @@ def scrape_account(account_link, all_nodes):
                     following = following_data  # Use as is if not a tuple
                     
                 print(f"Retrieved {len(following)} following")
-                
-                # Add to adjacency list
-                all_nodes[curr_username] = following
+            except essentialRoutines.RateLimitSuspended as e:
+                following = e.usernames
+                suspended = e
             except Exception as e:
                 print(f"Error scraping following: {e}")
+            
+            # Record following edges (account -> followed)
+            for followed in following:
+                if isinstance(followed, str):
+                    delta["following_edges"].append((curr_username, followed))
+                else:
+                    print(f"Skipping non-string following: {followed}")
         
         # Check if we've hit Instagram's rate limit (exactly RATE_LIMIT_THRESHOLD followers or following)
         rate_limited = False
@@ -488,9 +527,12 @@ def scrape_account(account_link, all_nodes):
         if len(following) > 0 and len(following) <= RATE_LIMIT_THRESHOLD and curr_Following > RATE_LIMIT_THRESHOLD * 2:
             print(f"RATE LIMIT DETECTED: Retrieved only {len(following)} following when account has {curr_Following}")
             rate_limited = True
+        
+        if suspended is not None:
+            rate_limited = True
             
         # Record progress
-        progress_data[curr_username] = {
+        progress_record = {
             "processed": not rate_limited,  # Mark as not processed if rate-limited
             "rate_limited": rate_limited,   # Flag to indicate rate limit was hit
             "skipped": False,
@@ -504,234 +546,415 @@ def scrape_account(account_link, all_nodes):
         success = True
     
     # Save the updated progress
-    save_data(progress_data, PROGRESS_FILE)
+    store.set_progress(curr_username, progress_record)
+    
+    # Hand the partial results to the caller, which resumes the scrape after the back-off
+    if suspended is not None:
+        suspended.delta = delta
+        raise suspended
     
-    return success, all_nodes
+    return success, delta
+
+def maintenance_tasks(store, dedupe_memory_mb=64, stats_ttl=graph_store.PROFILE_STATS_TTL, ranker=None):
+    """Local work run while scraping is suspended by a rate limit (see maintenance.run_maintenance)"""
+    def compact():
+        edge_journal.wait_for_background_compaction()
+        return edge_journal.compact_journal(ADJ_LIST_FILE)
+    
+    def export_files():
+        store.export_progress_json(PROGRESS_FILE)
+        return store.export_links_file(FOLLOWING_LINKS_FILE)
+    
+    def graph_summary():
+        summary = maintenance.refresh_graph_summary(ADJ_LIST_FILE, store=store)
+        return {"nodes": summary["nodes"], "edges": summary["edges"]}
+    
+    tasks = [
+        ("compact_journal", compact),
+        ("dedupe_adj_list", lambda: deduplicate_adj_list(memory_budget=dedupe_memory_mb * 1024 * 1024)),
+        ("export_files", export_files),
+        ("prune_profile_cache", lambda: store.prune_profile_stats(stats_ttl))
+    ]
+    if ranker is not None:
+        tasks.append(("refresh_rankings", lambda: [username for username, _ in save_rankings(store, ranker)]))
+    tasks.append(("graph_summary", graph_summary))
+    return tasks
 
 #%% Main scraping loop
-try:
-    links, all_nodes = load_links_and_adj_list()
+def run_following_session(driver, batch_size=3, dedupe_memory_mb=64, debug=False, max_depth=MAX_DEPTH, depth_quota=DEPTH_QUOTA, stats_ttl=graph_store.PROFILE_STATS_TTL, suspend_on_rate_limit=True, on_event=None):
+    """
+    Scrape a batch of accounts from the crawl queue in the graph store.
+    
+    Args:
+        driver: Selenium webdriver instance that is already logged in
+        batch_size: Number of accounts to scrape in this session
+        dedupe_memory_mb: Memory budget in MB for deduplicating adjList.txt
+        debug: Print debug information about the link queue
+        max_depth: Hops from your own account to crawl; accounts followed by a
+            scraped account are queued while its depth is below max_depth
+        depth_quota: Maximum number of accounts ever queued at each depth beyond 1
+        stats_ttl: Seconds cached profile counts are used instead of loading the profile again
+        suspend_on_rate_limit: On a rate limit, suspend the scrape (keeping its partial
+            results), run maintenance_tasks during the back-off and then resume it,
+            instead of sleeping inside scrape_whole_list
+        on_event: Optional callback receiving structured progress events (see essentialRoutines.emit_event)
+        
+    Returns:
+        Dictionary with the number of processed, rate-limited, failed, suspended and newly
+        discovered accounts and the queue size
+    """
+    global DEBUG
+    DEBUG = debug
+    if DEBUG:
+        print("DEBUG MODE ENABLED")
+    
+    ensure_data_directory()
     
-    # Deduplicate adjacency list at startup
-    print("Deduplicating adjacency list...")
-    deduplicate_adj_list()
+    # Open the graph store, importing the plain files on first use
+    edge_journal.compact_journal(ADJ_LIST_FILE)  # Fold any journal left over from an interrupted session
+    store = graph_store.GraphStore(DB_FILE)
+    store.bootstrap_from_files(adj_list_file=ADJ_LIST_FILE, progress_file=PROGRESS_FILE)
+    print(f"Loaded scraping progress: {store.progress_count()} accounts processed")
+    print(f"Will process {batch_size} accounts in this session")
     
-    # Get accounts that have already been processed
-    processed_accounts = get_processed_accounts()
-    print(f"Found {len(processed_accounts)} accounts that have already been processed")
+    # Accounts completed during this session (the store covers earlier sessions)
+    processed_accounts = set()
+    processed_count = 0
+    rate_limited_count = 0
+    failed_count = 0
+    discovered_count = 0
+    suspended_count = 0
+    remaining_count = 0
+    ranker = None  # Incremental PageRank of the graph, fed with the edges of every scraped account
     
-    # Filter out links to accounts that are already processed
-    if processed_accounts:
-        filtered_links = []
-        skipped_count = 0
+    try:
+        # The crawl queue lives in the store; followingLinks.txt is imported into it
+        # on first use and exported again at the end of the session
+        if store.queue_size() == 0:
+            imported = store.enqueue_links(sanitize_links(load_links()))
+            if imported:
+                print(f"Imported {imported} links from {FOLLOWING_LINKS_FILE} into the crawl queue")
         
-        for link in links:
-            # Extract username from link
-            username = link.rstrip('/').split('/')[-1].strip()
-            if username in processed_accounts:
-                if DEBUG:
-                    print(f"DEBUG: Skipping already processed account: {username}")
-                skipped_count += 1
-                continue
-            filtered_links.append(link)
+        # Deduplicate adjacency list at startup
+        print("Deduplicating adjacency list...")
+        deduplicate_adj_list(memory_budget=dedupe_memory_mb * 1024 * 1024)
         
+        # Rank the stored graph so the scheduler can break ties by centrality
+        ranker = start_ranker(store)
+        
+        # Scrapes suspended by a rate limit in an earlier session resume first,
+        # once their back-off has ended
+        resume_at = store.resume_time()
+        if suspend_on_rate_limit and resume_at is not None and resume_at > time.time():
+            print(f"Rate limit back-off in progress for {(resume_at - time.time()) / 60:.1f} more minutes, doing maintenance first")
+            maintenance.run_maintenance(maintenance_tasks(store, dedupe_memory_mb, stats_ttl, ranker), resume_at, on_event)
+        
+        # Jobs of links that are not queued (e.g. scrapeMyAccount's own lists, which
+        # resume from next_cursor.json) only carried the back-off that just ended
+        cleared_count = store.clear_unqueued_suspended_jobs()
+        if cleared_count and DEBUG:
+            print(f"DEBUG: Cleared {cleared_count} suspended jobs of links that are not in the crawl queue")
+        suspended_jobs = store.suspended_jobs()
+        suspended_links = {job["link"]: job["list_type"] for job in suspended_jobs}
+        suspended_cursors = {job["link"]: job["cursor"] for job in suspended_jobs}
+        
+        # Filter out links to accounts that are already processed
+        skipped_count = store.remove_processed_links()
         if skipped_count > 0:
             print(f"Skipped {skipped_count} already processed accounts")
-            links = filtered_links
-            
-            # Save the filtered list
-            sanitize_and_save_links(links, FOLLOWING_LINKS_FILE)
-            print(f"Saved filtered list with {len(links)} remaining accounts")
-    
-    if not links:
-        print("No links to process. Run scrapeMyAccount.py first to generate links.")
-    else:
-        print(f"Starting batch processing of {min(batch_size, len(links))} accounts")
-        processed_count = 0
-        rate_limited_count = 0
+            print(f"Filtered queue has {store.queue_size()} remaining accounts")
         
-        # First, prioritize accounts by checking if they are suitable for processing
-        if batch_size > 1 and len(links) > batch_size:
-            print("Pre-checking accounts to prioritize ones with reasonable follower/following counts...")
+        queue_size = store.queue_size()
+        if queue_size == 0:
+            print("No links to process. Run scrapeMyAccount.py first to generate links.")
+        else:
+            print(f"Starting batch processing of {min(batch_size, queue_size)} accounts")
             
-            # Track accounts that are good candidates (have reasonable counts)
-            good_candidates = []
-            bad_candidates = []
+            # Order the queue by expected new edges per minute, using the counts,
+            # known edges and rate-limit history already in the store
+            crawl_scheduler.schedule_queue(store, FOLLOWER_LIMIT, FOLLOWING_LIMIT)
             
-            # Use lower limits for prioritization
-            pre_check_follower_limit = 1000  # Lower than the main limit for prioritization
-            pre_check_following_limit = 1000
+            # Counts read from the profiles at the head of the queue
+            observed_counts = {}
             
-            # Check the first N+3 accounts (where N is batch size) to find good candidates
-            max_check = min(len(links), batch_size + 3)
-            for i in range(max_check):
-                try:
-                    current_link = links[i].strip()
-                    account_username = current_link.rstrip('/').split('/')[-1].strip()
-                    
-                    # Skip if already processed
-                    if account_username in processed_accounts:
-                        continue
-                    
-                    # Do a quick check of follower/following counts
-                    driver.get(current_link)
-                    time.sleep(2)
-                    
-                    # Try to get follower/following counts quickly
+            # Refine the order by checking the live counts of the best-ranked accounts
+            if batch_size > 1 and queue_size > batch_size:
+                print("Pre-checking accounts to prioritize the ones with the best expected yield...")
+                
+                # Check the first N+3 accounts (where N is batch size)
+                head_links = store.peek_links(batch_size + 3)
+                for i in range(len(head_links)):
                     try:
-                        # Javascript approach for faster extraction
-                        js_script = """
-                        const followerText = document.querySelector('a[href*="followers"] span')?.textContent || 
-                                          document.evaluate('//span[contains(text(), "follower")]', document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue?.textContent;
-                        const followingText = document.querySelector('a[href*="following"] span')?.textContent || 
-                                           document.evaluate('//span[contains(text(), "following")]', document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue?.textContent;
+                        current_link = head_links[i]
+                        account_username = current_link.rstrip('/').split('/')[-1].strip()
                         
-                        let followers = 0;
-                        let following = 0;
+                        # Skip if already processed
+                        if is_account_processed(store, account_username, processed_accounts):
+                            continue
                         
-                        if (followerText) {
-                            followers = parseInt(followerText.replace(/,/g, '').match(/\\d+/)[0]);
-                        }
-                        if (followingText) {
-                            following = parseInt(followingText.replace(/,/g, '').match(/\\d+/)[0]);
-                        }
+                        # Counts cached within the TTL need no page load
+                        cached_stats = store.get_cached_profile_stats(account_username, stats_ttl)
+                        if cached_stats is not None:
+                            observed_counts[account_username] = (cached_stats["followers"], cached_stats["following"])
+                            print(f"• {account_username}: {cached_stats['followers']} followers, {cached_stats['following']} following (cached)")
+                            continue
                         
-                        return [followers, following];
-                        """
-                        counts = driver.execute_script(js_script)
+                        # Do a quick check of follower/following counts
+                        driver.get(current_link)
+                        essentialRoutines.wait_for_profile(driver, cap=2)
                         
-                        if counts and len(counts) == 2:
-                            follower_count = counts[0]
-                            following_count = counts[1]
+                        # Try to get follower/following counts quickly
+                        try:
+                            # Javascript approach for faster extraction
+                            js_script = """
+                            const followerText = document.querySelector('a[href*="followers"] span')?.textContent || 
+                                              document.evaluate('//span[contains(text(), "follower")]', document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue?.textContent;
+                            const followingText = document.querySelector('a[href*="following"] span')?.textContent || 
+                                               document.evaluate('//span[contains(text(), "following")]', document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue?.textContent;
+                            
+                            let followers = 0;
+                            let following = 0;
+                            
+                            if (followerText) {
+                                followers = parseInt(followerText.replace(/,/g, '').match(/\\d+/)[0]);
+                            }
+                            if (followingText) {
+                                following = parseInt(followingText.replace(/,/g, '').match(/\\d+/)[0]);
+                            }
                             
-                            if follower_count <= pre_check_follower_limit and following_count <= pre_check_following_limit:
-                                good_candidates.append(i)
-                                print(f"✓ {account_username}: Good candidate with {follower_count} followers, {following_count} following")
-                            else:
-                                bad_candidates.append(i)
-                                print(f"✗ {account_username}: Too many connections ({follower_count} followers, {following_count} following)")
+                            return [followers, following];
+                            """
+                            counts = driver.execute_script(js_script)
+                            
+                            if counts and len(counts) == 2:
+                                follower_count = counts[0]
+                                following_count = counts[1]
+                                
+                                observed_counts[account_username] = (follower_count, following_count)
+                                store.save_profile_stats(account_username, follower_count, following_count)
+                                
+                                if follower_count <= FOLLOWER_LIMIT and following_count <= FOLLOWING_LIMIT:
+                                    print(f"✓ {account_username}: Good candidate with {follower_count} followers, {following_count} following")
+                                else:
+                                    print(f"✗ {account_username}: Too many connections ({follower_count} followers, {following_count} following)")
+                        except Exception as e:
+                            # If we can't check, the stored estimate is kept
+                            print(f"Could not pre-check {account_username}: {e}")
                     except Exception as e:
-                        print(f"Could not pre-check {account_username}: {e}")
-                        # If we can't check, assume it's a good candidate
-                        good_candidates.append(i)
-                except Exception as e:
-                    print(f"Error pre-checking account {i}: {e}")
-        
-        # Reorder links to prioritize good candidates
-        if good_candidates:
-            print(f"Found {len(good_candidates)} accounts with reasonable follower/following counts")
-            
-            # Create a new ordered list
-            new_links = []
-            
-            # First add good candidates
-            for i in good_candidates:
-                if i < len(links):
-                    new_links.append(links[i])
-            
-            # Then add all other links that weren't checked
-            for i in range(len(links)):
-                if i not in good_candidates and i not in bad_candidates:
-                    new_links.append(links[i])
-            
-            # Finally add bad candidates at the end
-            for i in bad_candidates:
-                if i < len(links):
-                    new_links.append(links[i])
-            
-            # Replace the original links list
-            links = new_links
+                        print(f"Error pre-checking account {i}: {e}")
             
-            # Save the reordered list
-            sanitize_and_save_links(links, FOLLOWING_LINKS_FILE)
+            # Rank again with the live counts
+            if observed_counts:
+                ranking = crawl_scheduler.schedule_queue(store, FOLLOWER_LIMIT, FOLLOWING_LIMIT, observed_counts)
+                print(f"Checked {len(observed_counts)} accounts; links reordered by expected new edges per minute")
+                if DEBUG:
+                    for link, rate in ranking[:batch_size]:
+                        print(f"DEBUG: {link} -> {rate:.1f} new edges/min")
             
-            print("Links reordered to prioritize accounts with reasonable follower/following counts")
+            # Suspended scrapes go before everything else
+            if suspended_links:
+                store.move_links_to_front(sorted(suspended_links))
 
-        for i in range(min(batch_size, len(links))):
-            if i >= len(links):
-                break
-                
-            current_link = links[0].strip()  # Get the first link
-            
-            try:
-                if DEBUG:
-                    print(f"DEBUG: Processing link #{i+1}/{batch_size}: {current_link}")
-                    print(f"DEBUG: Before processing - {len(links)} links in queue")
+            failed_links = set()
+            for i in range(batch_size):
+                current_link = store.dequeue_link()  # Head of the queue (stays queued until acked)
+                if current_link is None or current_link in failed_links:
+                    break  # Queue is empty or only holds links that already failed in this session
+                delta = None
                 
-                # Extract username to check if already processed
-                account_username = current_link.rstrip('/').split('/')[-1].strip()
-                if account_username in processed_accounts:
+                try:
                     if DEBUG:
-                        print(f"DEBUG: Skipping already processed account: {account_username}")
-                    # Remove from queue since it's already processed
-                    removed_link = links.pop(0)
-                    sanitize_and_save_links(links, FOLLOWING_LINKS_FILE)
-                    continue
-                
-                success, all_nodes = scrape_account(current_link, all_nodes)
-                if success:
-                    processed_count += 1
-                    # Check if the account was rate-limited
-                    if account_username in progress_data and progress_data[account_username].get("rate_limited", False):
-                        rate_limited_count += 1
-                        # Don't add to processed_accounts set if rate-limited, so we can retry later
-                        print(f"Account {account_username} was rate-limited. Will retry in a future session.")
-                    else:
-                        # Add to processed accounts set only if not rate-limited
-                        processed_accounts.add(account_username)
+                        print(f"DEBUG: Processing link #{i+1}/{batch_size}: {current_link}")
+                        print(f"DEBUG: Before processing - {store.queue_size()} links in queue")
                     
-                # Remove the processed link
-                if DEBUG:
-                    print(f"DEBUG: Removing link from queue: {current_link}")
+                    # Extract username to check if already processed
+                    account_username = graph_store.username_from_link(current_link)
+                    resume_suspended = suspended_links.get(current_link)
+                    if is_account_processed(store, account_username, processed_accounts) and not resume_suspended:
+                        if DEBUG:
+                            print(f"DEBUG: Skipping already processed account: {account_username}")
+                        # Remove from queue since it's already processed
+                        store.ack_link(current_link)
+                        continue
                     
-                removed_link = links.pop(0)
-                if DEBUG:
-                    print(f"DEBUG: Link removed. Queue size now: {len(links)}")
+                    essentialRoutines.emit_event(on_event, "account_started", link=current_link, account=account_username)
+                    depth = store.link_depth(current_link) or 1
+                    success, delta = scrape_account(
+                        driver, store, current_link, stats_ttl,
+                        suspend_on_rate_limit=suspend_on_rate_limit, resume_suspended=resume_suspended,
+                        resume_cursor=suspended_cursors.get(current_link)
+                    )
+                    if resume_suspended:
+                        store.clear_suspended_job(current_link)
+                        del suspended_links[current_link]
+                    if success:
+                        processed_count += 1
+                        # Check if the account was rate-limited
+                        account_progress = store.get_progress(account_username)
+                        rate_limited = account_progress is not None and account_progress.get("rate_limited", False)
+                        if rate_limited:
+                            rate_limited_count += 1
+                            # Don't add to processed_accounts set if rate-limited, so we can retry later
+                            print(f"Account {account_username} was rate-limited. Will retry in a future session.")
+                        else:
+                            # Add to processed accounts set only if not rate-limited
+                            processed_accounts.add(account_username)
+                        essentialRoutines.emit_event(
+                            on_event, "account_done", account=delta["account"],
+                            followers=len(delta["follower_edges"]), following=len(delta["following_edges"]),
+                            rate_limited=rate_limited,
+                            skipped=bool(account_progress and account_progress.get("skipped", False))
+                        )
+                        
+                        # Breadth-first expansion: the accounts it follows become the next level
+                        discovered_count += expand_frontier(store, delta, depth, max_depth, depth_quota)
+                        
+                    # Remove the processed link
+                    if DEBUG:
+                        print(f"DEBUG: Removing link from queue: {current_link}")
+                        
+                    store.ack_link(current_link)
+                    
+                except essentialRoutines.RateLimitSuspended as e:
+                    # Keep the partial results and the link at the head of the queue,
+                    # use the back-off for local work, then resume on the next iteration
+                    suspended_count += 1
+                    save_relations_to_adj_list(store, delta_edges(e.delta), ranker)
+                    store.suspend_job(current_link, e.list_type, len(e.usernames), e.resume_at, e.cursor)
+                    suspended_links[current_link] = e.list_type
+                    suspended_cursors[current_link] = e.cursor
+                    print(f"Scrape of {account_username} suspended by a rate limit until {time.strftime('%H:%M:%S', time.localtime(e.resume_at))}")
+                    essentialRoutines.emit_event(
+                        on_event, "rate_limit_suspended", account=account_username, list_type=e.list_type,
+                        collected=len(e.usernames), resume_at=e.resume_at
+                    )
+                    maintenance.run_maintenance(maintenance_tasks(store, dedupe_memory_mb, stats_ttl, ranker), e.resume_at, on_event)
+                    
+                except Exception as e:
+                    print(f"Error processing {current_link}: {e}")
+                    traceback.print_exc()
+                    failed_count += 1
+                    failed_links.add(current_link)
+                    essentialRoutines.emit_event(on_event, "account_failed", link=current_link, error=str(e))
+                    
+                    if DEBUG:
+                        print(f"DEBUG: Moving failed link to end of queue: {current_link}")
+                    
+                    # Move to the end of the queue to try again later
+                    if not store.requeue_link(current_link):
+                        print(f"WARNING: Failed link {current_link} is no longer queued, might have been removed already")
                 
-            except Exception as e:
-                print(f"Error processing {current_link}: {e}")
-                traceback.print_exc()
+                # Save only the relations discovered for this account
+                if delta is not None:
+                    save_relations_to_adj_list(store, delta_edges(delta), ranker)
                 
-                if DEBUG:
-                    print(f"DEBUG: Moving failed link to end of queue: {current_link}")
+                # Periodically fold the journal into adjList.txt without blocking the scrape
+                if (i + 1) % COMPACT_EVERY_N_ACCOUNTS == 0:
+                    edge_journal.compact_in_background(ADJ_LIST_FILE)
                 
-                # Move to the end of the list to try again later
-                # Check if the link still exists in list before appending
-                if links and links[0].strip() == current_link:
-                    links.append(links.pop(0))
-                    if DEBUG:
-                        print(f"DEBUG: Link moved to end. Queue size: {len(links)}")
-                else:
-                    print(f"WARNING: Failed link {current_link} not found at position 0, might have been removed already")
-            
-            # Save updated links and adjacency list after each account
-            sanitize_and_save_links(links, FOLLOWING_LINKS_FILE)
-            
-            if DEBUG:
-                print(f"DEBUG: Links saved")
-            
-            # Create proper formatted adjacency list entries (one relationship per line)
-            new_relations = []
+                print(f"Completed {processed_count}/{batch_size} accounts. {store.queue_size()} remaining in queue.")
+                print(f"Waiting 5 seconds before next account...")
+                time.sleep(5)
             
-            # Add relationships from all_nodes dictionary
-            for follower, following_list in all_nodes.items():
-                for followed in following_list:
-                    new_relations.append(f"{follower} {followed}")
-            
-            # Save relations with deduplication
-            save_relations_to_adj_list(new_relations)
-            
-            print(f"Completed {processed_count}/{batch_size} accounts. {len(links)} remaining in queue.")
-            print(f"Waiting 5 seconds before next account...")
-            time.sleep(5)
+            print(f"\nBatch complete! Processed {processed_count} accounts ({rate_limited_count} were rate-limited and will be retried later).")
+            print(f"{store.queue_size()} links remaining for future sessions.")
+
+    except Exception as e:
+        print(f"Error during batch processing: {e}")
+        traceback.print_exc()
+        essentialRoutines.emit_event(on_event, "error", step="batch", error=str(e))
+    finally:
+        # Make sure adjList.txt contains everything scraped in this session
+        try:
+            edge_journal.wait_for_background_compaction()
+            edge_journal.compact_journal(ADJ_LIST_FILE)
+        except Exception as e:
+            print(f"Error compacting adjacency list journal: {e}")
         
-        print(f"\nBatch complete! Processed {processed_count} accounts ({rate_limited_count} were rate-limited and will be retried later).")
-        print(f"{len(links)} links remaining for future sessions.")
+        # Store the rankings including this session's edges for the next schedule
+        if ranker is not None:
+            try:
+                top_accounts = save_rankings(store, ranker)
+                print("Most central accounts: " + ", ".join(f"{username} ({score:.5f})" for username, score in top_accounts))
+                essentialRoutines.emit_event(
+                    on_event, "rankings_updated", nodes=ranker.num_nodes, edges=ranker.num_edges,
+                    top=[username for username, _ in top_accounts]
+                )
+            except Exception as e:
+                print(f"Error updating PageRank scores: {e}")
+        
+        # Keep scraping_progress.json and followingLinks.txt in sync for auto_scrape and manual inspection
+        try:
+            store.export_progress_json(PROGRESS_FILE)
+            remaining_count = store.export_links_file(FOLLOWING_LINKS_FILE)
+            if DEBUG:
+                print(f"DEBUG: Exported {remaining_count} queued links to {FOLLOWING_LINKS_FILE}")
+            store.close()
+        except Exception as e:
+            print(f"Error exporting scraping progress: {e}")
+    
+    summary = {
+        "processed": processed_count,
+        "rate_limited": rate_limited_count,
+        "failed": failed_count,
+        "discovered": discovered_count,
+        "suspended": suspended_count,
+        "remaining": remaining_count
+    }
+    essentialRoutines.emit_event(on_event, "batch_done", **summary)
+    return summary
+
+#%% Parse command line arguments
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Instagram Following Accounts Scraper')
+    parser.add_argument('--username', default="fretin98", help='Instagram username')
+    parser.add_argument('--password', default="Lcy199818su!", help='Instagram password')
+    parser.add_argument('--batch-size', type=int, default=3, help='Number of accounts to scrape in this session')
+    parser.add_argument('--headless', action='store_true', help='Run in headless mode')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    parser.add_argument('--fresh-login', action='store_true', help='Ignore the cached session and log in with the password')
+    parser.add_argument('--max-depth', type=int, default=MAX_DEPTH, help=f'Hops from your own account to crawl (default: {MAX_DEPTH})')
+    parser.add_argument('--depth-quota', type=int, default=DEPTH_QUOTA, help=f'Maximum accounts queued per depth beyond 1 (default: {DEPTH_QUOTA})')
+    parser.add_argument('--stats-ttl-hours', type=float, default=graph_store.PROFILE_STATS_TTL / 3600, help='Hours cached profile counts are reused (default: 24, 0 disables the cache)')
+    parser.add_argument('--dedupe-memory-mb', type=int, default=64, help='Memory budget in MB for deduplicating adjList.txt (default: 64)')
+    parser.add_argument('--profile', action='store_true', help='Time the scraping steps and write a session profile to instagram_data/profiles')
+    return parser.parse_args()
 
-except Exception as e:
-    print(f"Error during batch processing: {e}")
-    traceback.print_exc()
-finally:
-    # Close the driver
-    driver.close()
-    print("Browser closed. Script complete.")
+if __name__ == "__main__":
+    args = parse_arguments()
+    if args.profile:
+        instrumentation.enable()
+    
+    driver = essentialRoutines.create_driver(headless=args.headless)
+    
+    try:
+        # Login, reusing the cached session of a previous process when it is still valid
+        session_cache.login_with_session_cache(driver, args.username, args.password, use_cache=not args.fresh_login)
+        
+        run_following_session(
+            driver,
+            batch_size=args.batch_size,
+            dedupe_memory_mb=args.dedupe_memory_mb,
+            debug=args.debug,
+            max_depth=args.max_depth,
+            depth_quota=args.depth_quota,
+            stats_ttl=args.stats_ttl_hours * 3600
+        )
+    finally:
+        # Report where the session spent its time (before the wait latencies are cleared)
+        try:
+            instrumentation.save_session_report(label="following_session")
+        except Exception as e:
+            print(f"Error saving session profile: {e}")
+        
+        # Keep the observed wait latencies for tuning essentialRoutines.WAIT_CAPS
+        try:
+            summary = adaptive_wait.save_latency_report(essentialRoutines.WAIT_LATENCY_FILE)
+            for step, stats in summary.items():
+                print(f"Wait {step}: {stats['count']} samples, p50 {stats['p50']}s, p95 {stats['p95']}s, {stats['timeouts']} hit the cap")
+        except Exception as e:
+            print(f"Error saving wait latency report: {e}")
+        
+        # Close the driver
+        driver.close()
+        print("Browser closed. Script complete.")
@@ -0,0 +1,140 @@
+"""
+Cookie jar cache for logged-in Instagram sessions.
+
+Every scraping process used to start with a full login_insta (page load, form
+typing, "Save your login info" prompt). After a successful login the browser
+cookies are written to SESSION_FILE. The next process loads them into its new
+browser, checks with a single page load that Instagram still treats the session
+as logged in, and only falls back to login_insta when it does not.
+"""
+import os
+import json
+import time
+
+from selenium.webdriver.common.by import By
+
+import essentialRoutines
+import adaptive_wait
+
+SESSION_FILE = os.path.join("instagram_data", "session_cookies.json")
+SESSION_MAX_AGE = 7 * 24 * 3600  # Cached sessions older than a week are not tried
+SESSION_COOKIE = "sessionid"  # Instagram's authentication cookie
+SESSION_CHECK_CAP = 5.0  # Seconds to wait for the home page to show either state
+
+# Elements only shown to a logged-in user (direct messages link, home icon)
+LOGGED_IN_XPATH = "//a[contains(@href, '/direct/inbox/')] | //*[local-name()='svg' and @aria-label='Home']"
+LOGIN_FORM_XPATH = "//input[@name='username'] | //input[@type='password']"
+
+def _load_sessions(session_file):
+    if not os.path.exists(session_file):
+        return {}
+    try:
+        with open(session_file, "r") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return {}
+
+def _write_sessions(sessions, session_file):
+    os.makedirs(os.path.dirname(session_file) or ".", exist_ok=True)
+    tmp_path = session_file + ".tmp"
+    # The cookies grant access to the account, so keep the file private
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        json.dump(sessions, f)
+    os.replace(tmp_path, session_file)
+
+def save_session(driver, username, session_file=SESSION_FILE):
+    """Store the browser cookies of a logged-in session for username"""
+    sessions = _load_sessions(session_file)
+    sessions[username] = {
+        "cookies": driver.get_cookies(),
+        "saved_at": time.time()
+    }
+    _write_sessions(sessions, session_file)
+
+def clear_session(username, session_file=SESSION_FILE):
+    """Forget the cached session of username"""
+    sessions = _load_sessions(session_file)
+    if sessions.pop(username, None) is not None:
+        _write_sessions(sessions, session_file)
+
+def session_state(driver):
+    """Return 'logged_in', 'logged_out' or None if the page does not show either yet"""
+    if "/accounts/login" in driver.current_url or driver.find_elements(By.XPATH, LOGIN_FORM_XPATH):
+        return "logged_out"
+    if driver.find_elements(By.XPATH, LOGGED_IN_XPATH):
+        return "logged_in"
+    return None
+
+def restore_session(driver, username, session_file=SESSION_FILE, max_age=SESSION_MAX_AGE):
+    """
+    Load the cached cookies of username into the browser and check that they are still valid.
+
+    Args:
+        driver: Selenium webdriver instance (any page)
+        username: Account whose session should be restored
+        session_file: Cookie cache file
+        max_age: Cached sessions older than this many seconds are ignored
+
+    Returns:
+        True if the browser is logged in with the cached session
+    """
+    cached = _load_sessions(session_file).get(username)
+    if not cached:
+        return False
+    if time.time() - cached.get("saved_at", 0) > max_age:
+        print(f"Cached session for {username} is older than {max_age // 3600} hours, logging in again")
+        return False
+
+    now = time.time()
+    cookies = [
+        cookie for cookie in cached.get("cookies", [])
+        if not cookie.get("expiry") or cookie["expiry"] > now
+    ]
+    if not any(cookie.get("name") == SESSION_COOKIE for cookie in cookies):
+        return False
+
+    # Cookies can only be added for the domain of the current page
+    driver.get(f"{essentialRoutines.INSTAGRAM_URL}/")
+    for cookie in cookies:
+        cookie = dict(cookie)
+        if "expiry" in cookie:
+            cookie["expiry"] = int(cookie["expiry"])
+        try:
+            driver.add_cookie(cookie)
+        except Exception as e:
+            print(f"Could not restore cookie {cookie.get('name')}: {e}")
+
+    driver.get(f"{essentialRoutines.INSTAGRAM_URL}/")
+    adaptive_wait.wait_until(lambda: session_state(driver) is not None, SESSION_CHECK_CAP, 'session_check')
+
+    # Instagram drops an invalid sessionid cookie, so its presence confirms an undecided page
+    state = session_state(driver)
+    if state == "logged_in" or (state is None and driver.get_cookie(SESSION_COOKIE)):
+        return True
+
+    print(f"Cached session for {username} is no longer valid")
+    return False
+
+def login_with_session_cache(driver, username, password, session_file=SESSION_FILE, use_cache=True):
+    """
+    Log in by restoring the cached session, falling back to login_insta.
+    A session obtained through a full login is cached for the next process.
+
+    Returns:
+        True if the cached session was reused, False if a full login was needed
+    """
+    if use_cache and restore_session(driver, username, session_file):
+        print(f"Reused cached session for {username}")
+        return True
+
+    try:
+        driver.delete_all_cookies()  # Drop cookies left by a failed restore
+    except Exception:
+        pass
+    essentialRoutines.login_insta(driver, username, password)
+    if "/accounts/login" not in driver.current_url:
+        save_session(driver, username, session_file)
+    else:
+        clear_session(username, session_file)
+    return False